@@ -0,0 +1,110 @@
+"""Micro-benchmark of the response layer: JSON encode time and bytes on the wire.
+
+    python benchmarks/encoding.py [--notes 200] [--events 400] [--goals 40] [--repeat 50]
+
+Seeds one user in a scratch database, records the payloads the big API routes
+pass to jsonify(), then times every JSON provider on them ("stdlib" is the
+json module Flask used before, "orjson" the new default) and compresses the
+encoded body with every content coding this process can produce.
+"""
+from datetime import date, timedelta
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from seed import EMAIL, PASSWORD, bench_app, seed  # noqa: E402
+from website.responses import available_encoders, make_json_provider, orjson  # noqa: E402
+
+
+def routes():
+    today = date.today()
+    window = f'start={today - timedelta(days=180)}&end={today + timedelta(days=180)}'
+    return [
+        f'/calendar/events?{window}',
+        '/calendar/notes?limit=100',
+        f'/calendar/freebusy?start={today}&end={today + timedelta(days=60)}',
+        '/notes?limit=100',
+        '/roadmap/goals',
+        '/roadmap/progress?days=366',
+    ]
+
+
+class RecordingProvider:
+    """Stands in for app.json and keeps the last object a route serialized"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.payload = None
+
+    def response(self, *args, **kwargs):
+        self.payload = self.provider._prepare_response_obj(args, kwargs)
+        return self.provider.response(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.provider, name)
+
+
+def best_time(function, repeat):
+    """Fastest of `repeat` runs, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def capture_payloads(app):
+    recorder = RecordingProvider(app.json)
+    app.json = recorder
+    client = app.test_client()
+    client.post('/login', data={'email': EMAIL.format(0), 'password': PASSWORD})
+
+    payloads = {}
+    for url in routes():
+        recorder.payload = None
+        response = client.get(url)
+        if response.status_code != 200 or recorder.payload is None:
+            raise SystemExit(f'{url} answered {response.status_code}')
+        payloads[url] = recorder.payload
+    app.json = recorder.provider
+    return payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=float, default=200, help='mean notes of the user')
+    parser.add_argument('--events', type=float, default=400, help='mean calendar events of the user')
+    parser.add_argument('--goals', type=float, default=40, help='mean roadmap goals of the user')
+    parser.add_argument('--repeat', type=int, default=50, help='runs per measurement, the fastest counts')
+    args = parser.parse_args()
+
+    app = bench_app(os.path.join(tempfile.mkdtemp(), 'encoding.db'), RESPONSE_CACHE_MAX_ENTRIES=0)
+    counts = seed(app, users=1, notes=args.notes, events=args.events, goals=args.goals)
+    print('Seeded ' + ', '.join(f'{count} {name}' for name, count in counts.items()))
+    payloads = capture_payloads(app)
+
+    providers = {'stdlib': make_json_provider('stdlib', app)}
+    if orjson is not None:
+        providers['orjson'] = make_json_provider('orjson', app)
+    encoders = available_encoders(app.config['COMPRESS_LEVELS'])
+
+    print(f"\n{'route':<44} {'provider':<8} {'encode ms':>10} {'bytes':>9}"
+          + ''.join(f' {name + " bytes":>11} {name + " ms":>8}' for name in encoders))
+    for url, payload in payloads.items():
+        for name, provider in providers.items():
+            body = provider.response(payload).get_data()
+            encode_ms = best_time(lambda: provider.response(payload).get_data(), args.repeat)
+            line = f'{url[:44]:<44} {name:<8} {encode_ms:>10.3f} {len(body):>9}'
+            for compress in encoders.values():
+                compressed = compress(body)
+                line += f' {len(compressed):>11} {best_time(lambda: compress(body), args.repeat):>8.3f}'
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
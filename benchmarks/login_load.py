@@ -0,0 +1,91 @@
+"""Login throughput vs. latency of other routes while logins are hammering the server.
+
+    python benchmarks/login_load.py [--seconds 10] [--login-threads 16] [--other-threads 4]
+
+Runs the same load twice against a scratch SQLite database: once with an
+effectively unbounded hashing pool (every login hashes at once, like hashing
+on the request thread) and once with the configured bounded pool.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from website import create_app  # noqa: E402
+
+PASSWORD = 'benchmark-password'
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(label, config, seconds, login_threads, other_threads):
+    directory = tempfile.mkdtemp()
+    app = create_app(dict(config, SQLALCHEMY_DATABASE_URI=f'sqlite:///{os.path.join(directory, "bench.db")}'))
+
+    for index in range(login_threads + 1):
+        app.test_client().post('/sign-up', data={'email': f'user{index}@example.com', 'firstName': 'Bench',
+                                                 'password1': PASSWORD, 'password2': PASSWORD})
+
+    stop = threading.Event()
+    logins = []
+    busy = []
+    other_latencies = []
+
+    def login_loop(index):
+        client = app.test_client()
+        while not stop.is_set():
+            response = client.post('/login', data={'email': f'user{index}@example.com', 'password': PASSWORD})
+            (logins if response.status_code == 302 else busy).append(1)
+
+    def other_loop():
+        client = app.test_client()
+        client.post('/login', data={'email': f'user{login_threads}@example.com', 'password': PASSWORD})
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/calendar/stats')
+            other_latencies.append((time.perf_counter() - started) * 1000)
+
+    with ThreadPoolExecutor(max_workers=login_threads + other_threads) as pool:
+        for index in range(login_threads):
+            pool.submit(login_loop, index)
+        for _ in range(other_threads):
+            pool.submit(other_loop)
+        time.sleep(seconds)
+        stop.set()
+
+    print(f'{label}')
+    print(f'  logins/s            {len(logins) / seconds:8.1f}   (refused as busy: {len(busy)})')
+    print(f'  /calendar/stats p50 {statistics.median(other_latencies or [0]):8.1f} ms')
+    print(f'  /calendar/stats p95 {percentile(other_latencies, 0.95):8.1f} ms')
+    print(f'  /calendar/stats p99 {percentile(other_latencies, 0.99):8.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--login-threads', type=int, default=16)
+    parser.add_argument('--other-threads', type=int, default=4)
+    parser.add_argument('--method', default='scrypt:32768:8:1')
+    args = parser.parse_args()
+
+    base = {'PASSWORD_HASH_METHOD': args.method, 'RESPONSE_CACHE_MAX_ENTRIES': 0}
+    run('unbounded (one KDF per login thread)',
+        dict(base, PASSWORD_HASH_WORKERS=args.login_threads, PASSWORD_HASH_QUEUE=args.login_threads),
+        args.seconds, args.login_threads, args.other_threads)
+    run('bounded pool (PASSWORD_HASH_WORKERS default)', base,
+        args.seconds, args.login_threads, args.other_threads)
+
+
+if __name__ == '__main__':
+    main()
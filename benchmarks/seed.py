@@ -0,0 +1,164 @@
+"""Seed a database with synthetic users, notes, calendar events and roadmap goals.
+
+    python benchmarks/seed.py [--users 100] [--notes 50] [--events 80] [--goals 12] [--database PATH]
+
+Users are bench0@example.com, bench1@example.com, ... with the password
+"benchmark-password"; ones that already exist are skipped, so seeding twice
+only adds missing users. Per-user counts are drawn from an exponential
+distribution around the given means (most users are light, a few are heavy),
+and --seed makes every run produce the same data.
+"""
+from datetime import date, datetime, time, timedelta
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from website import create_app, db  # noqa: E402
+from website.models import CalendarEvent, Note, RoadmapGoal, User, note_columns  # noqa: E402
+from website.rollups import rebuild_goal_rollups  # noqa: E402
+from website.search import index_notes  # noqa: E402
+from website.passwords import password_hasher  # noqa: E402
+from website.scheduler import reminder_scheduler  # noqa: E402
+
+PASSWORD = 'benchmark-password'
+EMAIL = 'bench{}@example.com'
+COLORS = ['#007bff', '#28a745', '#dc3545', '#ffc107', '#17a2b8', '#6f42c1']
+RULES = ['FREQ=WEEKLY', 'FREQ=WEEKLY;BYDAY=MO,WE', 'FREQ=DAILY;COUNT=10', 'FREQ=MONTHLY']
+WORDS = ('exam revision lecture project deadline meeting lab report chapter summary '
+         'homework reading group study plan review notes draft final').split()
+
+
+def bench_app(database=None, **config):
+    """The app the benchmarks run against: scratch or given database, no background threads"""
+    config = dict(config, SCHEDULER_ENABLED=False)
+    if database:
+        config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.abspath(database)}'
+    return create_app(config)
+
+
+def sample_count(rng, mean, cap_factor=20):
+    """Per-user row count: exponential around `mean`, capped so one user cannot dominate"""
+    if mean <= 0:
+        return 0
+    return min(int(rng.expovariate(1 / mean)), int(mean * cap_factor))
+
+
+def sentence(rng, length):
+    words = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append(rng.choice(WORDS))
+    return ' '.join(words).capitalize()[:length]
+
+
+def note_rows(rng, user_id, count, mean_length, today):
+    return [{
+        'user_id': user_id,
+        **note_columns(sentence(rng, max(10, min(10000, int(rng.expovariate(1 / mean_length)))))),
+        'date': datetime.combine(today - timedelta(days=rng.randrange(365)), time(rng.randrange(24), rng.randrange(60))),
+    } for _ in range(count)]
+
+
+def event_rows(rng, user_id, count, note_ids, recurring, today):
+    rows = []
+    for _ in range(count):
+        start = time(rng.randrange(7, 20), rng.choice((0, 15, 30, 45))) if rng.random() < 0.6 else None
+        rows.append({
+            'user_id': user_id,
+            'title': sentence(rng, rng.randrange(8, 40)),
+            'description': sentence(rng, rng.randrange(0, 200)) if rng.random() < 0.5 else '',
+            'event_date': today + timedelta(days=rng.randrange(-180, 180)),
+            'start_time': start,
+            'end_time': time(min(start.hour + 1, 23), start.minute) if start else None,
+            'color': rng.choice(COLORS),
+            'note_id': rng.choice(note_ids) if note_ids and rng.random() < 0.3 else None,
+            'recurrence_rule': rng.choice(RULES) if rng.random() < recurring else None,
+        })
+    return rows
+
+
+def goal_rows(rng, user_id, count, today):
+    rows = []
+    for position in range(1, count + 1):
+        completed = rng.random() < 0.4
+        rows.append({
+            'user_id': user_id,
+            'title': sentence(rng, rng.randrange(8, 60)),
+            'description': sentence(rng, rng.randrange(0, 300)),
+            'position': position,
+            'deadline': today + timedelta(days=rng.randrange(-60, 60)) if rng.random() < 0.7 else None,
+            'is_completed': completed,
+            'completed_at': datetime.combine(today, time(12)) if completed else None,
+        })
+    return rows
+
+
+def seed(app, users=100, notes=50, events=80, goals=12, note_length=400, recurring=0.1, random_seed=1):
+    """Create the missing bench users and their data; returns {table: rows inserted}"""
+    rng = random.Random(random_seed)
+    today = date.today()
+    counts = {'users': 0, 'notes': 0, 'events': 0, 'goals': 0}
+
+    with app.app_context():
+        password = password_hasher.hash(PASSWORD)  # One KDF run, shared by every bench user
+        existing = set(db.session.scalars(db.select(User.email).where(User.email.like('bench%@example.com'))))
+
+        for index in range(users):
+            # Draw every user's numbers even when it is skipped, so reruns stay reproducible
+            user_counts = (sample_count(rng, notes), sample_count(rng, events), sample_count(rng, goals))
+            user_rng = random.Random(f'{random_seed}-{index}')
+            email = EMAIL.format(index)
+            if email in existing:
+                continue
+
+            user_id = db.session.scalar(db.insert(User).values(email=email, password=password,
+                                                                first_name=f'Bench {index}').returning(User.id))
+            note_ids = []
+            if user_counts[0]:
+                note_ids = list(db.session.scalars(db.insert(Note).returning(Note.id),
+                                                   note_rows(user_rng, user_id, user_counts[0], note_length, today)))
+            event_ids = []
+            if user_counts[1]:
+                event_ids = list(db.session.scalars(
+                    db.insert(CalendarEvent).returning(CalendarEvent.id),
+                    event_rows(user_rng, user_id, user_counts[1], note_ids, recurring, today)))
+            goal_ids = []
+            if user_counts[2]:
+                goal_ids = list(db.session.scalars(db.insert(RoadmapGoal).returning(RoadmapGoal.id),
+                                                   goal_rows(user_rng, user_id, user_counts[2], today)))
+
+            # Same search entries, reminders and overdue flags the routes would have written
+            index_notes(db.session, note_ids)
+            reminder_scheduler.sync_events(event_ids)
+            reminder_scheduler.sync_goals(goal_ids)
+            rebuild_goal_rollups(db.session, [user_id])
+            db.session.commit()
+
+            counts['users'] += 1
+            counts['notes'] += len(note_ids)
+            counts['events'] += len(event_ids)
+            counts['goals'] += len(goal_ids)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', help='SQLite file (default: instance/database.db)')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--notes', type=float, default=50, help='mean notes per user')
+    parser.add_argument('--events', type=float, default=80, help='mean calendar events per user')
+    parser.add_argument('--goals', type=float, default=12, help='mean roadmap goals per user')
+    parser.add_argument('--note-length', type=float, default=400, help='mean note length in characters')
+    parser.add_argument('--recurring', type=float, default=0.1, help='fraction of events that repeat')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    app = bench_app(args.database)
+    counts = seed(app, args.users, args.notes, args.events, args.goals, args.note_length, args.recurring, args.seed)
+    print('Inserted ' + ', '.join(f'{count} {name}' for name, count in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+"""Scripted user scenarios with per-route latency, throughput and SQL statement counts.
+
+    python benchmarks/suite.py [--scenarios login,calendar,notes,roadmap] [--users 8] [--iterations 20]
+                               [--database PATH | --url http://127.0.0.1:5000] [--save run.json]
+    python benchmarks/suite.py ... --compare baseline.json        # run, then compare with a saved run
+    python benchmarks/suite.py --current run.json --compare baseline.json   # compare two saved runs
+
+Without --url the scenarios run in-process against the Flask test client, on
+--database or a scratch database seeded by seed.py. With --url they run over
+HTTP against a server whose database was seeded with benchmarks/seed.py.
+SQL counts come from the server's /metrics (pass --metrics-token if it needs one).
+--compare exits with status 1 when a route's p95 grew by more than --threshold
+or it runs noticeably more SQL statements per request than in the baseline.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+import urllib.request
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from seed import EMAIL, PASSWORD, bench_app, seed  # noqa: E402
+
+METRIC_LINE = re.compile(r'^http_request_sql_statements_(sum|count)\{endpoint="([^"]*)"\} (\S+)$')
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class LocalClient:
+    """Flask test client of an in-process app"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, json_body=None, form=None, headers=None):
+        response = self.client.open(path, method=method, json=json_body, data=form, headers=headers)
+        return response.status_code, response.get_data()  # get_data() also drains streamed bodies
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None  # Time the 302 itself, like the test client does
+
+
+class HttpClient:
+    """Cookie-keeping HTTP client for a running server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()), NoRedirect)
+
+    def request(self, method, path, json_body=None, form=None, headers=None):
+        headers = dict(headers or {})
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif form is not None:
+            body = urlencode(form).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        request = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers)
+        try:
+            with self.opener.open(request) as response:
+                return response.status, response.read()
+        except HTTPError as e:
+            return e.code, e.read()
+
+
+class VirtualUser:
+    """One bench user running scenarios; records (endpoint, ms, ok) per request"""
+
+    def __init__(self, client, index, rng):
+        self.client = client
+        self.email = EMAIL.format(index)
+        self.rng = rng
+        self.samples = []
+
+    def step(self, endpoint, method, path, json_body=None, form=None, expect=(200,)):
+        started = time.perf_counter()
+        status, body = self.client.request(method, path, json_body, form)
+        self.samples.append((endpoint, (time.perf_counter() - started) * 1000, status in expect))
+        return body
+
+    def login(self, measured=True):
+        form = {'email': self.email, 'password': PASSWORD}
+        if measured:
+            self.step('auth.login', 'POST', '/login', form=form, expect=(302,))
+        else:
+            self.client.request('POST', '/login', form=form)
+
+
+# Scenarios: one iteration each, as a user would do it in the browser
+
+def scenario_login(user):
+    user.login()
+
+
+def scenario_calendar(user):
+    """Open the calendar page: page, month of events, stats and the note picker"""
+    month = date.today().replace(day=1)
+    end = (month + timedelta(days=32)).replace(day=1)
+    user.step('calendar.calendar_page', 'GET', '/calendar')
+    user.step('calendar.get_all_events', 'GET', f'/calendar/events?start={month - timedelta(days=7)}'
+                                                 f'&end={end + timedelta(days=7)}')
+    user.step('calendar.get_all_events', 'GET', f'/calendar/events?start={date.today()}')  # Upcoming list
+    user.step('calendar.get_calendar_statistics', 'GET', '/calendar/stats')
+    user.step('calendar.get_user_notes', 'GET', '/calendar/notes')
+
+
+def scenario_notes(user):
+    """Write a note, then edit the newest one"""
+    user.step('views.home', 'POST', '/', form={'note': f'Benchmark note {user.rng.random():.6f}'})
+    page = json.loads(user.step('views.list_notes', 'GET', '/notes?limit=1'))
+    if page['notes']:
+        note_id = page['notes'][0]['id']
+        user.step('views.edit_note', 'POST', '/edit-note',
+                  json_body={'noteId': note_id, 'newData': f'Edited {user.rng.random():.6f}'})
+
+
+def scenario_roadmap(user):
+    """Load the goals and drag one of them to another place"""
+    goals = json.loads(user.step('roadmap.get_goals', 'GET', '/roadmap/goals'))
+    order = [goal['id'] for goal in goals]
+    if len(order) > 1:
+        order.insert(user.rng.randrange(len(order)), order.pop(user.rng.randrange(len(order))))
+        user.step('roadmap.reorder_goals', 'POST', '/roadmap/goals/reorder', json_body={'order': order})
+
+
+SCENARIOS = {
+    'login': scenario_login,
+    'calendar': scenario_calendar,
+    'notes': scenario_notes,
+    'roadmap': scenario_roadmap,
+}
+
+
+def scrape_sql_counts(client, token=None):
+    """{endpoint: [statements, requests]} from the server's /metrics"""
+    headers = {'Authorization': f'Bearer {token}'} if token else None
+    status, body = client.request('GET', '/metrics', headers=headers)
+    if status != 200:
+        return {}
+    counts = {}
+    for line in body.decode().splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            kind, endpoint, value = match.groups()
+            counts.setdefault(endpoint, [0, 0])[kind == 'count'] = float(value)
+    return counts
+
+
+def run_scenario(name, make_client, users, iterations, seed_value):
+    def run_user(index):
+        user = VirtualUser(make_client(), index, random.Random(f'{seed_value}-{name}-{index}'))
+        if name != 'login':
+            user.login(measured=False)
+        for _ in range(iterations):
+            SCENARIOS[name](user)
+        return user.samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        samples = [sample for result in pool.map(run_user, range(users)) for sample in result]
+    return samples, time.perf_counter() - started
+
+
+def run(args):
+    if args.url:
+        def make_client():
+            return HttpClient(args.url)
+        target = args.url
+    else:
+        database = args.database or os.path.join(tempfile.mkdtemp(), 'bench.db')
+        config = {'RESPONSE_CACHE_MAX_ENTRIES': 0} if args.no_cache else {}
+        app = bench_app(database, **config)
+        seed(app, users=args.users, notes=args.notes, events=args.events, goals=args.goals)
+
+        def make_client():
+            return LocalClient(app)
+        target = database
+
+    metrics_client = make_client()
+    sql_before = scrape_sql_counts(metrics_client, args.metrics_token)
+
+    latencies, errors, scenarios = {}, {}, {}
+    for name in args.scenarios:
+        samples, seconds = run_scenario(name, make_client, args.users, args.iterations, args.seed)
+        scenarios[name] = {'requests': len(samples), 'seconds': round(seconds, 3),
+                           'throughput': round(len(samples) / seconds, 1) if seconds else 0}
+        for endpoint, ms, ok in samples:
+            latencies.setdefault(endpoint, []).append(ms)
+            errors[endpoint] = errors.get(endpoint, 0) + (not ok)
+
+    sql_after = scrape_sql_counts(metrics_client, args.metrics_token)
+    routes = {}
+    for endpoint, values in sorted(latencies.items()):
+        before, after = sql_before.get(endpoint, [0, 0]), sql_after.get(endpoint, [0, 0])
+        requests = after[1] - before[1]
+        routes[endpoint] = {
+            'count': len(values),
+            'errors': errors[endpoint],
+            'p50': round(percentile(values, 0.50), 2),
+            'p95': round(percentile(values, 0.95), 2),
+            'p99': round(percentile(values, 0.99), 2),
+            'queries': round((after[0] - before[0]) / requests, 2) if requests else None,
+        }
+
+    return {
+        'meta': {'target': target, 'started': datetime.now().isoformat(timespec='seconds'),
+                 'users': args.users, 'iterations': args.iterations, 'scenarios': args.scenarios},
+        'scenarios': scenarios,
+        'routes': routes,
+    }
+
+
+def print_report(result):
+    print(f"Run {result['meta']['started']} against {result['meta']['target']}")
+    print(f"{'scenario':<12} {'requests':>9} {'seconds':>9} {'req/s':>9}")
+    for name, scenario in result['scenarios'].items():
+        print(f"{name:<12} {scenario['requests']:>9} {scenario['seconds']:>9.2f} {scenario['throughput']:>9.1f}")
+    print()
+    print(f"{'route':<36} {'count':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'SQL/req':>8}")
+    for endpoint, route in result['routes'].items():
+        queries = '-' if route['queries'] is None else f"{route['queries']:.1f}"
+        print(f"{endpoint:<36} {route['count']:>6} {route['errors']:>6} {route['p50']:>8.1f} "
+              f"{route['p95']:>8.1f} {route['p99']:>8.1f} {queries:>8}")
+
+
+def compare(baseline, current, threshold):
+    """Print per-route changes; returns the routes that regressed"""
+    print()
+    print(f"Compared with {baseline['meta']['started']} ({baseline['meta']['target']})")
+    print(f"{'route':<36} {'p95 before':>10} {'p95 now':>10} {'change':>8} {'SQL before':>10} {'SQL now':>8}")
+    regressions = []
+    for endpoint, route in current['routes'].items():
+        old = baseline['routes'].get(endpoint)
+        if old is None:
+            print(f'{endpoint:<36} (new route)')
+            continue
+        change = (route['p95'] - old['p95']) / old['p95'] if old['p95'] else 0
+        # Cache hits make the average wobble a little; a new N+1 adds at least one statement
+        more_sql = None not in (route['queries'], old['queries']) and route['queries'] > old['queries'] + 0.5
+        flag = ''
+        if change > threshold or more_sql:
+            regressions.append(endpoint)
+            flag = '  REGRESSION'
+        print(f"{endpoint:<36} {old['p95']:>10.1f} {route['p95']:>10.1f} {change:>+8.0%} "
+              f"{str(old['queries']):>10} {str(route['queries']):>8}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        type=lambda value: [name for name in value.split(',') if name])
+    parser.add_argument('--users', type=int, default=8, help='concurrent virtual users (bench0..N-1)')
+    parser.add_argument('--iterations', type=int, default=20, help='scenario runs per user')
+    parser.add_argument('--database', help='SQLite file for in-process runs (default: scratch database)')
+    parser.add_argument('--url', help='run over HTTP against this server instead')
+    parser.add_argument('--metrics-token')
+    parser.add_argument('--no-cache', action='store_true', help='in-process: switch the response cache off')
+    parser.add_argument('--notes', type=float, default=50, help='seeding: mean notes per user')
+    parser.add_argument('--events', type=float, default=80, help='seeding: mean events per user')
+    parser.add_argument('--goals', type=float, default=12, help='seeding: mean goals per user')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', help='write the results as JSON')
+    parser.add_argument('--compare', help='saved run to compare with')
+    parser.add_argument('--current', help='saved run to use instead of running the scenarios')
+    parser.add_argument('--threshold', type=float, default=0.2, help='p95 growth that counts as a regression')
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    if args.current:
+        with open(args.current) as f:
+            result = json.load(f)
+    else:
+        result = run(args)
+    print_report(result)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, result, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
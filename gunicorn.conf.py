@@ -0,0 +1,40 @@
+"""gunicorn settings, all overridable from the environment
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+kill -HUP <master pid> restarts the workers gracefully (new code and settings,
+open requests finish first); kill -TERM shuts down the same way.
+"""
+import multiprocessing
+import os
+
+from website.engine import env_value
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+# Processes scale with the cores; threads let one worker hold open /changes/stream
+# connections and wait on SQLite locks without blocking its other requests
+workers = env_value('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1)
+threads = env_value('GUNICORN_THREADS', 8)
+worker_class = 'gthread'
+
+keepalive = env_value('GUNICORN_KEEPALIVE', 5)  # seconds an idle keep-alive connection stays open
+timeout = env_value('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_value('GUNICORN_GRACEFUL_TIMEOUT', 30)  # then open streams are cut; EventSource reconnects
+
+# Recycle workers after this many requests (0 = never); the jitter keeps them from restarting together
+max_requests = env_value('GUNICORN_MAX_REQUESTS', 0)
+max_requests_jitter = env_value('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# Import the app, templates and run migrations once in the master, then fork.
+# Without preloading every worker migrates on start; run "flask migrate" first then.
+preload_app = env_value('GUNICORN_PRELOAD', True)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_worker_init(worker):
+    from wsgi import init_worker
+
+    init_worker()
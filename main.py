@@ -1,6 +1,11 @@
 from website import create_app
+from website.scheduler import reminder_scheduler
+from werkzeug.serving import is_running_from_reloader
 
 app = create_app()
 
 if __name__ == '__main__': #ruleaza site-ul doar daca rulezi codul
+    # Only in the reloader's child, the process that serves the requests
+    if app.config['SCHEDULER_ENABLED'] and is_running_from_reloader():
+        reminder_scheduler.start(app)
     app.run(debug=True)
@@ -0,0 +1,64 @@
+"""POST /calendar/events/batch: date-window deletes and batches where nothing applies."""
+from datetime import date
+
+import pytest
+
+from website import create_app, db
+from website.cache import NullCache
+from website.models import CalendarEvent, User
+
+BATCH = '/calendar/events/batch'
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "batch.db"}',
+        'RESPONSE_CACHE_BACKEND': NullCache(),
+        'SCHEDULER_ENABLED': False,
+        'ASSETS_BUILD': False,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    })
+    client = app.test_client()
+    client.post('/sign-up', data={'email': 'batch@example.com', 'firstName': 'Batch',
+                                  'password1': 'batch-events', 'password2': 'batch-events'})
+
+    with app.app_context():
+        user_id = User.query.filter_by(email='batch@example.com').one().id
+        db.session.add_all([
+            CalendarEvent(title='Lecture', event_date=date(2026, 1, 5), user_id=user_id,
+                          recurrence_rule='FREQ=WEEKLY'),
+            CalendarEvent(title='Lab', event_date=date(2026, 2, 2), user_id=user_id,
+                          recurrence_rule='FREQ=WEEKLY;COUNT=3'),
+            CalendarEvent(title='Exam', event_date=date(2026, 2, 10), user_id=user_id),
+        ])
+        db.session.commit()
+    return client
+
+
+def titles(client, start, end):
+    return sorted(item['title'] for item in client.get(f'/calendar/events?start={start}&end={end}').get_json())
+
+
+def test_window_delete_cancels_series_occurrences(client):
+    response = client.post(BATCH, json={'operations': [
+        {'op': 'delete_where', 'filter': {'start': '2026-02-01', 'end': '2026-03-01'}}]})
+    assert response.get_json()['results'][0] == {'index': 0, 'success': True, 'deleted': 2, 'seriesChanged': 1}
+
+    assert titles(client, '2026-02-01', '2026-03-01') == []  # Lab lay inside the window, Lecture started before
+    assert titles(client, '2026-01-01', '2026-02-01') == ['Lecture'] * 4
+    assert titles(client, '2026-03-01', '2026-04-01') == ['Lecture'] * 5
+
+
+def test_open_window_delete_ends_series(client):
+    client.post(BATCH, json={'operations': [{'op': 'delete_where', 'filter': {'start': '2026-02-01'}}]})
+
+    assert titles(client, '2026-01-01', '2027-01-01') == ['Lecture'] * 4
+
+
+def test_failed_batch_keeps_data_version(client):
+    etag = client.get('/calendar/events?start=2026-01-01&end=2026-02-01').headers['ETag']
+    response = client.post(BATCH, json={'operations': [{'op': 'create', 'data': {}}, {'op': 'delete', 'id': 'x'}]})
+
+    assert not response.get_json()['success']
+    assert client.get('/calendar/events?start=2026-01-01&end=2026-02-01').headers['ETag'] == etag
@@ -0,0 +1,61 @@
+"""The calendar feed must run a fixed number of SQL statements, however many
+note-linked events the window holds (no N+1 on the linked notes)."""
+from datetime import date, timedelta
+from sqlalchemy import event
+
+from website import create_app, db
+from website.cache import NullCache
+from website.models import CalendarEvent, Note, User
+
+WINDOW = '/calendar/events?start=2024-01-01&end=2024-03-01'
+EVENTS = 5  # The second run seeds ten times as many
+
+
+def feed_statement_count(database, events):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}',
+        'RESPONSE_CACHE_BACKEND': NullCache(),
+        'SCHEDULER_ENABLED': False,
+        'ASSETS_BUILD': False,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    })
+    client = app.test_client()
+    client.post('/sign-up', data={'email': 'feed@example.com', 'firstName': 'Feed',
+                                  'password1': 'feed-queries', 'password2': 'feed-queries'})
+
+    with app.app_context():
+        user_id = User.query.filter_by(email='feed@example.com').one().id
+        for index in range(events):
+            note = Note(data=f'Notes for exam {index} ' * 20, user_id=user_id)
+            db.session.add(note)
+            db.session.flush()
+            db.session.add(CalendarEvent(title=f'Exam {index}', event_date=date(2024, 1, 1) + timedelta(days=index % 59),
+                                         user_id=user_id, note_id=note.id))
+            if index % 5 == 0:  # Some weekly series with their own notes as well
+                db.session.add(CalendarEvent(title=f'Lecture {index}', event_date=date(2024, 1, 1), user_id=user_id,
+                                             note_id=note.id, recurrence_rule='FREQ=WEEKLY'))
+        db.session.commit()
+        engine = db.engine
+
+    client.get(WINDOW)  # Warm the per-process caches (the logged-in user's identity) first
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(WINDOW)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    assert response.status_code == 200
+    feed = response.get_json()
+    assert sum(1 for item in feed if item['extendedProps'].get('noteContent')) == len(feed) >= events
+    return len(statements)
+
+
+def test_feed_statements_do_not_grow_with_events(tmp_path):
+    few = feed_statement_count(tmp_path / 'few.db', EVENTS)
+    many = feed_statement_count(tmp_path / 'many.db', EVENTS * 10)
+    assert few == many
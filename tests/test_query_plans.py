@@ -0,0 +1,7 @@
+"""Every statement of the hot routes must use an index (SQLite EXPLAIN QUERY PLAN)."""
+from website.query_plans import check_query_plans
+
+
+def test_hot_routes_use_an_index():
+    # Builds its own app on a scratch database, migrated like a fresh install
+    assert check_query_plans() == []
@@ -1,45 +1,80 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from os import path
+from .cache import ResponseCache
+from .engine import configure_database, install_sqlite_functions, install_sqlite_pragmas
+from .compression import decompress_text
 
 db = SQLAlchemy()
 DB_NAME = "database.db"
 login_manager = LoginManager()
+response_cache = ResponseCache()
 
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config['SECRET_KEY'] = 'secret key'
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{DB_NAME}'
+    app.config.update(config or {})
+    configure_database(app, default_uri=f'sqlite:///{DB_NAME}')
     db.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS'))
+        install_sqlite_functions(db.engine, {'note_text': decompress_text})  # Read by the note search index
     login_manager.init_app(app)
+    response_cache.init_app(app)
+
+    from .metrics import metrics_bp, metrics
+    from .responses import configure_json, response_compressor
+    metrics.init_app(app)  # Before the other hooks, so their SQL is counted too
+    configure_json(app)
+    response_compressor.init_app(app)  # After metrics, so response sizes are the bytes sent
 
     from .views import views
     from .auth import auth
     from .calendar import calendar_bp
     from .roadmap import roadmap_bp
+    from .search import search_bp
+    from .changes import changes_bp, change_stream
+    from .health import health_bp
+    from .assets import assets_bp, assets
 
     app.register_blueprint(views, url_prefix='/')
     app.register_blueprint(auth, url_prefix='/')
     app.register_blueprint(calendar_bp, url_prefix='/')
     app.register_blueprint(roadmap_bp, url_prefix='/')
+    app.register_blueprint(search_bp, url_prefix='/')
+    app.register_blueprint(changes_bp, url_prefix='/')
+    app.register_blueprint(metrics_bp, url_prefix='/')
+    app.register_blueprint(health_bp, url_prefix='/')
+    app.register_blueprint(assets_bp, url_prefix='/')
+    assets.init_app(app)
+    change_stream.init_app(app)
 
     from .models import User, Note, CalendarEvent
+    from .migrations import register_commands
+    from .identity import identity_cache, load_user_identity
+    from .passwords import password_hasher
+    from .scheduler import reminder_scheduler
 
     create_database(app)
+    register_commands(app)
+    identity_cache.init_app(app)
+    password_hasher.init_app(app)
+    reminder_scheduler.init_app(app)  # After the schema is ready; the thread is started by the server
 
     login_manager.login_view = 'auth.login'
 
     @login_manager.user_loader
     def load_user(id):
-        return User.query.get(int(id))
+        return load_user_identity(int(id))
 
     return app
 
 
 def create_database(app):
-    if not path.exists('website/' + DB_NAME):
+    # Idempotent: creates missing tables and applies pending migrations
+    from .migrations import run_migrations
+
+    if app.config.get('AUTO_MIGRATE', True):
         with app.app_context():
-            db.create_all()
-        print('Created Database!')
\ No newline at end of file
+            run_migrations()
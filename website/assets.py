@@ -0,0 +1,195 @@
+from flask import Blueprint, current_app, request, send_from_directory
+from flask.cli import with_appcontext
+from markupsafe import Markup
+from threading import Lock
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+import click
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, bundles are then precompressed with gzip only
+    brotli = None
+
+# Page CSS/JS lives in website/static/css and website/static/js. build_assets()
+# concatenates each bundle into static/dist/<name>.<content hash>.<ext>, next to
+# .gz/.br copies, and writes manifest.json; templates link the current file
+# through asset_url() / asset_stylesheet() / asset_script().
+BUNDLES = {
+    'base.css': ['css/base.css'],
+    'changes.js': ['js/changes.js'],
+    'home.js': ['js/home.js'],
+    'calendar.css': ['css/calendar.css'],
+    'calendar.js': ['js/calendar.js'],
+    'roadmap.css': ['css/roadmap.css'],
+    'roadmap.js': ['js/roadmap.js'],
+}
+DIST_FOLDER = 'dist'
+MANIFEST = 'manifest.json'
+HASH_LENGTH = 12
+ONE_YEAR = 365 * 24 * 3600
+
+assets_bp = Blueprint('assets', __name__)
+
+
+def gzip_bytes(content):
+    return gzip.compress(content, compresslevel=9, mtime=0)  # mtime=0: same bytes on every build
+
+
+# (Content-Encoding, file suffix, compressor), in order of preference when serving
+ENCODINGS = [('gzip', '.gz', gzip_bytes)]
+if brotli is not None:
+    ENCODINGS.insert(0, ('br', '.br', lambda content: brotli.compress(content, quality=11)))
+
+
+def write_file(path, content):
+    """Write through a temporary file, so a worker never serves half a file"""
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+
+def build_assets(static_folder, bundles=None):
+    """Write the fingerprinted, precompressed bundles and their manifest; returns the manifest
+
+    Unchanged bundles keep their file; files of the previous build are kept so
+    pages rendered just before a deploy can still load them, older ones are removed.
+    """
+    dist = os.path.join(static_folder, DIST_FOLDER)
+    os.makedirs(dist, exist_ok=True)
+    manifest_path = os.path.join(dist, MANIFEST)
+    previous = read_manifest(manifest_path)
+
+    manifest = {}
+    for name, sources in (bundles or BUNDLES).items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_folder, source), 'rb') as f:
+                parts.append(f.read())
+        content = b'\n'.join(parts)
+
+        stem, extension = os.path.splitext(name)
+        filename = f'{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{extension}'
+        path = os.path.join(dist, filename)
+        if not os.path.exists(path):
+            for _, suffix, compress in ENCODINGS:
+                compressed = compress(content)
+                if len(compressed) < len(content):
+                    write_file(path + suffix, compressed)
+            write_file(path, content)  # Last: its presence means the build of this bundle is complete
+        manifest[name] = filename
+
+    if manifest != previous:
+        write_file(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+    keep = {MANIFEST} | set(manifest.values()) | set(previous.values())
+    for filename in os.listdir(dist):
+        base, suffix = os.path.splitext(filename)
+        if filename.startswith('.'):
+            continue  # Another process is writing it
+        if filename not in keep and not (suffix in ('.gz', '.br') and base in keep):
+            os.remove(os.path.join(dist, filename))
+    return manifest
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Fingerprint and precompress the CSS/JS bundles into static/dist"""
+    for name, filename in sorted(build_assets(current_app.static_folder).items()):
+        click.echo(f'{name} -> {DIST_FOLDER}/{filename}')
+
+
+def read_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class Assets:
+    """Resolves bundle names to their fingerprinted URLs for the templates
+
+    ASSETS_BUILD: build the bundles when the app starts (default True); turn it
+    off when "flask build-assets" runs as a deploy step instead.
+    ASSETS_AUTO_REBUILD: rebuild whenever a page is rendered (default: app.debug),
+    so edits to the sources show up without a restart.
+    """
+
+    def __init__(self):
+        self.manifest = {}
+        self._lock = Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_BUILD', True)
+        app.config.setdefault('ASSETS_AUTO_REBUILD', None)
+        app.config.setdefault('ASSETS_MAX_AGE', ONE_YEAR)
+
+        self.static_folder = app.static_folder
+        self.auto_rebuild = app.config['ASSETS_AUTO_REBUILD']
+        if self.auto_rebuild is None:
+            self.auto_rebuild = app.debug
+        if app.config['ASSETS_BUILD']:
+            self.manifest = build_assets(self.static_folder)
+        else:
+            self.manifest = read_manifest(os.path.join(self.static_folder, DIST_FOLDER, MANIFEST))
+
+        app.add_template_global(asset_url)
+        app.add_template_global(asset_stylesheet)
+        app.add_template_global(asset_script)
+        app.cli.add_command(build_assets_command)
+        app.extensions['assets'] = self
+
+    def url(self, name):
+        if self.auto_rebuild:
+            with self._lock:
+                self.manifest = build_assets(self.static_folder)
+        try:
+            filename = self.manifest[name]
+        except KeyError:
+            raise KeyError(f'Unknown asset bundle {name!r}; run "flask build-assets"') from None
+        return f'/static/{DIST_FOLDER}/{filename}'
+
+
+assets = Assets()
+
+
+def asset_url(name):
+    """URL of the current build of a bundle, e.g. asset_url('calendar.js')"""
+    return current_app.extensions['assets'].url(name)
+
+
+def asset_stylesheet(name):
+    return Markup('<link rel="stylesheet" href="{}">').format(asset_url(name))
+
+
+def asset_script(name):
+    return Markup('<script src="{}"></script>').format(asset_url(name))
+
+
+@assets_bp.route(f'/static/{DIST_FOLDER}/<path:filename>')
+def bundle(filename):
+    """A built bundle, precompressed when the client accepts it, cached for good (the name changes with the content)"""
+    dist = os.path.join(current_app.static_folder, DIST_FOLDER)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    max_age = current_app.config['ASSETS_MAX_AGE'] if filename != MANIFEST else None
+    response = None
+    for encoding, suffix, _ in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.exists(os.path.join(dist, filename + suffix)):
+            response = send_from_directory(dist, filename + suffix, mimetype=mimetype, max_age=max_age)
+            response.content_encoding = encoding
+            break
+    if response is None:
+        response = send_from_directory(dist, filename, mimetype=mimetype, max_age=max_age)
+
+    response.vary.add('Accept-Encoding')
+    if max_age:
+        response.cache_control.immutable = True
+    return response
@@ -1,7 +1,7 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for
 from .models import User
-from werkzeug.security import generate_password_hash, check_password_hash
 from . import db
+from .passwords import password_hasher, HashingBusy
 from flask_login import login_user, login_required, logout_user, current_user
 
 #blueprint for authentification
@@ -17,7 +17,17 @@ def login():
 
         user = User.query.filter_by(email=email).first()
         if user:
-            if check_password_hash(user.password, password):
+            try:
+                password_ok = password_hasher.verify(user.password, password)
+                if password_ok and password_hasher.needs_rehash(user.password):
+                    # Stored with older/weaker parameters - upgrade while we know the password
+                    user.password = password_hasher.hash(password)
+                    db.session.commit()
+            except HashingBusy:
+                flash('The server is busy, please try again in a moment.', category='error')
+                return render_template("login.html", user=current_user), 503
+
+            if password_ok:
                 flash('Logged in successfully!', category='success')
                 login_user(user, remember=True)
                 return redirect(url_for('views.home'))
@@ -56,7 +66,11 @@ def sign_up():
         elif len(password1) < 7:
             flash('Password must be at least 7 characters.', category='error')
         else:
-            hashed_password = generate_password_hash(password1, method='pbkdf2:sha256', salt_length=16)
+            try:
+                hashed_password = password_hasher.hash(password1)
+            except HashingBusy:
+                flash('The server is busy, please try again in a moment.', category='error')
+                return render_template("sign_up.html", user=current_user), 503
             new_user = User(email=email, first_name=first_name, password=hashed_password)
 
             db.session.add(new_user)
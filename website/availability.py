@@ -0,0 +1,82 @@
+from bisect import bisect_left
+from datetime import datetime, time, timedelta
+
+# Overlap checks and free/busy for timed calendar events. All-day events and
+# events without a start time never make anyone busy.
+DEFAULT_EVENT_DURATION = timedelta(hours=1)  # Timed events without (a valid) end time
+ONE_DAY = timedelta(days=1)
+
+
+def event_interval(day, start_time, end_time):
+    """(start, end) datetimes of a timed event on `day`, or None for an all-day event"""
+    if start_time is None:
+        return None
+    start = datetime.combine(day, start_time)
+    if end_time is not None and end_time > start_time:
+        return start, datetime.combine(day, end_time)
+    return start, min(start + DEFAULT_EVENT_DURATION, datetime.combine(day + ONE_DAY, time()))
+
+
+class IntervalIndex:
+    """Intervals sorted by start so an overlap lookup bisects instead of scanning
+
+    Nothing is longer than the longest interval, so only the ones starting in
+    [start - longest, end) can overlap a query; events end on the day they start,
+    which keeps that slice to a handful of rows.
+    """
+
+    def __init__(self, intervals):
+        self._intervals = sorted(intervals, key=lambda interval: interval[0])  # (start, end, item)
+        self._starts = [interval[0] for interval in self._intervals]
+        self._longest = max((end - start for start, end, _ in self._intervals), default=timedelta(0))
+
+    def overlapping(self, start, end):
+        """Items of the intervals that overlap [start, end)"""
+        low = bisect_left(self._starts, start - self._longest)
+        high = bisect_left(self._starts, end)
+        return [item for item_start, item_end, item in self._intervals[low:high]
+                if item_start < end and item_end > start]
+
+
+def merge_intervals(intervals):
+    """Sorted, non-overlapping (start, end) periods covering every interval"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def free_slots(busy, window_start, window_end, day_start=timedelta(0), day_end=ONE_DAY):
+    """Gaps between the merged `busy` periods, inside [day_start, day_end) of every day of the window"""
+    slots, index = [], 0
+    day = window_start
+    while day < window_end:
+        midnight = datetime.combine(day, time())
+        cursor, limit = midnight + day_start, midnight + day_end
+        while index < len(busy) and busy[index][1] <= cursor:
+            index += 1
+        position = index  # The next day starts from here again
+        while position < len(busy) and busy[position][0] < limit:
+            if busy[position][0] > cursor:
+                slots.append((cursor, busy[position][0]))
+            cursor = max(cursor, busy[position][1])
+            position += 1
+        if cursor < limit:
+            slots.append((cursor, limit))
+        day += ONE_DAY
+    return slots
+
+
+def parse_clock(value, default):
+    """'HH:MM' as an offset from midnight; '24:00' is the end of the day"""
+    if not value:
+        return default
+    hours, _, minutes = value.partition(':')
+    hours, minutes = int(hours), int(minutes or 0)
+    offset = timedelta(hours=hours, minutes=minutes)
+    if not 0 <= minutes < 60 or not timedelta(0) <= offset <= ONE_DAY:
+        raise ValueError(f'Invalid time of day: {value}')
+    return offset
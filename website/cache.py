@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from threading import Lock
+import time
+
+
+class LocalLRUCache:
+    """In-process LRU cache with a TTL and entry/byte limits, shared by all threads of a worker"""
+
+    def __init__(self, max_entries=2048, max_bytes=64 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, tag, value)
+        self._tags = {}  # tag -> set of keys, so a user's entries can be dropped at once
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value, tag=None):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, tag, value)
+            self._tags.setdefault(tag, set()).add(key)
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tag):
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes
+            }
+
+    def _remove(self, key):
+        _, tag, value = self._entries.pop(key)
+        self._bytes -= len(value)
+        keys = self._tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+
+class NullCache:
+    """Backend that stores nothing - use it to switch response caching off"""
+
+    hits = misses = 0
+
+    def get(self, key):
+        self.misses += 1
+        return None
+
+    def set(self, key, value, tag=None):
+        pass
+
+    def invalidate(self, tag):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {'hits': 0, 'misses': self.misses, 'evictions': 0, 'entries': 0, 'bytes': 0}
+
+
+class ResponseCache:
+    """Holds the encoded JSON of read endpoints per user
+
+    Any object with get/set/invalidate/clear/stats can be plugged in through
+    RESPONSE_CACHE_BACKEND (e.g. a shared store when running several workers).
+    """
+
+    def __init__(self, app=None):
+        self.backend = NullCache()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_BACKEND', None)
+        app.config.setdefault('RESPONSE_CACHE_MAX_ENTRIES', 2048)
+        app.config.setdefault('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+        app.config.setdefault('RESPONSE_CACHE_TTL', 300)
+
+        self.backend = app.config['RESPONSE_CACHE_BACKEND'] or LocalLRUCache(
+            max_entries=app.config['RESPONSE_CACHE_MAX_ENTRIES'],
+            max_bytes=app.config['RESPONSE_CACHE_MAX_BYTES'],
+            ttl=app.config['RESPONSE_CACHE_TTL']
+        )
+        app.extensions['response_cache'] = self
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, user_id):
+        self.backend.set(key, value, tag=user_id)
+
+    def invalidate_user(self, user_id):
+        self.backend.invalidate(user_id)
+
+    def stats(self):
+        return self.backend.stats()
@@ -1,12 +1,37 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, Response, current_app, render_template, request, jsonify, stream_with_context
 from flask_login import login_required, current_user
-from .models import CalendarEvent, Note
+from .models import CalendarEvent, CalendarEventException, Note
 from . import db
-from datetime import datetime, date
+from .versioning import bump_data_version, conditional_get
+from .views import note_previews_page, page_args
+from .recurrence import format_rule, normalize_rule, occurrences, parse_rule
+from .scheduler import reminder_scheduler
+from .changes import record_change
+from .ical import date_property, escape_text, fold_line, iter_vevents, parse_date_value, unescape_text
+from .availability import IntervalIndex, event_interval, free_slots, merge_intervals, parse_clock
+from datetime import datetime, date, timedelta
+from itertools import groupby
+import json
+import io
+import re
 
 
 calendar_bp = Blueprint('calendar', __name__)
 
+NOTE_PREVIEW_LENGTH = 200  # Characters of the linked note shown in the feed
+NEW_EVENT_DEFAULTS = {'description': '', 'color': '#007bff'}
+MAX_BATCH_OPERATIONS = 5000
+DEFAULT_EXPANSION_DAYS = 366  # How far ahead series are expanded when the client gives no end
+OCCURRENCE_FIELDS = ('title', 'description', 'event_date', 'start_time', 'end_time', 'color')
+EXPORT_BATCH_SIZE = 500  # Rows fetched per round trip and events per written chunk
+IMPORT_BATCH_SIZE = 1000  # Events inserted per transaction
+MAX_IMPORT_ERRORS = 100  # Errors listed in the import response (all are counted)
+ICS_HEADER = ('BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//Site-examen//Calendar//EN', 'CALSCALE:GREGORIAN')
+HEX_COLOR = re.compile(r'^#[0-9a-fA-F]{6}$')
+CONFLICT_HORIZON_DAYS = 90  # How far ahead a repeating event is checked for overlaps
+MAX_REPORTED_CONFLICTS = 20
+MAX_FREEBUSY_DAYS = 92
+
 
 @calendar_bp.route('/calendar')
 @login_required
@@ -15,56 +40,342 @@ def calendar_page():
     return render_template("calendar.html", user=current_user)
 
 
+def parse_window_date(value):
+    """Parse a FullCalendar window bound ('2024-01-28' or '2024-01-28T00:00:00+02:00')"""
+    if not value:
+        return None
+    return datetime.strptime(value[:10], '%Y-%m-%d').date()
+
+
+def parse_event_fields(data):
+    """Map the calendar page's JSON keys to CalendarEvent columns (only keys that are present)"""
+    fields = {}
+
+    if 'title' in data:
+        fields['title'] = data['title']
+    if 'description' in data:
+        fields['description'] = data['description']
+    if 'date' in data:
+        fields['event_date'] = datetime.strptime(data['date'], '%Y-%m-%d').date()
+    if 'startTime' in data:
+        fields['start_time'] = datetime.strptime(data['startTime'], '%H:%M').time() if data['startTime'] else None
+    if 'endTime' in data:
+        fields['end_time'] = datetime.strptime(data['endTime'], '%H:%M').time() if data['endTime'] else None
+    if 'color' in data:
+        fields['color'] = data['color']
+    if 'noteId' in data:
+        fields['note_id'] = data['noteId']
+    if 'recurrence' in data:
+        fields['recurrence_rule'] = normalize_rule(data['recurrence'])
+
+    return fields
+
+
+def parse_event_id(value):
+    """Event id from a JSON body: an integer or a string of digits"""
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).isdigit():
+        raise ValueError('Invalid event id')
+    return int(value)
+
+
+def expand_series(rows, window_start, window_end):
+    """Yield (event, extra, occurrence_date, exception) for every occurrence of the
+    series in rows that is visible in [window_start, window_end)
+
+    rows are (CalendarEvent, extra) pairs; exceptions for all of them are read in one query.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+
+    def in_window(column):
+        conditions = []
+        if window_start:
+            conditions.append(column >= window_start)
+        if window_end:
+            conditions.append(column < window_end)
+        return db.and_(*conditions)
+
+    series_ids = [event.id for event, _ in rows]
+    pending = {
+        (exception.event_id, exception.occurrence_date): exception
+        for exception in CalendarEventException.query.filter(
+            CalendarEventException.event_id.in_(series_ids),
+            db.or_(in_window(CalendarEventException.occurrence_date), in_window(CalendarEventException.event_date))
+        )
+    }
+
+    def visible(day):
+        return (not window_start or day >= window_start) and (not window_end or day < window_end)
+
+    for event, extra in rows:
+        for day in occurrences(event.event_date, event.recurrence_rule, window_start, window_end):
+            exception = pending.pop((event.id, day), None)
+            if exception and (exception.is_cancelled or not visible(exception.event_date or day)):
+                continue
+            yield event, extra, day, exception
+
+    # Occurrences moved into the window from a date outside it
+    series_by_id = {event.id: (event, extra) for event, extra in rows}
+    for (event_id, day), exception in pending.items():
+        if not exception.is_cancelled and not visible(day) and exception.event_date and visible(exception.event_date):
+            event, extra = series_by_id[event_id]
+            yield event, extra, day, exception
+
+
+def feed_item(event, preview, occurrence_date=None, exception=None):
+    """One FullCalendar event object; occurrences of a series get '<id>@<date>' ids"""
+    values = {field: getattr(event, field) for field in OCCURRENCE_FIELDS}
+    if occurrence_date:
+        values['event_date'] = occurrence_date
+    if exception:
+        values.update({field: getattr(exception, field) for field in OCCURRENCE_FIELDS
+                       if getattr(exception, field) is not None})
+
+    # Format basic event data
+    event_data = {
+        'id': f'{event.id}@{occurrence_date.isoformat()}' if occurrence_date else event.id,
+        'title': values['title'] or 'Untitled',
+        'color': values['color'] or '#007bff',
+        'extendedProps': {
+            'description': values['description'] or '',
+            'noteId': event.note_id or None,
+            'hasNote': bool(event.note_id)
+        }
+    }
+    if occurrence_date:
+        event_data['extendedProps'].update({
+            'seriesId': event.id,
+            'occurrenceDate': occurrence_date,
+            'recurrence': event.recurrence_rule
+        })
+
+    # Start/end as date and time objects, the JSON provider writes them as ISO 8601
+    day = values['event_date']
+    if values['start_time']:
+        event_data['start'] = datetime.combine(day, values['start_time'])
+        event_data['extendedProps']['startTime'] = values['start_time']
+    else:
+        event_data['start'] = day
+        event_data['allDay'] = True
+
+    # Format end date/time if exists
+    if values['end_time']:
+        event_data['end'] = datetime.combine(day, values['end_time'])
+        event_data['extendedProps']['endTime'] = values['end_time']
+
+    # Add note content if exists
+    if event.note_id and preview is not None:
+        event_data['extendedProps']['noteContent'] = preview[:NOTE_PREVIEW_LENGTH] + (
+            '...' if len(preview) > NOTE_PREVIEW_LENGTH else '')
+
+    return event_data
+
+
+def record_event_change(event, action):
+    """Queue a delta for the change stream; series go without payload (the client re-reads its window)"""
+    data = None
+    if not event.recurrence_rule:
+        note = db.session.get(Note, event.note_id) if event.note_id else None
+        data = [feed_item(event, note.preview[:NOTE_PREVIEW_LENGTH + 1] if note else None)]
+    record_change(event.user_id, 'event', action, [event.id], data)
+
+
+def busy_intervals(user_id, window_start, window_end, exclude_id=None):
+    """(start, end, conflict item) of every timed event and occurrence in [window_start, window_end)
+
+    Single events come from a range scan on (user_id, event_date), series from
+    the partial series index; only the series are expanded in Python.
+    """
+    query = CalendarEvent.query.filter(CalendarEvent.user_id == user_id)
+    if exclude_id is not None:
+        query = query.filter(CalendarEvent.id != exclude_id)
+
+    rows = [(event, None, None) for event in query.filter(
+        CalendarEvent.recurrence_rule == None, CalendarEvent.start_time != None,
+        CalendarEvent.event_date >= window_start, CalendarEvent.event_date < window_end)]
+    series = query.filter(CalendarEvent.recurrence_rule != None, CalendarEvent.event_date < window_end).all()
+    rows.extend((event, day, exception) for event, _, day, exception
+                in expand_series([(event, None) for event in series], window_start, window_end))
+
+    intervals = []
+    for event, occurrence_date, exception in rows:
+        values = {field: getattr(event, field) for field in OCCURRENCE_FIELDS}
+        if occurrence_date:
+            values['event_date'] = occurrence_date
+        if exception:
+            values.update({field: getattr(exception, field) for field in OCCURRENCE_FIELDS
+                           if getattr(exception, field) is not None})
+        interval = event_interval(values['event_date'], values['start_time'], values['end_time'])
+        if interval:
+            intervals.append(interval + ({
+                'id': event.id,
+                'title': values['title'],
+                'start': interval[0],
+                'end': interval[1],
+                'occurrenceDate': occurrence_date
+            },))
+    return intervals
+
+
+def event_conflicts(event, values=None):
+    """Other timed events of the same user that overlap `event`
+
+    values (OCCURRENCE_FIELDS) checks one edited occurrence instead; a series is
+    checked occurrence by occurrence over the next CONFLICT_HORIZON_DAYS.
+    """
+    if values is None:
+        values = {field: getattr(event, field) for field in OCCURRENCE_FIELDS}
+        days = [values['event_date']]
+        if event.recurrence_rule:
+            days = list(occurrences(event.event_date, event.recurrence_rule, event.event_date,
+                                    event.event_date + timedelta(days=CONFLICT_HORIZON_DAYS)))
+    else:
+        days = [values['event_date']]
+    if values['start_time'] is None or not days:
+        return []  # All-day events never conflict
+
+    index = IntervalIndex(busy_intervals(event.user_id, days[0], days[-1] + timedelta(days=1), exclude_id=event.id))
+    conflicts = {}
+    for day in days:
+        for item in index.overlapping(*event_interval(day, values['start_time'], values['end_time'])):
+            conflicts.setdefault((item['id'], item['occurrenceDate']), item)
+    return sorted(conflicts.values(), key=lambda item: item['start'])[:MAX_REPORTED_CONFLICTS]
+
+
+def parse_occurrence(event):
+    """The ?occurrence=YYYY-MM-DD of a request, checked against the event's rule (None = whole event)"""
+    value = request.args.get('occurrence')
+    if not value:
+        return None
+    occurrence_date = datetime.strptime(value, '%Y-%m-%d').date()
+    if not event.recurrence_rule or next(
+            occurrences(event.event_date, event.recurrence_rule,
+                        occurrence_date, occurrence_date + timedelta(days=1)), None) != occurrence_date:
+        raise ValueError(f'{value} is not an occurrence of this event')
+    return occurrence_date
+
+
+def occurrence_exception(event, occurrence_date):
+    """Existing or new exception row for one occurrence of a series"""
+    exception = CalendarEventException.query.filter_by(
+        event_id=event.id, occurrence_date=occurrence_date).first()
+    if exception is None:
+        exception = CalendarEventException(event_id=event.id, occurrence_date=occurrence_date)
+        db.session.add(exception)
+    return exception
+
+
+def clear_window(user_id, window_start, window_end):
+    """Remove everything the user sees in [window_start, window_end); either bound may be None
+
+    Single events in the window are deleted, and so are series with no occurrence
+    outside it. Other series lose only their occurrences in the window: they are
+    cancelled, or, for a window without an end, the rule stops the day before it.
+    Returns (deleted event ids, ids of series that were changed).
+    """
+    in_window = [CalendarEvent.user_id == user_id]
+    if window_start:
+        in_window.append(CalendarEvent.event_date >= window_start)
+    if window_end:
+        in_window.append(CalendarEvent.event_date < window_end)
+    deleted = list(db.session.scalars(db.select(CalendarEvent.id).where(*in_window,
+                                                                         CalendarEvent.recurrence_rule == None)))
+
+    series = CalendarEvent.query.filter(CalendarEvent.user_id == user_id, CalendarEvent.recurrence_rule != None)
+    if window_end:
+        series = series.filter(CalendarEvent.event_date < window_end)
+    kept = []
+    for event in series:
+        before = window_start and next(occurrences(event.event_date, event.recurrence_rule, None, window_start), None)
+        after = window_end and next(occurrences(event.event_date, event.recurrence_rule, window_end, None), None)
+        if before or after:
+            kept.append(event)
+        else:
+            deleted.append(event.id)
+
+    if window_end:
+        for event, _, occurrence_date, exception in expand_series(((event, None) for event in kept),
+                                                                  window_start, window_end):
+            (exception or occurrence_exception(event, occurrence_date)).is_cancelled = True
+    elif kept:
+        # Open-ended window: end each series the day before, drop or cancel what falls after
+        for event in kept:
+            rule = parse_rule(event.recurrence_rule)
+            rule.update(count=None, until=window_start - timedelta(days=1))
+            event.recurrence_rule = format_rule(rule)
+        kept_ids = [event.id for event in kept]
+        db.session.execute(
+            db.delete(CalendarEventException).where(CalendarEventException.event_id.in_(kept_ids),
+                                                    CalendarEventException.occurrence_date >= window_start),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.execute(
+            db.update(CalendarEventException).where(CalendarEventException.event_id.in_(kept_ids),
+                                                    CalendarEventException.event_date >= window_start)
+            .values(is_cancelled=True),
+            execution_options={'synchronize_session': False}
+        )
+
+    if deleted:
+        db.session.execute(
+            db.delete(CalendarEventException).where(CalendarEventException.event_id.in_(deleted)),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.execute(
+            db.delete(CalendarEvent).where(CalendarEvent.id.in_(deleted)),
+            execution_options={'synchronize_session': False}
+        )
+    return deleted, [event.id for event in kept]
+
+
 # API ROUTES - UNIQUE NAMES FOR EACH ENDPOINT
 
 @calendar_bp.route('/calendar/events', methods=['GET'])
 @login_required
+@conditional_get
 def get_all_events():
-    """Get all events - FIXED VERSION"""
+    """Get events inside the visible window - FIXED VERSION"""
+    # FullCalendar sends ?start=...&end=... (end is exclusive)
     try:
-        events = CalendarEvent.query.filter_by(user_id=current_user.id).all()
+        window_start = parse_window_date(request.args.get('start'))
+        window_end = parse_window_date(request.args.get('end'))
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
 
-        events_list = []
-        for event in events:
-            # Format basic event data
-            event_data = {
-                'id': event.id,
-                'title': event.title or 'Untitled',
-                'color': event.color or '#007bff',
-                'extendedProps': {
-                    'description': event.description or '',
-                    'noteId': event.note_id or None,
-                    'hasNote': bool(event.note_id)
-                }
-            }
-
-            # Format start date/time
-            start_date = event.event_date.strftime('%Y-%m-%d')
-            if event.start_time:
-                event_data['start'] = f"{start_date}T{event.start_time.strftime('%H:%M:%S')}"
-                event_data['extendedProps']['startTime'] = event.start_time.strftime('%H:%M')
-            else:
-                event_data['start'] = start_date
-                event_data['allDay'] = True
-
-            # Format end date/time if exists
-            if event.end_time:
-                event_data['end'] = f"{start_date}T{event.end_time.strftime('%H:%M:%S')}"
-                event_data['extendedProps']['endTime'] = event.end_time.strftime('%H:%M')
-
-            # Add note content if exists
-            if event.note_id and event.note:
-                event_data['extendedProps']['noteContent'] = event.note.data[:200] + (
-                    '...' if len(event.note.data) > 200 else '')
-
-            events_list.append(event_data)
+    try:
+        # Join the linked note in the same SELECT and let SQLite cut the preview,
+        # one extra char tells us whether to add '...'
+        note_preview = db.func.substr(Note.preview, 1, NOTE_PREVIEW_LENGTH + 1).label('note_preview')
+        query = db.session.query(CalendarEvent, note_preview) \
+            .outerjoin(Note, CalendarEvent.note_id == Note.id) \
+            .filter(CalendarEvent.user_id == current_user.id)
+
+        # Single events: plain range query on (user_id, event_date)
+        singles = query.filter(CalendarEvent.recurrence_rule == None)
+        if window_start:
+            singles = singles.filter(CalendarEvent.event_date >= window_start)
+        if window_end:
+            singles = singles.filter(CalendarEvent.event_date < window_end)
+        rows = singles.order_by(CalendarEvent.event_date, CalendarEvent.start_time).all()
+
+        events_list = [feed_item(event, preview) for event, preview in rows]
+
+        # Series: every series that started before the window ends, expanded lazily
+        expand_end = window_end or (window_start or date.today()) + timedelta(days=DEFAULT_EXPANSION_DAYS)
+        series = query.filter(CalendarEvent.recurrence_rule != None,
+                              CalendarEvent.event_date < expand_end).all()
+        for event, preview, occurrence_date, exception in expand_series(series, window_start, expand_end):
+            events_list.append(feed_item(event, preview, occurrence_date, exception))
 
         return jsonify(events_list)
 
-    except Exception as e:
-        print(f"❌ ERROR in get_all_events: {str(e)}")
-        # Return empty array on error to prevent calendar crash
-        return jsonify([])
+    except Exception:
+        current_app.logger.exception('get_all_events failed')
+        # An error status, not an empty list: conditional_get must not cache or tag it,
+        # FullCalendar reports the failure and fetches again on the next navigation
+        db.session.rollback()
+        return jsonify({'error': 'Could not load events'}), 500
 
 
 @calendar_bp.route('/calendar/events', methods=['POST'])
@@ -77,34 +388,23 @@ def create_event():
         if not data.get('title') or not data.get('date'):
             return jsonify({'error': 'Title and date required'}), 400
 
-        event_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
-
-        start_time = None
-        end_time = None
-
-        if data.get('startTime'):
-            start_time = datetime.strptime(data['startTime'], '%H:%M').time()
-        if data.get('endTime'):
-            end_time = datetime.strptime(data['endTime'], '%H:%M').time()
-
-        new_event = CalendarEvent(
-            title=data['title'],
-            description=data.get('description', ''),
-            event_date=event_date,
-            start_time=start_time,
-            end_time=end_time,
-            color=data.get('color', '#007bff'),
-            user_id=current_user.id,
-            note_id=data.get('noteId')
-        )
+        fields = dict(NEW_EVENT_DEFAULTS, **parse_event_fields(data))
+        new_event = CalendarEvent(user_id=current_user.id, **fields)
 
         db.session.add(new_event)
+        db.session.flush()
+        conflicts = event_conflicts(new_event)
+        reminder_scheduler.sync_events([new_event.id])
+        record_event_change(new_event, 'created')
+        bump_data_version(current_user.id)
         db.session.commit()
 
+        # Overlaps are reported, not refused: the page asks the user what to do
         return jsonify({
             'success': True,
             'message': 'Event created',
-            'eventId': new_event.id
+            'eventId': new_event.id,
+            'conflicts': conflicts
         })
 
     except Exception as e:
@@ -122,15 +422,28 @@ def get_single_event(event_id):
         if event.user_id != current_user.id:
             return jsonify({'error': 'Unauthorized'}), 403
 
+        # ?occurrence=YYYY-MM-DD returns that occurrence with its own changes applied
+        values = {field: getattr(event, field) for field in OCCURRENCE_FIELDS}
+        occurrence_date = parse_occurrence(event)
+        if occurrence_date:
+            values['event_date'] = occurrence_date
+            exception = CalendarEventException.query.filter_by(
+                event_id=event.id, occurrence_date=occurrence_date).first()
+            if exception:
+                values.update({field: getattr(exception, field) for field in OCCURRENCE_FIELDS
+                               if getattr(exception, field) is not None})
+
         event_data = {
             'id': event.id,
-            'title': event.title,
-            'description': event.description,
-            'date': event.event_date.strftime('%Y-%m-%d'),
-            'startTime': event.start_time.strftime('%H:%M') if event.start_time else '',
-            'endTime': event.end_time.strftime('%H:%M') if event.end_time else '',
-            'color': event.color,
-            'noteId': event.note_id
+            'title': values['title'],
+            'description': values['description'],
+            'date': values['event_date'],
+            'startTime': values['start_time'].strftime('%H:%M') if values['start_time'] else '',
+            'endTime': values['end_time'].strftime('%H:%M') if values['end_time'] else '',
+            'color': values['color'],
+            'noteId': event.note_id,
+            'recurrence': event.recurrence_rule or '',
+            'occurrenceDate': occurrence_date
         }
 
         return jsonify(event_data)
@@ -150,25 +463,39 @@ def update_single_event(event_id):
             return jsonify({'error': 'Unauthorized'}), 403
 
         data = request.json
-
-        if 'title' in data:
-            event.title = data['title']
-        if 'description' in data:
-            event.description = data['description']
-        if 'date' in data:
-            event.event_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
-        if 'startTime' in data:
-            event.start_time = datetime.strptime(data['startTime'], '%H:%M').time() if data['startTime'] else None
-        if 'endTime' in data:
-            event.end_time = datetime.strptime(data['endTime'], '%H:%M').time() if data['endTime'] else None
-        if 'color' in data:
-            event.color = data['color']
-        if 'noteId' in data:
-            event.note_id = data['noteId']
+        fields = parse_event_fields(data)
+
+        occurrence_date = parse_occurrence(event)
+        if occurrence_date:
+            # "This occurrence only": store the changes as an exception of the series
+            exception = occurrence_exception(event, occurrence_date)
+            for field in OCCURRENCE_FIELDS:
+                if field in fields:
+                    setattr(exception, field, fields[field])
+            record_change(current_user.id, 'event', 'updated', [event.id])
+
+            values = {field: getattr(event, field) for field in OCCURRENCE_FIELDS}
+            values['event_date'] = occurrence_date
+            values.update({field: getattr(exception, field) for field in OCCURRENCE_FIELDS
+                           if getattr(exception, field) is not None})
+            conflicts = event_conflicts(event, values)
+        else:
+            # A new start date or rule invalidates the per-occurrence changes
+            if event.recurrence_rule and (
+                    fields.get('event_date', event.event_date) != event.event_date or
+                    fields.get('recurrence_rule', event.recurrence_rule) != event.recurrence_rule):
+                event.exceptions = []
+            for field, value in fields.items():
+                setattr(event, field, value)
+            db.session.flush()
+            record_event_change(event, 'updated')
+            conflicts = event_conflicts(event)
+        reminder_scheduler.sync_events([event.id])
+        bump_data_version(current_user.id)
 
         db.session.commit()
 
-        return jsonify({'success': True, 'message': 'Event updated'})
+        return jsonify({'success': True, 'message': 'Event updated', 'conflicts': conflicts})
 
     except Exception as e:
         db.session.rollback()
@@ -185,7 +512,15 @@ def delete_single_event(event_id):
         if event.user_id != current_user.id:
             return jsonify({'error': 'Unauthorized'}), 403
 
-        db.session.delete(event)
+        occurrence_date = parse_occurrence(event)
+        if occurrence_date:
+            occurrence_exception(event, occurrence_date).is_cancelled = True
+            record_change(current_user.id, 'event', 'updated', [event_id])
+        else:
+            db.session.delete(event)
+            record_change(current_user.id, 'event', 'deleted', [event_id])
+        reminder_scheduler.sync_events([event_id])
+        bump_data_version(current_user.id)
         db.session.commit()
 
         return jsonify({'success': True, 'message': 'Event deleted'})
@@ -195,37 +530,456 @@ def delete_single_event(event_id):
         return jsonify({'error': str(e)}), 400
 
 
+@calendar_bp.route('/calendar/events/batch', methods=['POST'])
+@login_required
+def batch_events():
+    """Apply many create/update/delete operations in one transaction
+
+    Body: {"operations": [
+        {"op": "create", "data": {...same keys as POST /calendar/events...}},
+        {"op": "update", "id": 5, "data": {...same keys as PUT...}},
+        {"op": "delete", "id": 7},
+        {"op": "delete_where", "filter": {"start": "YYYY-MM-DD", "end": "YYYY-MM-DD"}}
+    ]}
+
+    Operations run in the given order; consecutive operations of the same kind
+    are sent as one statement. delete_where clears a date window (see clear_window);
+    an empty filter removes every event.
+    """
+    data = request.json or {}
+    operations = data.get('operations')
+
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'A non-empty operations list is required'}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch'}), 400
+
+    results = [None] * len(operations)
+    pending = []  # (index, op, payload) of operations that passed validation
+
+    for index, operation in enumerate(operations):
+        try:
+            op = operation.get('op')
+            if op == 'create':
+                payload = operation.get('data') or {}
+                if not payload.get('title') or not payload.get('date'):
+                    raise ValueError('Title and date required')
+                fields = dict(NEW_EVENT_DEFAULTS, **parse_event_fields(payload))
+                fields['user_id'] = current_user.id
+            elif op == 'update':
+                fields = parse_event_fields(operation.get('data') or {})
+                fields['id'] = parse_event_id(operation.get('id'))
+            elif op == 'delete':
+                fields = parse_event_id(operation.get('id'))
+            elif op == 'delete_where':
+                window = operation.get('filter') or {}
+                fields = (parse_window_date(window.get('start')), parse_window_date(window.get('end')))
+            else:
+                raise ValueError(f'Unknown op: {op}')
+            pending.append((index, op, fields))
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            results[index] = {'index': index, 'success': False, 'error': str(e)}
+
+    touched = set()  # Events whose reminders need rebuilding
+    try:
+        for op, group in groupby(pending, key=lambda item: item[1]):
+            group = list(group)
+
+            if op == 'create':
+                new_ids = db.session.scalars(
+                    db.insert(CalendarEvent).returning(CalendarEvent.id, sort_by_parameter_order=True),
+                    [fields for _, _, fields in group]
+                ).all()
+                for (index, _, _), event_id in zip(group, new_ids):
+                    results[index] = {'index': index, 'success': True, 'eventId': event_id}
+                touched.update(new_ids)
+
+            elif op in ('update', 'delete'):
+                ids = [fields['id'] if op == 'update' else fields for _, _, fields in group]
+                owned = set(db.session.scalars(
+                    db.select(CalendarEvent.id).where(CalendarEvent.user_id == current_user.id,
+                                                      CalendarEvent.id.in_(ids))
+                ))
+                touched.update(owned)
+
+                if op == 'update':
+                    # Bulk UPDATE by primary key; rows with no changes are just checked
+                    changes = [fields for _, _, fields in group if fields['id'] in owned and len(fields) > 1]
+                    if changes:
+                        db.session.execute(db.update(CalendarEvent), changes)
+                    # Same rule as PUT: moving a series or changing its rule drops its exceptions
+                    reset = [fields['id'] for fields in changes
+                             if 'event_date' in fields or 'recurrence_rule' in fields]
+                    if reset:
+                        db.session.execute(
+                            db.delete(CalendarEventException).where(CalendarEventException.event_id.in_(reset)),
+                            execution_options={'synchronize_session': False}
+                        )
+                else:
+                    db.session.execute(
+                        db.delete(CalendarEventException).where(CalendarEventException.event_id.in_(owned)),
+                        execution_options={'synchronize_session': False}
+                    )
+                    db.session.execute(
+                        db.delete(CalendarEvent).where(CalendarEvent.user_id == current_user.id,
+                                                       CalendarEvent.id.in_(owned)),
+                        execution_options={'synchronize_session': False}
+                    )
+
+                for index, _, fields in group:
+                    event_id = fields['id'] if op == 'update' else fields
+                    if event_id in owned:
+                        results[index] = {'index': index, 'success': True, 'eventId': event_id}
+                    else:
+                        results[index] = {'index': index, 'success': False, 'error': 'Event not found'}
+
+            else:  # delete_where
+                for index, _, (window_start, window_end) in group:
+                    deleted, changed = clear_window(current_user.id, window_start, window_end)
+                    touched.update(deleted, changed)
+                    results[index] = {'index': index, 'success': True, 'deleted': len(deleted),
+                                      'seriesChanged': len(changed)}
+
+        if any(result['success'] for result in results):
+            reminder_scheduler.sync_events(touched)
+            record_change(current_user.id, 'event', 'reset', sorted(touched))
+            bump_data_version(current_user.id)
+            db.session.commit()
+        else:
+            db.session.rollback()  # Nothing was written: no new version, no reset for the clients
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'success': all(result['success'] for result in results),
+        'results': results
+    })
+
+
+def ics_event_lines(row, exceptions, host):
+    """Content lines of one exported event, followed by its edited occurrences"""
+    uid = f'event-{row.id}@{host}'
+    stamp = (row.created_at or datetime.utcnow()).strftime('%Y%m%dT%H%M%SZ')
+    lines = ['BEGIN:VEVENT', f'UID:{uid}', f'DTSTAMP:{stamp}',
+             date_property('DTSTART', row.event_date, row.start_time)]
+    if row.start_time and row.end_time:
+        lines.append(date_property('DTEND', row.event_date, row.end_time))
+    lines.append(f'SUMMARY:{escape_text(row.title)}')
+    if row.description:
+        lines.append(f'DESCRIPTION:{escape_text(row.description)}')
+    if row.color:
+        lines.append(f'X-COLOR:{row.color}')
+    if row.note_preview is not None:
+        preview = row.note_preview[:NOTE_PREVIEW_LENGTH] + ('...' if len(row.note_preview) > NOTE_PREVIEW_LENGTH else '')
+        lines.append(f'COMMENT:{escape_text(preview)}')
+    if row.recurrence_rule:
+        lines.append(f'RRULE:{row.recurrence_rule}')
+        lines.extend(date_property('EXDATE', exception.occurrence_date, row.start_time)
+                     for exception in exceptions if exception.is_cancelled)
+    lines.append('END:VEVENT')
+
+    # Edited occurrences are separate VEVENTs with the same UID and a RECURRENCE-ID
+    for exception in exceptions:
+        if exception.is_cancelled:
+            continue
+        start_time = exception.start_time or row.start_time
+        end_time = exception.end_time or row.end_time
+        event_date = exception.event_date or exception.occurrence_date
+        lines += ['BEGIN:VEVENT', f'UID:{uid}', f'DTSTAMP:{stamp}',
+                  date_property('RECURRENCE-ID', exception.occurrence_date, row.start_time),
+                  date_property('DTSTART', event_date, start_time)]
+        if start_time and end_time:
+            lines.append(date_property('DTEND', event_date, end_time))
+        lines.append(f'SUMMARY:{escape_text(exception.title or row.title)}')
+        if exception.description or row.description:
+            lines.append(f'DESCRIPTION:{escape_text(exception.description or row.description)}')
+        if exception.color or row.color:
+            lines.append(f'X-COLOR:{exception.color or row.color}')
+        lines.append('END:VEVENT')
+
+    return ''.join(fold_line(line) for line in lines)
+
+
+@calendar_bp.route('/calendar/export.ics', methods=['GET'])
+@login_required
+def export_calendar():
+    """Stream all events of the user as an iCalendar file
+
+    Rows are read EXPORT_BATCH_SIZE at a time from a server-side cursor, so memory
+    use does not grow with the size of the calendar.
+    """
+    user_id = current_user.id
+    host = request.host.split(':')[0]
+
+    note_preview = db.func.substr(Note.preview, 1, NOTE_PREVIEW_LENGTH + 1).label('note_preview')
+    events = db.select(
+        CalendarEvent.id, CalendarEvent.title, CalendarEvent.description, CalendarEvent.event_date,
+        CalendarEvent.start_time, CalendarEvent.end_time, CalendarEvent.color,
+        CalendarEvent.recurrence_rule, CalendarEvent.created_at, note_preview
+    ).outerjoin(Note, CalendarEvent.note_id == Note.id) \
+        .where(CalendarEvent.user_id == user_id) \
+        .order_by(CalendarEvent.id) \
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    exceptions = db.select(CalendarEventException.__table__) \
+        .where(CalendarEventException.event_id.in_(
+            db.select(CalendarEvent.id).where(CalendarEvent.user_id == user_id))) \
+        .order_by(CalendarEventException.event_id, CalendarEventException.occurrence_date) \
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    def generate():
+        yield ''.join(fold_line(line) for line in ICS_HEADER)
+
+        # Both cursors are ordered by event id, so exceptions are merged in one pass
+        exception_rows = iter(db.session.execute(exceptions))
+        exception = next(exception_rows, None)
+        chunk = []
+        for row in db.session.execute(events):
+            own = []
+            while exception is not None and exception.event_id <= row.id:
+                if exception.event_id == row.id:
+                    own.append(exception)
+                exception = next(exception_rows, None)
+            chunk.append(ics_event_lines(row, own, host))
+            if len(chunk) >= EXPORT_BATCH_SIZE:
+                yield ''.join(chunk)
+                chunk = []
+
+        chunk.append(fold_line('END:VCALENDAR'))
+        yield ''.join(chunk)
+
+    return Response(stream_with_context(generate()), mimetype='text/calendar',
+                    headers={'Content-Disposition': 'attachment; filename=calendar.ics'})
+
+
+def ics_to_event(properties):
+    """CalendarEvent column values (plus UID, EXDATEs and RECURRENCE-ID) from a parsed VEVENT"""
+    def value(name, default=None):
+        return properties[name][0][1] if name in properties else default
+
+    if 'DTSTART' not in properties:
+        raise ValueError('DTSTART is missing')
+    params, start = properties['DTSTART'][0]
+    event_date, start_time = parse_date_value(start, params)
+
+    end_time = None
+    if 'DTEND' in properties and start_time:
+        end_date, end_time = parse_date_value(properties['DTEND'][0][1], properties['DTEND'][0][0])
+        if end_date != event_date:
+            end_time = None  # Multi-day events keep just their start
+
+    color = value('X-COLOR', '')
+    fields = {
+        'title': unescape_text(value('SUMMARY', '')).strip()[:200] or 'Untitled',
+        'description': unescape_text(value('DESCRIPTION', ''))[:1000],
+        'event_date': event_date,
+        'start_time': start_time,
+        'end_time': end_time,
+        'color': color if HEX_COLOR.match(color) else NEW_EVENT_DEFAULTS['color'],
+        'recurrence_rule': normalize_rule(value('RRULE')),
+    }
+
+    cancelled = {
+        parse_date_value(day, params)[0]
+        for params, days in properties.get('EXDATE', ()) for day in days.split(',')
+    }
+    recurrence_id = parse_date_value(value('RECURRENCE-ID'))[0] if 'RECURRENCE-ID' in properties else None
+    return value('UID'), fields, cancelled, recurrence_id
+
+
+@calendar_bp.route('/calendar/import', methods=['POST'])
+@login_required
+def import_calendar():
+    """Import an .ics file sent as the request body
+
+    The file is parsed while it is read and events are inserted IMPORT_BATCH_SIZE
+    per transaction. The response streams one JSON object per line: progress after
+    each batch, {"line", "error"} for records that were skipped, and a final summary.
+    """
+    # The file is the raw request body (Content-Type: text/calendar); a multipart
+    # upload would be spooled to disk and closed before the stream is read
+    if not request.content_length:
+        return jsonify({'error': 'Send the .ics file as the request body'}), 400
+
+    user_id = current_user.id
+    text = io.TextIOWrapper(request.stream, encoding='utf-8-sig', errors='replace', newline='')
+
+    def generate():
+        counts = {'imported': 0, 'failed': 0}
+        reported = 0
+        series_ids = {}  # UID -> id of the imported series, for RECURRENCE-ID records
+        batch, overrides = [], []
+
+        def failure(line, error):
+            nonlocal reported
+            counts['failed'] += 1
+            reported += 1
+            if reported <= MAX_IMPORT_ERRORS:
+                return json.dumps({'line': line, 'error': str(error)}) + '\n'
+            return ''
+
+        def flush(batch):
+            """Insert one batch of events and their cancelled dates in one transaction
+
+            When the batch fails it is retried one event at a time, so a single bad
+            record costs only its own row.
+            """
+            try:
+                ids = db.session.execute(
+                    db.insert(CalendarEvent).returning(CalendarEvent.id, sort_by_parameter_order=True),
+                    [dict(fields, user_id=user_id) for _, _, fields, _ in batch]
+                ).scalars().all()
+
+                cancelled, new_series = [], {}
+                for (_, uid, fields, dates), event_id in zip(batch, ids):
+                    if fields['recurrence_rule']:
+                        new_series.setdefault(uid, event_id)
+                        cancelled += [{'event_id': event_id, 'occurrence_date': day, 'is_cancelled': True}
+                                      for day in dates]
+                if cancelled:
+                    db.session.execute(db.insert(CalendarEventException), cancelled)
+
+                reminder_scheduler.sync_events(ids)
+                bump_data_version(user_id)
+                db.session.commit()
+                counts['imported'] += len(batch)
+                for uid, event_id in new_series.items():
+                    series_ids.setdefault(uid, event_id)  # Only ids that were committed
+                return ''
+            except Exception as e:
+                db.session.rollback()
+                if len(batch) > 1:
+                    return ''.join(flush([item]) for item in batch)
+                return failure(batch[0][0], e)
+
+        for line, record in iter_vevents(text):
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                uid, fields, cancelled, recurrence_id = ics_to_event(record)
+            except (ValueError, IndexError) as e:
+                yield failure(line, e)
+                continue
+
+            if recurrence_id:
+                overrides.append((line, uid, recurrence_id, fields))
+                continue
+            batch.append((line, uid, fields, cancelled))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                yield flush(batch)
+                batch = []
+                yield json.dumps(counts) + '\n'
+
+        if batch:
+            yield flush(batch)
+
+        # Edited occurrences, once every series in the file exists
+        exceptions = {}
+        for line, uid, occurrence_date, fields in overrides:
+            if uid not in series_ids:
+                yield failure(line, f'No repeating event with UID {uid} in this file')
+                continue
+            exceptions[(series_ids[uid], occurrence_date)] = {
+                'event_id': series_ids[uid], 'occurrence_date': occurrence_date,
+                **{field: fields[field] for field in OCCURRENCE_FIELDS}
+            }
+        if exceptions:
+            db.session.execute(
+                db.delete(CalendarEventException).where(
+                    db.tuple_(CalendarEventException.event_id, CalendarEventException.occurrence_date)
+                    .in_(list(exceptions))),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.execute(db.insert(CalendarEventException), list(exceptions.values()))
+            reminder_scheduler.sync_events({event_id for event_id, _ in exceptions})
+            bump_data_version(user_id)
+            db.session.commit()
+            counts['imported'] += len(exceptions)
+
+        if counts['imported']:
+            # One delta for the whole file rather than one per batch
+            record_change(user_id, 'event', 'reset')
+            db.session.commit()
+
+        yield json.dumps(dict(counts, done=True)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @calendar_bp.route('/calendar/notes', methods=['GET'])
 @login_required
+@conditional_get
 def get_user_notes():
-    """Get user notes - UNIQUE NAME"""
-    notes = Note.query.filter_by(user_id=current_user.id).all()
-
-    notes_list = []
-    for note in notes:
-        notes_list.append({
-            'id': note.id,
-            'content': note.data[:100] + ('...' if len(note.data) > 100 else ''),
-            'fullContent': note.data,
-            'created_at': note.date.strftime('%Y-%m-%d %H:%M')
-        })
+    """Get a page of user notes for the picker - UNIQUE NAME"""
+    cursor, limit = page_args()
+    try:
+        return jsonify(note_previews_page(current_user.id, cursor, limit, preview_length=100))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
 
-    return jsonify(notes_list)
+@calendar_bp.route('/calendar/freebusy', methods=['GET'])
+@login_required
+@conditional_get
+def get_free_busy():
+    """Busy periods and free slots between ?start= and ?end= (YYYY-MM-DD, end exclusive)
+
+    ?dayStart=HH:MM&dayEnd=HH:MM limit the free slots to those hours of each day.
+    """
+    try:
+        window_start = parse_window_date(request.args.get('start')) or date.today()
+        window_end = parse_window_date(request.args.get('end')) or window_start + timedelta(days=7)
+        day_start = parse_clock(request.args.get('dayStart'), timedelta(0))
+        day_end = parse_clock(request.args.get('dayEnd'), timedelta(days=1))
+    except ValueError:
+        return jsonify({'error': 'Invalid date or time format. Use YYYY-MM-DD and HH:MM'}), 400
+    if not window_start < window_end <= window_start + timedelta(days=MAX_FREEBUSY_DAYS) or day_start >= day_end:
+        return jsonify({'error': f'end must be after start, at most {MAX_FREEBUSY_DAYS} days later'}), 400
+
+    busy = merge_intervals((start, end) for start, end, _ in
+                           busy_intervals(current_user.id, window_start, window_end))
+    free = free_slots(busy, window_start, window_end, day_start, day_end)
+    return jsonify({
+        'start': window_start,
+        'end': window_end,
+        'busy': [{'start': start, 'end': end} for start, end in busy],
+        'free': [{'start': start, 'end': end} for start, end in free]
+    })
 
 
 @calendar_bp.route('/calendar/stats', methods=['GET'])
 @login_required
+@conditional_get
 def get_calendar_statistics():
     """Get stats - UNIQUE NAME"""
-    events = CalendarEvent.query.filter_by(user_id=current_user.id).all()
-
     today = date.today()
-
-    today_count = len([e for e in events if e.event_date == today])
-    month_count = len([e for e in events if e.event_date.month == today.month and e.event_date.year == today.year])
+    month_start = today.replace(day=1)
+    next_month_start = (month_start + timedelta(days=32)).replace(day=1)
+
+    # Count everything in one aggregate query instead of loading every event
+    single = CalendarEvent.recurrence_rule == None
+    total, today_count, month_count = db.session.query(
+        db.func.count(CalendarEvent.id),
+        db.func.sum(db.case((db.and_(single, CalendarEvent.event_date == today), 1), else_=0)),
+        db.func.sum(db.case((db.and_(single, CalendarEvent.event_date >= month_start,
+                                     CalendarEvent.event_date < next_month_start), 1), else_=0))
+    ).filter(CalendarEvent.user_id == current_user.id).one()
+    today_count = today_count or 0
+    month_count = month_count or 0
+
+    # Series count once in the total, and once per occurrence for today/this month
+    series = CalendarEvent.query.filter(CalendarEvent.user_id == current_user.id,
+                                        CalendarEvent.recurrence_rule != None,
+                                        CalendarEvent.event_date < next_month_start).all()
+    for event, _, occurrence_date, exception in expand_series(((event, None) for event in series),
+                                                              month_start, next_month_start):
+        month_count += 1
+        if (exception and exception.event_date or occurrence_date) == today:
+            today_count += 1
 
     return jsonify({
-        'total': len(events),
+        'total': total,
         'today': today_count,
         'month': month_count
     })
@@ -0,0 +1,217 @@
+from flask import Blueprint, Response, current_app
+from flask_login import login_required, current_user
+from threading import Lock, Thread
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .models import ChangeEvent
+from .responses import json_default
+from . import db
+import logging
+import queue
+import json
+import time
+
+changes_bp = Blueprint('changes', __name__)
+logger = logging.getLogger(__name__)
+
+MAX_QUEUED_CHANGES = 256  # Per open stream; a slower client gets a 'reset' instead
+RESET = {'type': 'all', 'action': 'reset'}
+
+
+class Subscription:
+    """One open /changes/stream connection"""
+
+    def __init__(self, broker, user_id, max_queued=MAX_QUEUED_CHANGES):
+        self.broker = broker
+        self.user_id = user_id
+        self._queue = queue.Queue(max_queued)
+
+    def put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            # The client fell behind: drop what is queued and tell it to reload
+            while not self._queue.empty():
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._queue.put_nowait(RESET)
+
+    def get(self, timeout):
+        """Next message, or None after `timeout` seconds without one"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process publish/subscribe: only streams served by this worker see a change"""
+
+    def __init__(self):
+        self._subscribers = {}  # user id -> set of Subscription
+        self._lock = Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.user_id, None)
+
+    def publish(self, user_id, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+
+    def stats(self):
+        with self._lock:
+            return {'users': len(self._subscribers),
+                    'streams': sum(len(s) for s in self._subscribers.values())}
+
+
+class DatabaseBroker(LocalBroker):
+    """Stand-in for a real message bus when several workers share one database
+
+    publish() appends to the change_event table; each worker polls it every
+    `poll_interval` seconds and hands new rows to its own open streams.
+    Rows older than `retention` seconds are pruned by the polling thread.
+    """
+
+    def __init__(self, app=None, poll_interval=0.5, retention=300):
+        super().__init__()
+        self.app = app
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._thread = None
+
+    def publish(self, user_id, message):
+        with db.engine.begin() as connection:
+            connection.execute(db.insert(ChangeEvent).values(user_id=user_id, payload=json.dumps(message, default=json_default)))
+
+    def subscribe(self, user_id):
+        if self._thread is None:
+            self.app = self.app or current_app._get_current_object()
+            self._thread = Thread(target=self._poll, name='change-broker', daemon=True)
+            self._thread.start()
+        return super().subscribe(user_id)
+
+    def _poll(self):
+        with self.app.app_context():
+            last_id = db.session.query(db.func.max(ChangeEvent.id)).scalar() or 0
+            db.session.remove()
+        prune_at, prune_before = time.monotonic() + self.retention, last_id
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                with self.app.app_context():
+                    rows = db.session.execute(
+                        db.select(ChangeEvent.id, ChangeEvent.user_id, ChangeEvent.payload)
+                        .where(ChangeEvent.id > last_id).order_by(ChangeEvent.id)
+                    ).all()
+                    for row in rows:
+                        LocalBroker.publish(self, row.user_id, json.loads(row.payload))
+                        last_id = row.id
+
+                    if time.monotonic() >= prune_at:
+                        db.session.execute(db.delete(ChangeEvent).where(ChangeEvent.id <= prune_before))
+                        db.session.commit()
+                        prune_at, prune_before = time.monotonic() + self.retention, last_id
+            except Exception:
+                logger.exception('Change broker poll failed')
+
+
+def make_broker(spec, app):
+    """CHANGE_BROKER: an object with publish/subscribe, 'local' or 'database'"""
+    if hasattr(spec, 'publish'):
+        return spec
+    if not spec or spec == 'local':
+        return LocalBroker()
+    if spec == 'database':
+        return DatabaseBroker(app, poll_interval=app.config['CHANGE_BROKER_POLL_SECONDS'])
+    raise ValueError(f'Unknown CHANGE_BROKER: {spec!r}')
+
+
+class ChangeStream:
+    """Per-user stream of compact deltas for the open pages
+
+    Write paths call record_change() before they commit; the queued deltas are
+    published only once the transaction commits and are dropped on rollback.
+    """
+
+    def __init__(self, app=None):
+        self.broker = LocalBroker()
+        self.keepalive = 15
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CHANGE_BROKER', 'local')
+        app.config.setdefault('CHANGE_BROKER_POLL_SECONDS', 0.5)
+        app.config.setdefault('CHANGE_STREAM_KEEPALIVE', 15)
+
+        self.broker = make_broker(app.config['CHANGE_BROKER'], app)
+        self.keepalive = app.config['CHANGE_STREAM_KEEPALIVE']
+        app.extensions['change_stream'] = self
+
+        if not event.contains(Session, 'after_commit', self._after_commit):
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+    def record(self, user_id, kind, action, ids=(), data=None):
+        """Queue a delta: kind is note/event/goal, action created/updated/deleted/reordered/reset"""
+        message = {'type': kind, 'action': action, 'ids': list(ids)}
+        if data is not None:
+            message['data'] = data
+        db.session.info.setdefault('pending_changes', []).append((user_id, message))
+
+    def _after_commit(self, session):
+        for user_id, message in session.info.pop('pending_changes', ()):
+            try:
+                self.broker.publish(user_id, message)
+            except Exception:
+                logger.exception('Could not publish change for user %s', user_id)
+
+    def _after_rollback(self, session):
+        session.info.pop('pending_changes', None)
+
+
+change_stream = ChangeStream()
+
+
+def record_change(user_id, kind, action, ids=(), data=None):
+    change_stream.record(user_id, kind, action, ids, data)
+
+
+@changes_bp.route('/changes/stream')
+@login_required
+def stream_changes():
+    """Server-sent events: one 'change' event per delta of the current user's data"""
+    subscription = change_stream.broker.subscribe(current_user.id)
+    keepalive = change_stream.keepalive
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                message = subscription.get(timeout=keepalive)
+                if message is None:
+                    yield ': keep-alive\n\n'  # Also how a closed connection is noticed
+                else:
+                    yield f'event: change\ndata: {json.dumps(message, default=json_default)}\n\n'
+        finally:
+            subscription.close()
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -0,0 +1,23 @@
+import zlib
+
+# Note bodies are stored as one marker byte + payload: zlib for text that
+# shrinks, plain UTF-8 for short notes where the zlib header would only add bytes.
+ZLIB = b'z'
+PLAIN = b'p'
+COMPRESSION_LEVEL = 6
+
+
+def compress_text(text):
+    raw = (text or '').encode('utf-8')
+    packed = zlib.compress(raw, COMPRESSION_LEVEL)
+    return ZLIB + packed if len(packed) < len(raw) else PLAIN + raw
+
+
+def decompress_text(value):
+    """Reverse of compress_text(); also registered in SQLite as note_text() for the note search index"""
+    if not value:
+        return ''
+    value = bytes(value)
+    if value[:1] == ZLIB:
+        return zlib.decompress(value[1:]).decode('utf-8')
+    return value[1:].decode('utf-8')
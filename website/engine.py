@@ -0,0 +1,75 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+import os
+
+# Applied to every new SQLite connection. WAL lets readers continue while one
+# request commits, NORMAL only fsyncs at checkpoints (safe with WAL), and
+# busy_timeout makes writers wait for the lock instead of failing at once.
+SQLITE_PRAGMA_DEFAULTS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms
+    'mmap_size': 256 * 1024 * 1024,  # bytes
+    'cache_size': -64000,  # negative = KiB, so ~64 MB of page cache
+    'temp_store': 'MEMORY',
+}
+
+# Pool settings for server databases (PostgreSQL, MySQL, ...)
+SERVER_POOL_DEFAULTS = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+    'pool_recycle': 1800,
+    'pool_pre_ping': True,
+}
+
+
+def env_value(name, default):
+    """Read an environment variable, converted to the type of its default"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    if isinstance(default, int):
+        return int(value)
+    return value
+
+
+def configure_database(app, default_uri):
+    """Fill in the database URI, engine options and SQLite pragmas from config/env"""
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', os.environ.get('DATABASE_URL', default_uri))
+    backend = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    if backend == 'sqlite':
+        pragmas = app.config.setdefault('SQLITE_PRAGMAS', {})
+        for name, default in SQLITE_PRAGMA_DEFAULTS.items():
+            pragmas.setdefault(name, env_value(f'SQLITE_{name.upper()}', default))
+    else:
+        for name, default in SERVER_POOL_DEFAULTS.items():
+            options.setdefault(name, env_value(f'DB_{name.upper()}', default))
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Run the PRAGMAs on every connection the pool opens"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+
+def install_sqlite_functions(engine, functions):
+    """Register Python functions ({name: callable taking one argument}) on every SQLite connection"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def register_sqlite_functions(dbapi_connection, connection_record):
+        for name, function in functions.items():
+            dbapi_connection.create_function(name, 1, function, deterministic=True)
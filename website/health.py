@@ -0,0 +1,41 @@
+from flask import Blueprint, current_app, jsonify
+from sqlalchemy import text
+from .migrations import MIGRATIONS
+from . import db
+import time
+
+# blueprint for the load balancer / orchestrator probes (no login, no cookies needed)
+health_bp = Blueprint('health', __name__)
+
+
+@health_bp.route('/health')
+def health():
+    """Liveness: the process answers requests"""
+    return jsonify({'status': 'ok'})
+
+
+@health_bp.route('/ready')
+def ready():
+    """Readiness: the database answers and every migration has been applied"""
+    started = time.perf_counter()
+    try:
+        version = db.session.execute(text('SELECT version FROM schema_version')).scalar()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning('Readiness check failed: %s', e)
+        return jsonify({'status': 'unavailable', 'error': 'database unreachable'}), 503
+    finally:
+        db.session.remove()  # Give the connection back right away, probes come often
+
+    expected = MIGRATIONS[-1][0]
+    scheduler = 'disabled'
+    if current_app.config['SCHEDULER_ENABLED']:
+        scheduler = 'running' if current_app.extensions['reminder_scheduler'].running() else 'stopped'
+    result = {
+        'status': 'ok' if version == expected else 'unavailable',
+        'database_ms': round((time.perf_counter() - started) * 1000, 2),
+        'schema_version': version,
+        'expected_schema_version': expected,
+        'scheduler': scheduler,  # Informational: reminders wait in the table while it is stopped
+    }
+    return jsonify(result), 200 if version == expected else 503
@@ -0,0 +1,131 @@
+from datetime import date, time
+
+# Minimal RFC 5545 reader/writer for the calendar export and import.
+# Both sides work line by line so a large calendar never has to fit in memory.
+MAX_LINE_OCTETS = 75
+TEXT_ESCAPES = (('\\', '\\\\'), (';', '\\;'), (',', '\\,'), ('\n', '\\n'))
+
+
+def escape_text(value):
+    """Escape a TEXT value (backslash, ; , and newlines)"""
+    value = (value or '').replace('\r\n', '\n').replace('\r', '\n')
+    for char, escaped in TEXT_ESCAPES:
+        value = value.replace(char, escaped)
+    return value
+
+
+def unescape_text(value):
+    """Reverse of escape_text()"""
+    result, chars = [], iter(value)
+    for char in chars:
+        if char == '\\':
+            char = next(chars, '')
+            char = '\n' if char in 'nN' else char
+        result.append(char)
+    return ''.join(result)
+
+
+def fold_line(line):
+    """Content line folded to 75 octets and terminated with CRLF"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= MAX_LINE_OCTETS:
+        return line + '\r\n'
+
+    parts, start, limit = [], 0, MAX_LINE_OCTETS
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1  # Never split a UTF-8 character
+        parts.append(encoded[start:end].decode('utf-8'))
+        start, limit = end, MAX_LINE_OCTETS - 1  # Continuation lines start with a space
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def format_date(value):
+    return value.strftime('%Y%m%d')
+
+
+def format_datetime(day, time_of_day):
+    return f"{day.strftime('%Y%m%d')}T{time_of_day.strftime('%H%M%S')}"
+
+
+def date_property(name, day, time_of_day=None):
+    """DTSTART/DTEND/RECURRENCE-ID line; floating local time, or VALUE=DATE without a time"""
+    if time_of_day is None:
+        return f'{name};VALUE=DATE:{format_date(day)}'
+    return f'{name}:{format_datetime(day, time_of_day)}'
+
+
+def unfold_lines(stream):
+    """Yield (line_number, content_line) from a text stream, joining folded lines"""
+    pending, pending_number = None, 0
+    for number, raw in enumerate(stream, 1):
+        raw = raw.rstrip('\r\n')
+        if raw[:1] in (' ', '\t') and pending is not None:
+            pending += raw[1:]
+            continue
+        if pending:
+            yield pending_number, pending
+        pending, pending_number = raw, number
+    if pending:
+        yield pending_number, pending
+
+
+def parse_content_line(line):
+    """Split 'NAME;PARAM=x:value' into (NAME, {PARAM: x}, value)"""
+    head, separator, value = line.partition(':')
+    if not separator:
+        raise ValueError(f'Malformed line: {line[:40]}')
+    name, *params = head.split(';')
+    return name.upper(), dict(param.partition('=')[::2] for param in params), value
+
+
+def parse_date_value(value, params=None):
+    """(date, time or None) from a DATE or DATE-TIME value; time zones are kept as local wall time"""
+    # Sliced by hand: strptime dominated the time of large imports
+    value = value.strip()
+    if len(value) < 8 or not value[:8].isdigit():
+        raise ValueError(f'Invalid date: {value[:20]}')
+    day = date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+    if (params or {}).get('VALUE', '').upper() == 'DATE' or len(value) == 8:
+        return day, None
+    if len(value) < 15 or value[8] not in 'Tt' or not value[9:15].isdigit():
+        raise ValueError(f'Invalid date-time: {value[:20]}')
+    return day, time(int(value[9:11]), int(value[11:13]), int(value[13:15]))
+
+
+def iter_vevents(stream):
+    """Yield (line_number, properties) for every VEVENT in an .ics text stream
+
+    properties maps each property name to a list of (params, value) pairs.
+    Nested components (VALARM) are skipped; a broken VEVENT yields a ValueError
+    instead of properties so the caller can report it and carry on.
+    """
+    properties, start, depth = None, 0, 0
+    for number, line in unfold_lines(stream):
+        if not line.strip():
+            continue
+        try:
+            name, params, value = parse_content_line(line)
+        except ValueError as e:
+            if properties is not None:
+                yield start, ValueError(f'line {number}: {e}')
+                properties = None
+            continue
+
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            properties, start, depth = {}, number, 0
+        elif properties is None:
+            continue
+        elif name == 'BEGIN':
+            depth += 1
+        elif name == 'END' and depth:
+            depth -= 1
+        elif name == 'END' and value.upper() == 'VEVENT':
+            yield start, properties
+            properties = None
+        elif not depth:
+            properties.setdefault(name, []).append((params, value))
+
+    if properties is not None:
+        yield start, ValueError('VEVENT is not closed')
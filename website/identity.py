@@ -0,0 +1,71 @@
+from flask_login import UserMixin
+from collections import OrderedDict
+from threading import Lock
+from sqlalchemy import event
+from .models import User
+from . import db
+import time
+
+
+class SessionUser(UserMixin):
+    """What a request knows about the logged-in user - no password hash, no lazy relationships"""
+
+    def __init__(self, id, email, first_name):
+        self.id = id
+        self.email = email
+        self.first_name = first_name
+
+
+class UserIdentityCache:
+    """Short-lived per-worker cache so @login_required does not query User on every request"""
+
+    def __init__(self, ttl=60, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user id -> (expires_at, SessionUser)
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.setdefault('USER_CACHE_TTL', self.ttl)
+        self.max_entries = app.config.setdefault('USER_CACHE_MAX_ENTRIES', self.max_entries)
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user):
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+identity_cache = UserIdentityCache()
+
+
+def load_user_identity(user_id):
+    """user_loader for Flask-Login: cached snapshot, or one narrow SELECT on a miss"""
+    user = identity_cache.get(user_id)
+    if user is None:
+        row = db.session.query(User.id, User.email, User.first_name).filter_by(id=user_id).first()
+        if row is None:
+            return None
+        user = SessionUser(row.id, row.email, row.first_name)
+        identity_cache.put(user)
+    return user
+
+
+# Any change to a User row (whatever route makes it) drops the cached snapshot
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_identity(mapper, connection, target):
+    identity_cache.invalidate(target.id)
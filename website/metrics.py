@@ -0,0 +1,232 @@
+from flask import Blueprint, Response, current_app, g, has_request_context, request
+from threading import Lock
+from sqlalchemy import event
+from ipaddress import ip_address
+from . import db, response_cache
+import logging
+import time
+
+metrics_bp = Blueprint('metrics', __name__)
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # seconds
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)  # bytes
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)  # statements per request
+BACKGROUND = '<background>'  # Endpoint label for SQL run outside a request (scheduler, brokers)
+MAX_LOGGED_PARAMETERS = 500  # characters of repr(parameters) in the slow-query log
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects it"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    return ','.join(f'{name}="{escape_label(value)}"' for name, value in labels)
+
+
+class Metrics:
+    """Per-endpoint latency, response size and SQL statistics for /metrics
+
+    Request hooks time every request; engine events count and time each SQL
+    statement and charge it to the endpoint that ran it, so N+1 routes show up
+    as a high statements-per-request histogram. Statements slower than
+    METRICS_SLOW_QUERY_MS are logged with their parameters.
+    """
+
+    def __init__(self, app=None):
+        self.slow_query_seconds = 0.1
+        self.latency_buckets = LATENCY_BUCKETS
+        self._lock = Lock()
+        self.reset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_SLOW_QUERY_MS', 100)
+        app.config.setdefault('METRICS_LATENCY_BUCKETS', LATENCY_BUCKETS)
+        # When set, /metrics needs "Authorization: Bearer <token>"; without it only local requests get in
+        app.config.setdefault('METRICS_TOKEN', None)
+        app.extensions['metrics'] = self
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        self.slow_query_seconds = app.config['METRICS_SLOW_QUERY_MS'] / 1000
+        self.latency_buckets = tuple(app.config['METRICS_LATENCY_BUCKETS'])
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+        with app.app_context():
+            engine = db.engine
+        if not event.contains(engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}  # (endpoint, method, status) -> count
+            self.latency = {}  # (endpoint, method) -> Histogram
+            self.sizes = {}  # endpoint -> Histogram
+            self.queries_per_request = {}  # endpoint -> Histogram
+            self.sql = {}  # endpoint -> [statements, seconds, slow statements]
+
+    # Request hooks
+
+    def _before_request(self):
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = 0
+
+    def _after_request(self, response):
+        # Streamed bodies (SSE, NDJSON import, .ics export) have no length and are
+        # timed up to the first byte only
+        size = None if response.is_streamed else response.calculate_content_length()
+        self._record_request(response.status_code, size)
+        return response
+
+    def _teardown_request(self, exc):
+        if exc is not None:
+            self._record_request(500, None)  # after_request does not run for unhandled errors
+
+    def _record_request(self, status, size):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        endpoint, method = request.endpoint or 'unmatched', request.method
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self._histogram(self.latency, (endpoint, method), self.latency_buckets).observe(elapsed)
+            self._histogram(self.queries_per_request, endpoint, QUERY_COUNT_BUCKETS).observe(g.metrics_queries)
+            if size is not None:
+                self._histogram(self.sizes, endpoint, SIZE_BUCKETS).observe(size)
+
+    @staticmethod
+    def _histogram(histograms, key, buckets):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(buckets)
+        return histogram
+
+    # Engine events
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()  # Per statement, so one that raises leaves nothing behind
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_start
+        endpoint = BACKGROUND
+        if has_request_context():
+            endpoint = request.endpoint or 'unmatched'
+            if 'metrics_queries' in g:
+                g.metrics_queries += 1
+
+        slow = elapsed >= self.slow_query_seconds
+        with self._lock:
+            totals = self.sql.setdefault(endpoint, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += elapsed
+            totals[2] += slow
+        if slow:
+            logger.warning('Slow query (%.1f ms) in %s: %s; parameters: %.*r',
+                           elapsed * 1000, endpoint, ' '.join(statement.split()),
+                           MAX_LOGGED_PARAMETERS, parameters)
+
+    # Prometheus text format
+
+    def render(self):
+        with self._lock:
+            requests = [((('endpoint', e), ('method', m), ('status', s)), n)
+                        for (e, m, s), n in sorted(self.requests.items())]
+            latency = [((('endpoint', e), ('method', m)), h) for (e, m), h in sorted(self.latency.items())]
+            sizes = [((('endpoint', e),), h) for e, h in sorted(self.sizes.items())]
+            queries = [((('endpoint', e),), h) for e, h in sorted(self.queries_per_request.items())]
+            sql = [((('endpoint', e),), t) for e, t in sorted(self.sql.items())]
+
+            lines = []
+            self._render_counter(lines, 'http_requests_total', 'Requests by endpoint, method and status', requests)
+            self._render_histograms(lines, 'http_request_duration_seconds',
+                                    'Request latency up to the first byte', latency)
+            self._render_histograms(lines, 'http_response_size_bytes',
+                                    'Response body size (streamed bodies excluded)', sizes)
+            self._render_histograms(lines, 'http_request_sql_statements', 'SQL statements run by one request', queries)
+            self._render_counter(lines, 'sql_statements_total', 'SQL statements by endpoint',
+                                 [(labels, t[0]) for labels, t in sql])
+            self._render_counter(lines, 'sql_statement_seconds_total', 'Time spent in SQL by endpoint',
+                                 [(labels, round(t[1], 6)) for labels, t in sql])
+            self._render_counter(lines, 'sql_slow_statements_total', 'Statements slower than METRICS_SLOW_QUERY_MS',
+                                 [(labels, t[2]) for labels, t in sql])
+
+        for name, value in response_cache.stats().items():
+            kind = 'gauge' if name in ('entries', 'bytes') else 'counter'
+            suffix = '' if kind == 'gauge' else '_total'
+            lines.append(f'# TYPE response_cache_{name}{suffix} {kind}')
+            lines.append(f'response_cache_{name}{suffix} {value}')
+
+        change_stream = current_app.extensions.get('change_stream')
+        if change_stream is not None and hasattr(change_stream.broker, 'stats'):
+            lines.append('# TYPE change_streams_open gauge')
+            lines.append(f"change_streams_open {change_stream.broker.stats()['streams']}")
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_counter(lines, name, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for labels, value in samples:
+            lines.append(f'{name}{{{format_labels(labels)}}} {value}')
+
+    @staticmethod
+    def _render_histograms(lines, name, help_text, histograms):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, histogram in histograms:
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f'{name}_bucket{{{format_labels(labels + (("le", bound),))}}} {count}')
+            lines.append(f'{name}_bucket{{{format_labels(labels + (("le", "+Inf"),))}}} {histogram.count}')
+            lines.append(f'{name}_sum{{{format_labels(labels)}}} {round(histogram.sum, 6)}')
+            lines.append(f'{name}_count{{{format_labels(labels)}}} {histogram.count}')
+
+
+metrics = Metrics()
+
+
+def is_local_request():
+    """Made from this machine and not relayed by a proxy (which would connect from localhost too)"""
+    if 'X-Forwarded-For' in request.headers or 'Forwarded' in request.headers:
+        return False
+    try:
+        return ip_address(request.remote_addr or '').is_loopback
+    except ValueError:  # Unix socket or unknown peer
+        return False
+
+
+@metrics_bp.route('/metrics')
+def show_metrics():
+    """Everything collected by this worker, in Prometheus text format"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    elif not is_local_request():
+        return Response('Forbidden: set METRICS_TOKEN to scrape /metrics from another host\n',
+                        status=403, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
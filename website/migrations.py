@@ -0,0 +1,169 @@
+from sqlalchemy import text, inspect
+from flask import current_app
+from datetime import timedelta
+from .models import Note, CalendarEvent, RoadmapGoal, note_columns
+from .rollups import check_goal_rollups, rebuild_goal_rollups
+from . import db
+import click
+
+# Schema changes that db.create_all() cannot make on an existing database.
+# Append new steps at the end; each runs once, in its own transaction, and the
+# number of the last applied step is kept in the schema_version table.
+
+NOTE_BATCH_SIZE = 1000  # Notes rewritten per statement when they are compressed
+
+
+def create_model_indexes(connection, *names):
+    """Create indexes declared in a model's __table_args__ on tables that already existed"""
+    for model in (Note, CalendarEvent, RoadmapGoal):
+        for index in model.__table__.indexes:
+            if index.name in names:
+                index.create(connection, checkfirst=True)
+
+
+def add_per_user_indexes(connection):
+    """Indexes for the per-user filters of every hot route"""
+    create_model_indexes(connection, 'ix_note_user_date', 'ix_calendar_event_user_date',
+                         'ix_roadmap_goal_user_position')
+
+
+def add_search_index(connection):
+    """FTS5 search table and its sync triggers (SQLite only)"""
+    from .search import search_index_exists, create_search_index
+
+    if connection.dialect.name == 'sqlite' and not search_index_exists(connection):
+        create_search_index(connection)
+
+
+def add_event_recurrence(connection):
+    """Repeating calendar events (the exceptions table itself comes from create_all)"""
+    columns = [column['name'] for column in inspect(connection).get_columns('calendar_event')]
+    if 'recurrence_rule' not in columns:
+        connection.execute(text('ALTER TABLE calendar_event ADD COLUMN recurrence_rule VARCHAR(200)'))
+    create_model_indexes(connection, 'ix_calendar_event_user_series')
+
+
+def add_reminders(connection):
+    """Precomputed overdue flags and the scheduler's reminder table (created by create_all)"""
+    from .scheduler import backfill_reminders
+
+    columns = [column['name'] for column in inspect(connection).get_columns('roadmap_goal')]
+    if 'is_overdue' not in columns:
+        connection.execute(text('ALTER TABLE roadmap_goal ADD COLUMN is_overdue BOOLEAN DEFAULT 0'))
+    backfill_reminders(connection, timedelta(minutes=current_app.config.get('REMINDER_LEAD_MINUTES', 15)))
+
+
+def move_note_text(connection):
+    """Compressed body, preview and char_count columns for notes, filled from the old text column"""
+    columns = [column['name'] for column in inspect(connection).get_columns('note')]
+    for name in ('body', 'preview', 'char_count'):
+        if name not in columns:
+            column_type = Note.__table__.c[name].type.compile(dialect=connection.dialect)
+            connection.execute(text(f'ALTER TABLE note ADD COLUMN {name} {column_type}'))
+    if 'data' not in columns:
+        return
+
+    last_id = 0
+    while True:
+        rows = connection.execute(text('SELECT id, data FROM note WHERE id > :id ORDER BY id LIMIT :limit'),
+                                  {'id': last_id, 'limit': NOTE_BATCH_SIZE}).all()
+        if not rows:
+            break
+        connection.execute(text('UPDATE note SET body = :body, preview = :preview, char_count = :char_count '
+                                'WHERE id = :id'), [dict(note_columns(row.data), id=row.id) for row in rows])
+        last_id = rows[-1].id
+
+    connection.execute(text('ALTER TABLE note DROP COLUMN data'))
+
+
+def compress_notes(connection):
+    """Compressed note bodies and the note_search index over them"""
+    from .search import create_note_search_index
+
+    move_note_text(connection)
+    if connection.dialect.name == 'sqlite':
+        create_note_search_index(connection)
+
+
+MIGRATIONS = [
+    (1, 'per-user indexes on note, calendar_event and roadmap_goal', add_per_user_indexes),
+    (2, 'full-text search index', add_search_index),
+    (3, 'recurring calendar events', add_event_recurrence),
+    (4, 'goal overdue flags and reminders', add_reminders),
+    (5, 'compressed note bodies with previews', compress_notes),
+    (6, 'roadmap goal rollups', rebuild_goal_rollups),
+]
+
+
+def current_version(connection):
+    if not inspect(connection).has_table('schema_version'):
+        connection.execute(text('CREATE TABLE schema_version (version INTEGER NOT NULL)'))
+        connection.execute(text('INSERT INTO schema_version (version) VALUES (0)'))
+        return 0
+    return connection.execute(text('SELECT version FROM schema_version')).scalar()
+
+
+def run_migrations(engine=None, echo=print):
+    """Create missing tables, then apply every migration newer than the stored version"""
+    engine = engine or db.engine
+    db.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        version = current_version(connection)
+
+    applied = []
+    for number, description, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(text('UPDATE schema_version SET version = :version'), {'version': number})
+        echo(f'Applied migration {number}: {description}')
+        applied.append(number)
+
+    return applied
+
+
+def register_commands(app):
+    @app.cli.command('migrate')
+    def migrate_command():
+        """Apply pending schema migrations"""
+        if not run_migrations(echo=click.echo):
+            click.echo('Database is up to date.')
+
+    @app.cli.command('check-query-plans')
+    def check_query_plans_command():
+        """Fail if a hot route's SQL does a full table scan"""
+        from .query_plans import check_query_plans
+
+        problems = check_query_plans()
+        for request_name, statement, detail in problems:
+            click.echo(f'{request_name}: {detail}\n    {" ".join(statement.split())}')
+        if problems:
+            raise SystemExit(1)
+        click.echo('All hot queries use an index.')
+
+    @app.cli.command('check-rollups')
+    @click.option('--rebuild', is_flag=True, help='Recompute the rollups of every user that is out of step')
+    def check_rollups_command(rebuild):
+        """Compare the roadmap rollups with the goals they summarize"""
+        with db.engine.begin() as connection:
+            mismatched = check_goal_rollups(connection)
+            for user_id, (stored, expected) in sorted(mismatched.items()):
+                click.echo(f'user {user_id}: stored (total, completed, overdue) {stored}, expected {expected}')
+            if mismatched and rebuild:
+                rebuild_goal_rollups(connection, list(mismatched))
+                click.echo(f'Rebuilt the rollups of {len(mismatched)} user(s).')
+        if not mismatched:
+            click.echo('Roadmap rollups are consistent.')
+        elif not rebuild:
+            raise SystemExit(1)
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Re-read every note into the note search index"""
+        from .search import rebuild_note_search_index
+
+        with db.engine.begin() as connection:
+            rebuild_note_search_index(connection)
+        click.echo('Note search index rebuilt.')
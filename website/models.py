@@ -1,14 +1,44 @@
 from . import db
+from .compression import compress_text, decompress_text
 from flask_login import UserMixin
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 
+NOTE_PREVIEW_LENGTH = 300  # Characters kept uncompressed for list views (the longest preview any page shows)
+
+
+def note_columns(text):
+    """Stored columns for a note's text: compressed body, preview and length"""
+    text = text or ''
+    return {'body': compress_text(text), 'preview': text[:NOTE_PREVIEW_LENGTH], 'char_count': len(text)}
+
+
 #User database
 class Note(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    data = db.Column(db.String(10000))
-    date = db.Column(db.DateTime(timezone=True), default=func.now())
+    body = db.deferred(db.Column(db.LargeBinary))  # Compressed text, only loaded when .data is read
+    preview = db.Column(db.String(NOTE_PREVIEW_LENGTH))
+    char_count = db.Column(db.Integer, default=0)
+    # SQLite keeps the text of CURRENT_TIMESTAMP (no microseconds), so bound datetimes must match it
+    date = db.Column(db.DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), 'sqlite'),
+                     default=func.now())
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
 
+    # Notes are listed newest first, one page at a time (keyset on date, id)
+    __table_args__ = (
+        db.Index('ix_note_user_date', 'user_id', 'date'),
+    )
+
+    @property
+    def data(self):
+        """Full text; list views read preview/char_count instead"""
+        return decompress_text(self.body)
+
+    @data.setter
+    def data(self, text):
+        for column, value in note_columns(text).items():
+            setattr(self, column, value)
+
 
 class CalendarEvent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -25,6 +55,37 @@ class CalendarEvent(db.Model):
     note_id = db.Column(db.Integer, db.ForeignKey('note.id'), nullable=True)
     note = db.relationship('Note', backref='calendar_events')
 
+    # Repeating events: one row per series, occurrences are expanded when read
+    recurrence_rule = db.Column(db.String(200), nullable=True)  # RRULE, e.g. FREQ=WEEKLY;BYDAY=MO
+    exceptions = db.relationship('CalendarEventException', backref='series', cascade="all, delete-orphan")
+
+    # Feed queries are always "this user's events between two dates"
+    __table_args__ = (
+        db.Index('ix_calendar_event_user_date', 'user_id', 'event_date'),
+        db.Index('ix_calendar_event_user_series', 'user_id', 'event_date',
+                 sqlite_where=db.text('recurrence_rule IS NOT NULL'),
+                 postgresql_where=db.text('recurrence_rule IS NOT NULL')),
+    )
+
+
+class CalendarEventException(db.Model):
+    # One occurrence of a series that was moved, edited or cancelled
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('calendar_event.id'), nullable=False)
+    occurrence_date = db.Column(db.Date, nullable=False)  # Date the rule generated
+    is_cancelled = db.Column(db.Boolean, default=False)
+
+    # Overrides, None = same as the series
+    title = db.Column(db.String(200))
+    description = db.Column(db.String(1000))
+    event_date = db.Column(db.Date)
+    start_time = db.Column(db.Time)
+    end_time = db.Column(db.Time)
+    color = db.Column(db.String(20))
+
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'occurrence_date'),
+    )
 
 
 class RoadmapGoal(db.Model):
@@ -34,16 +95,67 @@ class RoadmapGoal(db.Model):
     position = db.Column(db.Integer, default=0)  # For ordering
     deadline = db.Column(db.Date, nullable=True)  # Optional deadline
     is_completed = db.Column(db.Boolean, default=False)
+    is_overdue = db.Column(db.Boolean, default=False)  # Kept up to date by scheduler.py
     created_at = db.Column(db.DateTime(timezone=True), default=func.now())
     completed_at = db.Column(db.DateTime(timezone=True), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     user = db.relationship('User')
 
+    # Goals are always read and shifted per user in position order
+    __table_args__ = (
+        db.Index('ix_roadmap_goal_user_position', 'user_id', 'position'),
+    )
+
+
+class GoalRollup(db.Model):
+    # Per-user goal counters, kept in step with roadmap_goal by rollups.py
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    overdue = db.Column(db.Integer, nullable=False, default=0)
+
+
+class GoalProgressDay(db.Model):
+    # Daily net change in goals and completions (the burndown series), one row per user and active day
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    added = db.Column(db.Integer, nullable=False, default=0)  # Created minus deleted
+    completed = db.Column(db.Integer, nullable=False, default=0)  # Completed minus reopened / deleted completed
+
+
+class Reminder(db.Model):
+    # Due-time table of the reminder scheduler, one row per notification still to send
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # event, goal_due or goal_overdue
+    target_id = db.Column(db.Integer, nullable=False)  # CalendarEvent.id or RoadmapGoal.id
+    due_at = db.Column(db.DateTime, nullable=False)
+    occurs_at = db.Column(db.DateTime, nullable=False)  # Event start / goal deadline
+
+    __table_args__ = (
+        db.Index('ix_reminder_due_at', 'due_at'),
+        db.Index('ix_reminder_target', 'kind', 'target_id'),
+    )
+
+
+class ChangeEvent(db.Model):
+    # Outbox of the 'database' change broker, polled by every worker and pruned after a few minutes
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON delta
+    created_at = db.Column(db.DateTime(timezone=True), default=func.now())
+
+
+class ChangeVersion(db.Model):
+    # Bumped by every write so read endpoints can answer with an ETag / 304
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(150), unique=True)
-    password = db.Column(db.String(150))
+    password = db.Column(db.String(255))  # Room for scrypt/argon2 hashes
     first_name = db.Column(db.String(150))
     notes = db.relationship('Note')
     calendar_events = db.relationship('CalendarEvent', cascade="all, delete")
@@ -0,0 +1,108 @@
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from threading import BoundedSemaphore
+import os
+
+try:
+    import argon2
+except ImportError:  # argon2-cffi is optional, only needed for 'argon2:...' methods
+    argon2 = None
+
+
+class HashingBusy(Exception):
+    """Too many password hashes are already queued - the caller should ask the user to retry"""
+
+
+def werkzeug_method(method):
+    """Spell a werkzeug method the way its hashes do, with the defaults filled in ('scrypt' -> 'scrypt:32768:8:1')"""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2' and len(args) <= 2:
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f'Unknown PASSWORD_HASH_METHOD: {method!r}')
+
+
+class PasswordHasher:
+    """Runs password KDF work on a small bounded pool instead of the request thread
+
+    PASSWORD_HASH_METHOD is a werkzeug method ('scrypt:32768:8:1',
+    'pbkdf2:sha256:600000') or 'argon2:<time_cost>:<memory_kib>:<parallelism>'.
+    Hashes made with other parameters still verify and are replaced on login.
+    """
+
+    def __init__(self):
+        self.method = 'scrypt:32768:8:1'
+        self.timeout = 10
+        self._argon2 = None
+        self._executor = None
+        self._slots = None
+
+    def init_app(self, app):
+        self.method = app.config.setdefault('PASSWORD_HASH_METHOD', self.method)
+        workers = app.config.setdefault('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2))
+        queue = app.config.setdefault('PASSWORD_HASH_QUEUE', workers * 4)
+        self.timeout = app.config.setdefault('PASSWORD_HASH_TIMEOUT', self.timeout)
+
+        if self.method.startswith('argon2'):
+            if argon2 is None:
+                raise RuntimeError('PASSWORD_HASH_METHOD argon2 needs the argon2-cffi package')
+            time_cost, memory_cost, parallelism = map(int, self.method.split(':')[1:])
+            self._argon2 = argon2.PasswordHasher(time_cost=time_cost, memory_cost=memory_cost,
+                                                 parallelism=parallelism)
+        else:
+            self.method = werkzeug_method(self.method)  # Compared with the prefix of stored hashes
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        # Running + waiting jobs; when all slots are taken new requests are refused
+        self._slots = BoundedSemaphore(workers + queue)
+
+    def hash(self, password):
+        return self._run(self._hash, password)
+
+    def verify(self, stored_hash, password):
+        return self._run(self._verify, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        if stored_hash.startswith('$argon2'):
+            return self._argon2 is None or self._argon2.check_needs_rehash(stored_hash)
+        return self._argon2 is not None or stored_hash.split('$', 1)[0] != self.method
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the work finishes, even if this request stopped waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()  # Still queued: drop it; already running: it finishes and frees its slot
+            raise HashingBusy() from None
+
+    def _hash(self, password):
+        if self._argon2 is not None:
+            return self._argon2.hash(password)
+        return generate_password_hash(password, method=self.method, salt_length=16)
+
+    def _verify(self, stored_hash, password):
+        if stored_hash.startswith('$argon2'):
+            if argon2 is None:
+                return False
+            try:
+                return argon2.PasswordHasher().verify(stored_hash, password)
+            except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+                return False
+        return check_password_hash(stored_hash, password)
+
+
+password_hasher = PasswordHasher()
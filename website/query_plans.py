@@ -0,0 +1,87 @@
+from sqlalchemy import event
+from datetime import date
+import tempfile
+import os
+
+# Requests that cover the hot read/write paths; every statement they run must
+# use an index (SQLite "SEARCH ...") rather than a full table "SCAN ..."
+HOT_REQUESTS = [
+    ('GET', '/calendar/events?start=2024-01-01&end=2024-02-01', None),
+    ('GET', '/calendar/stats', None),
+    ('GET', '/calendar/notes', None),
+    ('GET', '/calendar/freebusy?start=2024-01-01&end=2024-01-31&dayStart=08:00&dayEnd=18:00', None),
+    ('GET', '/notes', None),
+    ('GET', '/notes?limit=1', None),
+    ('GET', '/roadmap/goals', None),
+    ('GET', '/roadmap/stats', None),
+    ('GET', '/roadmap/progress?days=90', None),
+    ('GET', '/search?q=exam', None),
+    ('GET', '/calendar/export.ics', None),
+    ('PUT', '/calendar/events/1', {'title': 'Exam (moved)', 'startTime': '09:00', 'endTime': '11:00'}),
+    ('PUT', '/calendar/events/3?occurrence=2024-01-08', {'title': 'Lecture (room 2)'}),
+    ('DELETE', '/calendar/events/3?occurrence=2024-01-15', None),
+    ('POST', '/calendar/events/batch', {'operations': [{'op': 'delete', 'id': 2},
+                                                       {'op': 'delete_where', 'filter': {'start': '2030-01-01'}}]}),
+    ('PUT', '/roadmap/goals/2', {'is_completed': True}),
+    ('POST', '/roadmap/goals/reorder', {'order': [2, 1]}),
+    ('DELETE', '/roadmap/goals/1', None),
+]
+
+
+def is_full_scan(detail):
+    # FTS5 lookups are reported as "SCAN <table> VIRTUAL TABLE INDEX ..."
+    return detail.startswith('SCAN ') and 'VIRTUAL TABLE' not in detail
+
+
+def check_query_plans():
+    """Run the hot routes against a scratch SQLite database and return every
+    (request, statement, plan step) that falls back to a full table scan"""
+    from . import create_app, db
+    from .cache import NullCache
+
+    directory = tempfile.mkdtemp()
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(directory, "plans.db")}',
+        'RESPONSE_CACHE_BACKEND': NullCache(),
+        'SCHEDULER_ENABLED': False,
+    })
+    client = app.test_client()
+
+    # A user with a little of everything so each route has rows to touch
+    client.post('/sign-up', data={'email': 'plans@example.com', 'firstName': 'Plan',
+                                  'password1': 'query-plans', 'password2': 'query-plans'})
+    client.post('/', data={'note': 'Exam revision notes'})
+    for day in (date(2024, 1, 10), date(2024, 1, 20)):
+        client.post('/calendar/events', json={'title': 'Exam', 'date': day.isoformat(), 'noteId': 1})
+    client.post('/calendar/events', json={'title': 'Lecture', 'date': '2024-01-01', 'recurrence': 'FREQ=WEEKLY',
+                                          'startTime': '10:00', 'endTime': '12:00'})
+    for title in ('Exam preparation', 'Project'):
+        client.post('/roadmap/goals', json={'title': title, 'deadline': '2024-01-15'})
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            statements.append((current_request, statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        for method, url, body in HOT_REQUESTS:
+            current_request = f'{method} {url}'
+            client.open(url, method=method, json=body).get_data()  # Runs streamed responses too
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+    problems = []
+    with engine.connect() as connection:
+        cursor = connection.connection.cursor()
+        for request_name, statement, parameters in statements:
+            for row in cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall():
+                if is_full_scan(row[3]):
+                    problems.append((request_name, statement, row[3]))
+        cursor.close()
+
+    engine.dispose()
+    return problems
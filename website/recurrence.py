@@ -0,0 +1,139 @@
+from datetime import date, datetime, timedelta
+import calendar as calendar_module
+
+# Subset of RFC 5545 RRULE used by the calendar page:
+#   FREQ=DAILY|WEEKLY|MONTHLY|YEARLY [;INTERVAL=n] [;COUNT=n | ;UNTIL=YYYYMMDD] [;BYDAY=MO,WE,...]
+# WKST is accepted and dropped: weeks always start on Monday here.
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+MAX_COUNT = 5000
+MAX_EMPTY_PERIODS = 10000  # e.g. YEARLY on Feb 29 skips three periods out of four
+
+
+def parse_rule(rule):
+    """Parse an RRULE string into a dict, raising ValueError on anything unsupported"""
+    parts = {}
+    for part in rule.upper().replace('RRULE:', '').split(';'):
+        if not part:
+            continue
+        name, _, value = part.partition('=')
+        parts[name.strip()] = value.strip()
+
+    freq = parts.pop('FREQ', None)
+    if freq not in FREQUENCIES:
+        raise ValueError('Recurrence needs FREQ=DAILY, WEEKLY, MONTHLY or YEARLY')
+
+    parsed = {'freq': freq, 'interval': int(parts.pop('INTERVAL', 1)), 'count': None, 'until': None, 'byday': None}
+    if parsed['interval'] < 1:
+        raise ValueError('INTERVAL must be at least 1')
+    if 'COUNT' in parts:
+        parsed['count'] = int(parts.pop('COUNT'))
+        if not 1 <= parsed['count'] <= MAX_COUNT:
+            raise ValueError(f'COUNT must be between 1 and {MAX_COUNT}')
+    if 'UNTIL' in parts:
+        until = parts.pop('UNTIL').replace('-', '')[:8]
+        parsed['until'] = datetime.strptime(until, '%Y%m%d').date()
+    if parsed['count'] and parsed['until']:
+        raise ValueError('Use either COUNT or UNTIL, not both')
+    if 'BYDAY' in parts:
+        days = parts.pop('BYDAY').split(',')
+        if freq != 'WEEKLY' or any(day not in WEEKDAYS for day in days):
+            raise ValueError('BYDAY is only supported as a list of weekdays for WEEKLY rules')
+        parsed['byday'] = sorted(WEEKDAYS.index(day) for day in set(days))
+    if parts.pop('WKST', 'MO') not in WEEKDAYS:  # Google Calendar and Outlook add it to weekly rules
+        raise ValueError('WKST must be a weekday')
+    if parts:
+        raise ValueError(f'Unsupported recurrence parts: {", ".join(sorted(parts))}')
+
+    return parsed
+
+
+def format_rule(parsed):
+    """Canonical RRULE string for a parsed rule (what gets stored)"""
+    rule = f"FREQ={parsed['freq']}"
+    if parsed['interval'] != 1:
+        rule += f";INTERVAL={parsed['interval']}"
+    if parsed['byday']:
+        rule += ';BYDAY=' + ','.join(WEEKDAYS[day] for day in parsed['byday'])
+    if parsed['count']:
+        rule += f";COUNT={parsed['count']}"
+    if parsed['until']:
+        rule += f";UNTIL={parsed['until'].strftime('%Y%m%d')}"
+    return rule
+
+
+def normalize_rule(rule):
+    """Validate a rule coming from the client; empty means 'does not repeat'"""
+    if not rule:
+        return None
+    return format_rule(parse_rule(rule))
+
+
+def _add_months(start, months):
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    if start.day > calendar_module.monthrange(year, month)[1]:
+        return None  # e.g. the 31st in a 30-day month: no occurrence that period
+    return date(year, month, start.day)
+
+
+def _period_dates(start, parsed, period):
+    """Candidate dates of the n-th period of the rule, in order"""
+    step = period * parsed['interval']
+    freq = parsed['freq']
+
+    if freq == 'DAILY':
+        return [start + timedelta(days=step)]
+    if freq == 'WEEKLY':
+        week_start = start - timedelta(days=start.weekday()) + timedelta(weeks=step)
+        return [week_start + timedelta(days=day) for day in (parsed['byday'] or [start.weekday()])]
+    months = step if freq == 'MONTHLY' else step * 12
+    candidate = _add_months(start, months)
+    return [candidate] if candidate else []
+
+
+def _first_period(start, parsed, from_date):
+    """Index of the period containing from_date, so open-ended rules skip straight to a window"""
+    freq = parsed['freq']
+    if freq == 'DAILY':
+        elapsed = (from_date - start).days
+    elif freq == 'WEEKLY':
+        elapsed = (from_date - (start - timedelta(days=start.weekday()))).days // 7
+    elif freq == 'MONTHLY':
+        elapsed = (from_date.year - start.year) * 12 + from_date.month - start.month
+    else:
+        elapsed = from_date.year - start.year
+    return max(0, elapsed // parsed['interval'])
+
+
+def occurrences(start, rule, window_start=None, window_end=None):
+    """Lazily yield the occurrence dates of a series that fall in [window_start, window_end)
+
+    COUNT rules are walked from the first occurrence (COUNT bounds the work);
+    other rules jump directly to the period that contains window_start.
+    """
+    parsed = parse_rule(rule) if isinstance(rule, str) else rule
+    if parsed['until'] and window_start and parsed['until'] < window_start:
+        return
+
+    period = 0
+    if window_start and not parsed['count']:
+        period = _first_period(start, parsed, window_start)
+
+    emitted = 0
+    empty_periods = 0
+    while empty_periods < MAX_EMPTY_PERIODS:
+        candidates = [day for day in _period_dates(start, parsed, period) if day >= start]
+        period += 1
+        empty_periods = 0 if candidates else empty_periods + 1
+
+        for day in candidates:
+            if parsed['until'] and day > parsed['until']:
+                return
+            if window_end and day >= window_end:
+                return
+            emitted += 1
+            if not window_start or day >= window_start:
+                yield day
+            if parsed['count'] and emitted >= parsed['count']:
+                return
@@ -0,0 +1,153 @@
+from flask import request
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from datetime import date, time
+import gzip
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder is used without it
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # brotli / zstandard are optional content codings
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Response layer: the JSON provider behind jsonify() (JSON_PROVIDER) and
+# Accept-Encoding negotiated compression of every response body (COMPRESS_*).
+# Dates and times serialize as ISO 8601 with either provider, so routes can put
+# date/time/datetime objects in their payloads instead of formatting them.
+COMPRESS_MIMETYPES = ('application/json', 'text/html', 'text/css', 'text/javascript',
+                      'application/javascript', 'text/calendar', 'text/plain')
+
+
+def json_default(value):
+    """Serializer for what the json module cannot encode; also used for the change stream"""
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)  # Decimal, UUID, dataclasses, __html__
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's encoder, with ISO dates instead of HTTP dates"""
+    default = staticmethod(json_default)
+
+
+class OrjsonJSONProvider(JSONProvider):
+    """orjson: several times faster than the json module, encodes dates natively"""
+    mimetype = 'application/json'
+    options = orjson.OPT_NON_STR_KEYS if orjson else 0  # {1: ...} becomes {"1": ...} as with json
+
+    def dumps(self, obj, **kwargs):
+        return self.dump_bytes(obj).decode('utf-8')
+
+    def dump_bytes(self, obj):
+        return orjson.dumps(obj, default=json_default, option=self.options)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dump_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+
+def make_json_provider(spec, app):
+    """JSON_PROVIDER: a JSONProvider class, 'orjson' or 'stdlib'; default orjson when installed"""
+    if isinstance(spec, type):
+        return spec(app)
+    if spec is None:
+        spec = 'orjson' if orjson is not None else 'stdlib'
+    if spec == 'orjson':
+        if orjson is None:
+            raise RuntimeError('JSON_PROVIDER orjson needs the orjson package')
+        return OrjsonJSONProvider(app)
+    if spec == 'stdlib':
+        return StdlibJSONProvider(app)
+    raise ValueError(f'Unknown JSON_PROVIDER: {spec!r}')
+
+
+def configure_json(app):
+    app.config.setdefault('JSON_PROVIDER', None)
+    app.json = make_json_provider(app.config['JSON_PROVIDER'], app)
+
+
+def available_encoders(levels):
+    """{content coding: compress(bytes)} for the codings this process can produce"""
+    encoders = {'gzip': lambda data: gzip.compress(data, compresslevel=levels['gzip'], mtime=0)}
+    if brotli is not None:
+        encoders['br'] = lambda data: brotli.compress(data, quality=levels['br'])
+    if zstandard is not None:
+        # A compressor per call: ZstdCompressor objects must not be shared between threads
+        encoders['zstd'] = lambda data: zstandard.ZstdCompressor(level=levels['zstd']).compress(data)
+    return encoders
+
+
+class ResponseCompressor:
+    """Compresses response bodies with the best coding the client accepts
+
+    Streamed responses (the change stream, NDJSON import, .ics export), files sent
+    from disk (the precompressed static bundles) and bodies under
+    COMPRESS_MIN_SIZE bytes go out unchanged.
+    """
+
+    def __init__(self):
+        self.encoders = {}
+        self.preference = ()
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESS_MIMETYPES', COMPRESS_MIMETYPES)
+        app.config.setdefault('COMPRESS_ENCODINGS', ('zstd', 'br', 'gzip'))  # Preferred first on equal q-values
+        # Fast levels: bodies are compressed per request, unlike the static bundles
+        app.config.setdefault('COMPRESS_LEVELS', {'gzip': 6, 'br': 4, 'zstd': 3})
+
+        app.extensions['response_compressor'] = self
+        if not app.config['COMPRESS_ENABLED']:
+            return
+
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        self.mimetypes = set(app.config['COMPRESS_MIMETYPES'])
+        self.encoders = available_encoders(app.config['COMPRESS_LEVELS'])
+        self.preference = [name for name in app.config['COMPRESS_ENCODINGS'] if name in self.encoders]
+        app.after_request(self._after_request)
+
+    def choose(self, accept_encodings):
+        """Coding with the highest q-value among the ones we support, or None"""
+        best, best_quality = None, 0
+        for name in self.preference:
+            quality = accept_encodings[name]
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    def _after_request(self, response):
+        if (response.direct_passthrough or response.is_streamed or response.mimetype not in self.mimetypes
+                or 'Content-Encoding' in response.headers or response.cache_control.no_transform):
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return response
+
+        encoding = self.choose(request.accept_encodings)
+        if encoding is None:
+            return response
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        response.set_data(self.encoders[encoding](body))
+        response.content_encoding = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)  # Same content, different bytes than the identity response
+        return response
+
+
+response_compressor = ResponseCompressor()
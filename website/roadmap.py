@@ -1,12 +1,19 @@
 from flask import Blueprint, render_template, request, jsonify
 from flask_login import login_required, current_user
-from .models import RoadmapGoal
+from .models import GoalProgressDay, RoadmapGoal
 from . import db
-from datetime import datetime, date
+from .versioning import bump_data_version, conditional_get
+from .scheduler import reminder_scheduler
+from .changes import record_change
+from .rollups import count_goal_change, goal_counts
+from datetime import datetime, date, timedelta
 import json
 
 roadmap_bp = Blueprint('roadmap', __name__)
 
+DEFAULT_PROGRESS_DAYS = 30  # Length of the /roadmap/progress series when the client gives none
+MAX_PROGRESS_DAYS = 366
+
 
 @roadmap_bp.route('/roadmap')
 @login_required
@@ -18,33 +25,32 @@ def roadmap_page():
 
 @roadmap_bp.route('/roadmap/goals', methods=['GET'])
 @login_required
+@conditional_get
 def get_goals():
     """Get all roadmap goals"""
     goals = RoadmapGoal.query.filter_by(user_id=current_user.id).order_by(RoadmapGoal.position).all()
+    return jsonify([goal_item(goal) for goal in goals])
 
-    goals_list = []
-    for goal in goals:
-        days_remaining = 0
-        is_overdue = False
-
-        if goal.deadline:
-            days_remaining = (goal.deadline - date.today()).days
-            is_overdue = days_remaining < 0 and not goal.is_completed
-
-        goals_list.append({
-            'id': goal.id,
-            'title': goal.title,
-            'description': goal.description or '',
-            'position': goal.position,
-            'deadline': goal.deadline.strftime('%Y-%m-%d') if goal.deadline else None,
-            'is_completed': goal.is_completed,
-            'created_at': goal.created_at.strftime('%Y-%m-%d %H:%M'),
-            'completed_at': goal.completed_at.strftime('%Y-%m-%d %H:%M') if goal.completed_at else None,
-            'days_remaining': days_remaining if days_remaining > 0 else 0,
-            'is_overdue': is_overdue
-        })
 
-    return jsonify(goals_list)
+def goal_item(goal):
+    """One goal as returned by /roadmap/goals (also the payload of goal deltas)"""
+    days_remaining = 0
+
+    if goal.deadline:
+        days_remaining = (goal.deadline - date.today()).days
+
+    return {
+        'id': goal.id,
+        'title': goal.title,
+        'description': goal.description or '',
+        'position': goal.position,
+        'deadline': goal.deadline,
+        'is_completed': goal.is_completed,
+        'created_at': goal.created_at,
+        'completed_at': goal.completed_at,
+        'days_remaining': days_remaining if days_remaining > 0 else 0,
+        'is_overdue': bool(goal.is_overdue)  # Maintained by the reminder scheduler
+    }
 
 
 @roadmap_bp.route('/roadmap/goals', methods=['POST'])
@@ -75,6 +81,12 @@ def create_goal():
         )
 
         db.session.add(new_goal)
+        db.session.flush()
+        count_goal_change(current_user.id, added=1)
+        reminder_scheduler.sync_goals([new_goal.id])
+        db.session.refresh(new_goal)  # is_overdue / created_at are set by SQL
+        record_change(current_user.id, 'goal', 'created', [new_goal.id], [goal_item(new_goal)])
+        bump_data_version(current_user.id)
         db.session.commit()
 
         return jsonify({
@@ -107,11 +119,19 @@ def update_goal(goal_id):
         if 'deadline' in data:
             goal.deadline = datetime.strptime(data['deadline'], '%Y-%m-%d').date() if data['deadline'] else None
         if 'is_completed' in data:
+            if bool(data['is_completed']) != bool(goal.is_completed):
+                count_goal_change(current_user.id, completed=1 if data['is_completed'] else -1)
             goal.is_completed = data['is_completed']
             goal.completed_at = datetime.now() if data['is_completed'] else None
         if 'position' in data:
             goal.position = data['position']
+        if 'deadline' in data or 'is_completed' in data:
+            reminder_scheduler.sync_goals([goal.id])
+        db.session.flush()
+        db.session.refresh(goal)
+        record_change(current_user.id, 'goal', 'updated', [goal.id], [goal_item(goal)])
 
+        bump_data_version(current_user.id)
         db.session.commit()
 
         return jsonify({
@@ -134,13 +154,22 @@ def delete_goal(goal_id):
         if goal.user_id != current_user.id:
             return jsonify({'error': 'Unauthorized'}), 403
 
+        deleted_position = goal.position
+        count_goal_change(current_user.id, added=-1, completed=-1 if goal.is_completed else 0,
+                          overdue=-1 if goal.is_overdue else 0)
         db.session.delete(goal)
-        db.session.commit()
 
-        # Reorder remaining goals
-        goals = RoadmapGoal.query.filter_by(user_id=current_user.id).order_by(RoadmapGoal.position).all()
-        for index, goal in enumerate(goals):
-            goal.position = index + 1
+        # Close the gap with one UPDATE instead of renumbering every goal
+        if deleted_position is not None:
+            db.session.execute(
+                db.update(RoadmapGoal)
+                .where(RoadmapGoal.user_id == current_user.id, RoadmapGoal.position > deleted_position)
+                .values(position=RoadmapGoal.position - 1),
+                execution_options={'synchronize_session': False}
+            )
+        reminder_scheduler.sync_goals([goal_id])
+        record_change(current_user.id, 'goal', 'deleted', [goal_id])
+        bump_data_version(current_user.id)
         db.session.commit()
 
         return jsonify({
@@ -161,11 +190,18 @@ def reorder_goals():
         data = request.json
         order = data.get('order', [])
 
-        for index, goal_id in enumerate(order):
-            goal = RoadmapGoal.query.get(goal_id)
-            if goal and goal.user_id == current_user.id:
-                goal.position = index + 1
-
+        # Single UPDATE ... SET position = CASE id WHEN ... END for the whole list
+        positions = {int(goal_id): index + 1 for index, goal_id in enumerate(order)}
+        if positions:
+            db.session.execute(
+                db.update(RoadmapGoal)
+                .where(RoadmapGoal.user_id == current_user.id, RoadmapGoal.id.in_(positions))
+                .values(position=db.case(positions, value=RoadmapGoal.id)),
+                execution_options={'synchronize_session': False}
+            )
+            record_change(current_user.id, 'goal', 'reordered', list(positions))
+
+        bump_data_version(current_user.id)
         db.session.commit()
 
         return jsonify({
@@ -180,14 +216,12 @@ def reorder_goals():
 
 @roadmap_bp.route('/roadmap/stats', methods=['GET'])
 @login_required
+@conditional_get
 def get_roadmap_stats():
     """Get roadmap statistics"""
-    goals = RoadmapGoal.query.filter_by(user_id=current_user.id).all()
-
-    total = len(goals)
-    completed = len([g for g in goals if g.is_completed])
+    # Counters are kept by the write paths, so this is a single primary key lookup
+    total, completed, overdue = goal_counts(current_user.id)
     pending = total - completed
-    overdue = len([g for g in goals if g.deadline and g.deadline < date.today() and not g.is_completed])
 
     completion_rate = 0
     if total > 0:
@@ -199,4 +233,54 @@ def get_roadmap_stats():
         'pending': pending,
         'overdue': overdue,
         'completion_rate': completion_rate
+    })
+
+
+@roadmap_bp.route('/roadmap/progress', methods=['GET'])
+@login_required
+@conditional_get
+def get_roadmap_progress():
+    """Burndown data: goals and open goals at the end of each of the last ?days= days"""
+    try:
+        days = int(request.args.get('days', DEFAULT_PROGRESS_DAYS))
+    except ValueError:
+        return jsonify({'error': 'days must be a number'}), 400
+    if not 1 <= days <= MAX_PROGRESS_DAYS:
+        return jsonify({'error': f'days must be between 1 and {MAX_PROGRESS_DAYS}'}), 400
+
+    end = date.today()
+    start = end - timedelta(days=days - 1)
+    rows = GoalProgressDay.query.filter(GoalProgressDay.user_id == current_user.id,
+                                        GoalProgressDay.day >= start).all()
+
+    # Walk back from today's counters, so only the rows inside the window are read
+    total, completed, overdue = goal_counts(current_user.id)
+    current_total, current_completed = total, completed
+    for row in rows:
+        total -= row.added
+        completed -= row.completed
+
+    changes = {row.day: row for row in rows}
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = changes.get(day)
+        if row:
+            total += row.added
+            completed += row.completed
+        series.append({
+            'date': day,
+            'added': row.added if row else 0,
+            'completed': row.completed if row else 0,
+            'total': total,
+            'remaining': total - completed
+        })
+
+    return jsonify({
+        'start': start,
+        'end': end,
+        'total': current_total,
+        'completed': current_completed,
+        'overdue': overdue,
+        'days': series
     })
\ No newline at end of file
@@ -0,0 +1,97 @@
+from collections import Counter
+from datetime import date, datetime
+from .models import GoalProgressDay, GoalRollup, RoadmapGoal
+from . import db
+
+# Goal counters and the daily completion series are updated by the write paths
+# (count_goal_change) so /roadmap/stats and /roadmap/progress never rescan
+# roadmap_goal. check_goal_rollups() / rebuild_goal_rollups() recompute them
+# from the goals themselves (flask check-rollups).
+
+
+def increment(model, key, values):
+    """Add `values` to the columns of one row, creating it when missing"""
+    updated = model.query.filter_by(**key).update(
+        {getattr(model, name): getattr(model, name) + value for name, value in values.items()},
+        synchronize_session=False)
+    if not updated:
+        db.session.add(model(**key, **values))
+
+
+def count_goal_change(user_id, added=0, completed=0, overdue=0, day=None):
+    """Record a change in the user's goals - call before the write path commits"""
+    if added or completed or overdue:
+        increment(GoalRollup, {'user_id': user_id}, {'total': added, 'completed': completed, 'overdue': overdue})
+    if added or completed:
+        increment(GoalProgressDay, {'user_id': user_id, 'day': day or date.today()},
+                  {'added': added, 'completed': completed})
+
+
+def goal_counts(user_id):
+    """(total, completed, overdue) of the user's goals"""
+    rollup = db.session.get(GoalRollup, user_id)
+    return (rollup.total, rollup.completed, rollup.overdue) if rollup else (0, 0, 0)
+
+
+def expected_counts(connection, user_ids=None):
+    """{user_id: (total, completed, overdue)} counted from roadmap_goal"""
+    query = db.select(
+        RoadmapGoal.user_id,
+        db.func.count(RoadmapGoal.id),
+        db.func.sum(db.case((RoadmapGoal.is_completed == True, 1), else_=0)),
+        db.func.sum(db.case((RoadmapGoal.is_overdue == True, 1), else_=0))
+    ).group_by(RoadmapGoal.user_id)
+    if user_ids is not None:
+        query = query.where(RoadmapGoal.user_id.in_(user_ids))
+    return {row[0]: (row[1], row[2] or 0, row[3] or 0) for row in connection.execute(query)}
+
+
+def check_goal_rollups(connection):
+    """{user_id: (stored, expected)} for every user whose counters or series disagree with the goals"""
+    expected = expected_counts(connection)
+    stored = {row.user_id: (row.total, row.completed, row.overdue)
+              for row in connection.execute(db.select(GoalRollup.__table__))}
+    series = {row[0]: (row[1] or 0, row[2] or 0) for row in connection.execute(
+        db.select(GoalProgressDay.user_id, db.func.sum(GoalProgressDay.added), db.func.sum(GoalProgressDay.completed))
+        .group_by(GoalProgressDay.user_id))}
+
+    mismatched = {}
+    for user_id in expected.keys() | stored.keys() | series.keys():
+        want = expected.get(user_id, (0, 0, 0))
+        have = stored.get(user_id, (0, 0, 0))
+        if have != want or series.get(user_id, (0, 0)) != want[:2]:
+            mismatched[user_id] = (have, want)
+    return mismatched
+
+
+def rebuild_goal_rollups(connection, user_ids=None):
+    """Recompute counters and series from roadmap_goal (all users, or only `user_ids`)
+
+    The rebuilt series places each goal on the day it was created and completed;
+    goals deleted in the meantime are no longer part of the history.
+    """
+    for model in (GoalRollup, GoalProgressDay):
+        delete = db.delete(model)
+        if user_ids is not None:
+            delete = delete.where(model.user_id.in_(user_ids))
+        connection.execute(delete)
+
+    counters = [{'user_id': user_id, 'total': total, 'completed': completed, 'overdue': overdue}
+                for user_id, (total, completed, overdue) in expected_counts(connection, user_ids).items()]
+    if counters:
+        connection.execute(db.insert(GoalRollup), counters)
+
+    added, completed = Counter(), Counter()
+    query = db.select(RoadmapGoal.user_id, RoadmapGoal.created_at, RoadmapGoal.is_completed, RoadmapGoal.completed_at)
+    if user_ids is not None:
+        query = query.where(RoadmapGoal.user_id.in_(user_ids))
+    for goal in connection.execute(query):
+        created = goal.created_at or goal.completed_at or datetime.now()
+        added[goal.user_id, created.date()] += 1
+        if goal.is_completed:
+            completed[goal.user_id, (goal.completed_at or created).date()] += 1
+
+    days = [{'user_id': user_id, 'day': day, 'added': added[user_id, day], 'completed': completed[user_id, day]}
+            for user_id, day in added.keys() | completed.keys()]
+    if days:
+        connection.execute(db.insert(GoalProgressDay), days)
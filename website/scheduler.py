@@ -0,0 +1,354 @@
+from datetime import datetime, time, timedelta
+from threading import Event, Lock, Thread
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .models import CalendarEvent, CalendarEventException, Reminder, RoadmapGoal
+from .recurrence import occurrences
+from .rollups import count_goal_change
+from collections import Counter
+from . import db
+import click
+import logging
+import queue
+import json
+
+logger = logging.getLogger(__name__)
+
+REMINDER_BATCH_SIZE = 500  # Reminders fired per transaction, ids per IN (...) when syncing
+MAX_SERIES_LOOKAHEAD = 400  # Occurrences checked when looking for the next start of a series
+GOAL_KINDS = ('goal_due', 'goal_overdue')
+EVENT_COLUMNS = (CalendarEvent.id, CalendarEvent.user_id, CalendarEvent.event_date,
+                 CalendarEvent.start_time, CalendarEvent.recurrence_rule)
+OPEN_GOAL = db.or_(RoadmapGoal.is_completed == False, RoadmapGoal.is_completed == None)
+
+
+class LogSink:
+    """Writes notifications to the application log (default sink)"""
+
+    def send(self, notification):
+        logger.info('Reminder for user %s: %s', notification['user_id'], notification['message'])
+
+
+class FileSink:
+    """Appends notifications to a file, one JSON object per line"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+
+    def send(self, notification):
+        line = json.dumps(notification)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+class QueueSink:
+    """Keeps notifications in memory; scripts and tests read them from .queue"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def send(self, notification):
+        self.queue.put(notification)
+
+
+def make_sink(spec):
+    """NOTIFICATION_SINK: any object with send(notification), 'log', 'queue' or 'file:<path>'"""
+    if hasattr(spec, 'send'):
+        return spec
+    if not spec or spec == 'log':
+        return LogSink()
+    if spec == 'queue':
+        return QueueSink()
+    if spec.startswith('file:'):
+        return FileSink(spec[len('file:'):])
+    raise ValueError(f'Unknown NOTIFICATION_SINK: {spec!r}')
+
+
+def goal_overdue_expression(today):
+    """SQL for 'deadline has passed and the goal is not completed'"""
+    return db.case((db.and_(RoadmapGoal.deadline < today, OPEN_GOAL), True), else_=False)
+
+
+def update_overdue_flags(goal_ids, today):
+    """Recompute is_overdue of the goals and count the flags that flipped in the rollups"""
+    overdue = goal_overdue_expression(today)
+    flipped = Counter()
+    for user_id, is_overdue in db.session.execute(
+            db.select(RoadmapGoal.user_id, overdue)
+            .where(RoadmapGoal.id.in_(goal_ids), db.func.coalesce(RoadmapGoal.is_overdue, False) != overdue)):
+        flipped[user_id] += 1 if is_overdue else -1
+
+    db.session.execute(
+        db.update(RoadmapGoal).where(RoadmapGoal.id.in_(goal_ids)).values(is_overdue=overdue),
+        execution_options={'synchronize_session': False}
+    )
+    for user_id, change in flipped.items():
+        count_goal_change(user_id, overdue=change)
+
+
+def next_event_start(row, after, exceptions=()):
+    """(start datetime, occurrence date) of the first occurrence starting after `after`, or None"""
+    if not row.recurrence_rule:
+        start = datetime.combine(row.event_date, row.start_time or time.min)
+        return (start, row.event_date) if start > after else None
+
+    changed = {exception.occurrence_date: exception for exception in exceptions}
+    for index, day in enumerate(occurrences(row.event_date, row.recurrence_rule, after.date())):
+        if index >= MAX_SERIES_LOOKAHEAD:
+            break
+        exception = changed.get(day)
+        if exception and exception.is_cancelled:
+            continue
+        start_date = exception.event_date if exception and exception.event_date else day
+        start_time = exception.start_time if exception and exception.start_time else row.start_time
+        start = datetime.combine(start_date, start_time or time.min)
+        if start > after:
+            return start, day
+    return None
+
+
+def event_reminder_rows(events, exceptions, after, lead):
+    """Reminder rows for events (id, user_id, event_date, start_time, recurrence_rule)"""
+    rows = []
+    for row in events:
+        start = next_event_start(row, after, exceptions.get(row.id, ()))
+        if start:
+            rows.append({'user_id': row.user_id, 'kind': 'event', 'target_id': row.id,
+                         'due_at': start[0] - lead, 'occurs_at': start[0]})
+    return rows
+
+
+def goal_reminder_rows(goals, now):
+    """Reminder rows for open goals with a deadline (id, user_id, deadline)"""
+    rows = []
+    for goal in goals:
+        # "Due today" at the start of the deadline day, "overdue" the day after
+        due = datetime.combine(goal.deadline, time.min)
+        for kind, due_at in (('goal_due', due), ('goal_overdue', due + timedelta(days=1))):
+            if due_at > now:
+                rows.append({'user_id': goal.user_id, 'kind': kind, 'target_id': goal.id,
+                             'due_at': due_at, 'occurs_at': due})
+    return rows
+
+
+def series_exceptions(connection, series_ids):
+    """Exceptions of the given series grouped by event id"""
+    exceptions = {}
+    for ids in chunks(series_ids):
+        for exception in connection.execute(
+                db.select(CalendarEventException.__table__).where(CalendarEventException.event_id.in_(ids))):
+            exceptions.setdefault(exception.event_id, []).append(exception)
+    return exceptions
+
+
+def backfill_reminders(connection, lead, now=None):
+    """Fill the reminder table and is_overdue for existing rows (used by the migration)"""
+    now = now or datetime.now()
+    connection.execute(db.update(RoadmapGoal).values(is_overdue=goal_overdue_expression(now.date())))
+
+    goals = connection.execute(
+        db.select(RoadmapGoal.id, RoadmapGoal.user_id, RoadmapGoal.deadline)
+        .where(RoadmapGoal.deadline >= now.date() - timedelta(days=1), OPEN_GOAL)).all()
+    events = connection.execute(
+        db.select(*EVENT_COLUMNS)
+        .where(db.or_(CalendarEvent.recurrence_rule != None, CalendarEvent.event_date >= now.date()))).all()
+    exceptions = series_exceptions(connection, [row.id for row in events if row.recurrence_rule])
+
+    rows = goal_reminder_rows(goals, now) + event_reminder_rows(events, exceptions, now, lead)
+    if rows:
+        connection.execute(db.insert(Reminder), rows)
+
+
+def chunks(ids):
+    ids = list(ids)
+    for index in range(0, len(ids), REMINDER_BATCH_SIZE):
+        yield ids[index:index + REMINDER_BATCH_SIZE]
+
+
+class ReminderScheduler:
+    """Background scheduler for event reminders and goal deadlines
+
+    Pending notifications live in the reminder table, indexed by due_at, so
+    finding the next one is a single index lookup. Write paths call
+    sync_events()/sync_goals() in their own transaction; a daemon thread sleeps
+    until the earliest due_at (or SCHEDULER_POLL_SECONDS), fires what is due
+    through the notification sink and flips RoadmapGoal.is_overdue, so reads
+    never have to compare deadlines with today.
+    """
+
+    def __init__(self, app=None):
+        self.sink = LogSink()
+        self.lead = timedelta(minutes=15)
+        self.poll_interval = 60
+        self._wake = Event()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SCHEDULER_ENABLED', True)
+        app.config.setdefault('SCHEDULER_POLL_SECONDS', 60)
+        app.config.setdefault('REMINDER_LEAD_MINUTES', 15)
+        app.config.setdefault('NOTIFICATION_SINK', 'log')
+        # The servers start the thread themselves (main.py, wsgi.init_worker), so flask CLI
+        # commands and scripts that create the app never claim due reminders
+        app.config.setdefault('SCHEDULER_AUTOSTART', False)
+
+        self.sink = make_sink(app.config['NOTIFICATION_SINK'])
+        self.lead = timedelta(minutes=app.config['REMINDER_LEAD_MINUTES'])
+        self.poll_interval = app.config['SCHEDULER_POLL_SECONDS']
+        app.extensions['reminder_scheduler'] = self
+
+        # Writes that scheduled something wake the thread once they are committed
+        if not event.contains(Session, 'after_commit', self._after_commit):
+            event.listen(Session, 'after_commit', self._after_commit)
+
+        @app.cli.command('send-reminders')
+        def send_reminders_command():
+            """Fire every reminder that is due now and exit"""
+            click.echo(f'Sent {len(self.run_due())} reminder(s).')
+
+        if app.config['SCHEDULER_ENABLED'] and app.config['SCHEDULER_AUTOSTART'] and not app.testing:
+            self.start(app)
+
+    def _after_commit(self, session):
+        if session.info.pop('reminders_changed', False):
+            self.wake()
+
+    def wake(self):
+        self._wake.set()
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, app):
+        if not self.running():
+            self._thread = Thread(target=self._run, args=(app,), name='reminder-scheduler', daemon=True)
+            self._thread.start()
+
+    def _run(self, app):
+        while True:
+            next_due = None
+            try:
+                with app.app_context():
+                    self.run_due()
+                    next_due = db.session.query(db.func.min(Reminder.due_at)).scalar()
+            except Exception:
+                logger.exception('Reminder scheduler failed')
+
+            timeout = self.poll_interval
+            if next_due is not None:
+                timeout = min(max((next_due - datetime.now()).total_seconds(), 0), timeout)
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def sync_events(self, event_ids, after=None):
+        """Rebuild the reminder of each event (deleted ids just lose theirs)"""
+        after = after or datetime.now()
+        for ids in chunks(event_ids):
+            db.session.execute(
+                db.delete(Reminder).where(Reminder.kind == 'event', Reminder.target_id.in_(ids)),
+                execution_options={'synchronize_session': False}
+            )
+            events = db.session.execute(db.select(*EVENT_COLUMNS).where(CalendarEvent.id.in_(ids))).all()
+            exceptions = series_exceptions(db.session, [row.id for row in events if row.recurrence_rule])
+
+            rows = event_reminder_rows(events, exceptions, after, self.lead)
+            if rows:
+                db.session.execute(db.insert(Reminder), rows)
+        db.session.info['reminders_changed'] = True
+
+    def sync_goals(self, goal_ids, now=None):
+        """Recompute is_overdue and the deadline reminders of each goal"""
+        now = now or datetime.now()
+        for ids in chunks(goal_ids):
+            update_overdue_flags(ids, now.date())
+            db.session.execute(
+                db.delete(Reminder).where(Reminder.kind.in_(GOAL_KINDS), Reminder.target_id.in_(ids)),
+                execution_options={'synchronize_session': False}
+            )
+            goals = db.session.execute(
+                db.select(RoadmapGoal.id, RoadmapGoal.user_id, RoadmapGoal.deadline)
+                .where(RoadmapGoal.id.in_(ids), RoadmapGoal.deadline != None, OPEN_GOAL)
+            ).all()
+
+            rows = goal_reminder_rows(goals, now)
+            if rows:
+                db.session.execute(db.insert(Reminder), rows)
+        db.session.info['reminders_changed'] = True
+
+    def run_due(self, now=None):
+        """Fire every reminder due at `now`; returns the notifications that were sent"""
+        from .versioning import bump_data_version
+        from .changes import record_change
+
+        now = now or datetime.now()
+        sent = []
+        while True:
+            due = db.session.execute(
+                db.select(Reminder.__table__).where(Reminder.due_at <= now)
+                .order_by(Reminder.due_at).limit(REMINDER_BATCH_SIZE)
+            ).all()
+            if not due:
+                break
+
+            # Deleting the row claims it, so several workers never send it twice
+            claimed = [reminder for reminder in due if db.session.execute(
+                db.delete(Reminder).where(Reminder.id == reminder.id),
+                execution_options={'synchronize_session': False}).rowcount]
+
+            event_ids = [r.target_id for r in claimed if r.kind == 'event']
+            goal_ids = [r.target_id for r in claimed if r.kind in GOAL_KINDS]
+            titles = {}
+            if event_ids:
+                titles.update((('event', row.id), row.title) for row in db.session.execute(
+                    db.select(CalendarEvent.id, CalendarEvent.title).where(CalendarEvent.id.in_(event_ids))))
+            if goal_ids:
+                titles.update((('goal', row.id), row.title) for row in db.session.execute(
+                    db.select(RoadmapGoal.id, RoadmapGoal.title).where(RoadmapGoal.id.in_(goal_ids))))
+
+            notifications = []
+            for reminder in claimed:
+                title = titles.get(('event' if reminder.kind == 'event' else 'goal', reminder.target_id))
+                if title is None:
+                    continue  # Target deleted after the reminder was read
+                title = title or 'Untitled'
+                if reminder.kind == 'event':
+                    # Next occurrence of a series; ones missed while the scheduler was down are skipped
+                    self.sync_events([reminder.target_id], after=max(reminder.occurs_at, now))
+                    if reminder.occurs_at < now:
+                        continue  # Already started, too late to remind
+                    message = f"{title} starts at {reminder.occurs_at.strftime('%Y-%m-%d %H:%M')}"
+                elif reminder.kind == 'goal_due':
+                    message = f'{title} is due today'
+                else:
+                    message = f'{title} is overdue'
+                notifications.append({
+                    'kind': reminder.kind,
+                    'user_id': reminder.user_id,
+                    'target_id': reminder.target_id,
+                    'title': title,
+                    'at': reminder.occurs_at.isoformat(),
+                    'message': message
+                })
+
+            overdue = [r for r in claimed if r.kind == 'goal_overdue']
+            if overdue:
+                update_overdue_flags([r.target_id for r in overdue], now.date())
+                for user_id in {r.user_id for r in overdue}:
+                    record_change(user_id, 'goal', 'updated', [r.target_id for r in overdue if r.user_id == user_id])
+                    bump_data_version(user_id)
+            db.session.commit()
+
+            # Only sent once the transaction that claimed them is committed
+            for notification in notifications:
+                try:
+                    self.sink.send(notification)
+                except Exception:
+                    logger.exception('Could not deliver reminder %s', notification)
+            sent += notifications
+        return sent
+
+
+reminder_scheduler = ReminderScheduler()
@@ -0,0 +1,218 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+from markupsafe import escape
+from sqlalchemy import bindparam, event, inspect, text
+from . import db
+from .compression import decompress_text
+from .models import Note
+from .versioning import conditional_get
+import re
+
+# blueprint for full-text search over notes, calendar events and roadmap goals
+search_bp = Blueprint('search', __name__)
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+FTS_OPTIONS = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4'"
+
+# One FTS5 table for events and goals; rowid = id * 3 + kind so the triggers
+# can find a row by rowid instead of scanning the index
+SEARCH_KINDS = {
+    # type: (kind, table, title expression, body expression, columns that trigger a re-index)
+    'event': (1, 'calendar_event', '{row}.title', '{row}.description', 'title, description, user_id'),
+    'goal': (2, 'roadmap_goal', '{row}.title', '{row}.description', 'title, description, user_id'),
+}
+# Note bodies are compressed, so notes have their own external-content index:
+# note_search keeps only the tokens and reads the text through the
+# note_search_content view (note_text() decompresses it) when a snippet is made.
+# The Note mapper events below keep it in sync - no trigger on note needs the
+# Python function, so writes from other SQLite clients still work.
+NOTE_KIND = 0
+KIND_NAMES = {NOTE_KIND: 'note', **{kind: name for name, (kind, *_) in SEARCH_KINDS.items()}}
+NOTE_INDEX_COLUMNS = ('body', 'user_id')
+
+
+def search_index_exists(connection):
+    return connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")).first() is not None
+
+
+def index_values(name, row):
+    """SQL for the (rowid, user_tag, title, body) of `row` ('new', 'old' or the table itself)"""
+    kind, _, title, body, _ = SEARCH_KINDS[name]
+    return f"{row}.id * 3 + {kind}, 'u' || {row}.user_id, " \
+           f"coalesce({title.format(row=row)}, ''), coalesce({body.format(row=row)}, '')"
+
+
+def create_search_triggers(connection, name):
+    """(Re)create the three triggers that keep one kind in sync with the index"""
+    kind, table, _, _, columns = SEARCH_KINDS[name]
+    insert = f"INSERT INTO search_index(rowid, user_tag, title, body) VALUES ({index_values(name, 'new')});"
+    delete = f"DELETE FROM search_index WHERE rowid = old.id * 3 + {kind};"
+
+    for suffix in ('insert', 'update', 'delete'):
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}"))
+    connection.execute(text(
+        f"CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN {insert} END"))
+    connection.execute(text(
+        f"CREATE TRIGGER {table}_search_update AFTER UPDATE OF {columns} ON {table} BEGIN {delete} {insert} END"))
+    connection.execute(text(
+        f"CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN {delete} END"))
+
+
+def create_search_index(connection):
+    """Create the FTS5 table, keep it in sync with triggers and fill it from existing rows"""
+    connection.execute(text(f"CREATE VIRTUAL TABLE search_index USING fts5(user_tag, title, body, {FTS_OPTIONS})"))
+
+    for name, (_, table, *_) in SEARCH_KINDS.items():
+        create_search_triggers(connection, name)
+        connection.execute(text(
+            f"INSERT INTO search_index(rowid, user_tag, title, body) SELECT {index_values(name, table)} FROM {table}"))
+
+
+def create_note_search_index(connection):
+    """Create note_search and its content view, then index every note"""
+    connection.execute(text(
+        "CREATE VIEW IF NOT EXISTS note_search_content AS "
+        "SELECT id, 'u' || user_id AS user_tag, '' AS title, note_text(body) AS body FROM note"))
+    connection.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS note_search USING fts5(user_tag, title, body, "
+        f"content = 'note_search_content', content_rowid = 'id', {FTS_OPTIONS})"))
+    rebuild_note_search_index(connection)
+
+
+def rebuild_note_search_index(connection):
+    """Re-read every note into note_search, e.g. after notes were changed outside the app"""
+    connection.execute(text("INSERT INTO note_search(note_search) VALUES ('rebuild')"))
+
+
+def note_documents(connection, note_ids):
+    """(rowid, user_tag, body) parameters for note_search of the notes as they are stored now"""
+    rows = connection.execute(db.select(Note.id, Note.user_id, Note.body).where(Note.id.in_(note_ids)))
+    return [{'rowid': note_id, 'user_tag': f'u{user_id}', 'body': decompress_text(body)}
+            for note_id, user_id, body in rows]
+
+
+def index_notes(connection, note_ids):
+    """Add notes to note_search; for inserts that bypass the ORM (the mapper events cover the rest)"""
+    documents = note_documents(connection, note_ids)
+    if documents:
+        connection.execute(text(
+            "INSERT INTO note_search(rowid, user_tag, title, body) VALUES (:rowid, :user_tag, '', :body)"), documents)
+
+
+def unindex_notes(connection, note_ids):
+    """Remove notes from note_search; an external-content index needs the text that was indexed"""
+    documents = note_documents(connection, note_ids)
+    if documents:
+        connection.execute(text(
+            "INSERT INTO note_search(note_search, rowid, user_tag, title, body) "
+            "VALUES ('delete', :rowid, :user_tag, '', :body)"), documents)
+
+
+def note_index_changed(note):
+    state = inspect(note)
+    return any(state.attrs[column].history.has_changes() for column in NOTE_INDEX_COLUMNS)
+
+
+@event.listens_for(Note, 'after_insert')
+def index_inserted_note(mapper, connection, note):
+    if connection.dialect.name == 'sqlite':
+        index_notes(connection, [note.id])
+
+
+@event.listens_for(Note, 'before_update')
+def unindex_updated_note(mapper, connection, note):
+    # Before the UPDATE, while the row still holds the indexed text
+    if connection.dialect.name == 'sqlite' and note_index_changed(note):
+        unindex_notes(connection, [note.id])
+
+
+@event.listens_for(Note, 'after_update')
+def index_updated_note(mapper, connection, note):
+    if connection.dialect.name == 'sqlite' and note_index_changed(note):
+        index_notes(connection, [note.id])
+
+
+@event.listens_for(Note, 'before_delete')
+def unindex_deleted_note(mapper, connection, note):
+    if connection.dialect.name == 'sqlite':
+        unindex_notes(connection, [note.id])
+
+
+def build_match_query(user_id, query):
+    """Turn free text into a safe FTS5 query: every word must match, the last one as a prefix"""
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = ' '.join(f'"{word}"' for word in words) + '*'
+    return f'user_tag : "u{user_id}" AND {{title body}} : ({terms})'
+
+
+def highlighted_rows(table, match, rowids):
+    """(rowid, title, snippet) of the given rows of one FTS table, with the matches marked"""
+    if not rowids:
+        return []
+    return db.session.execute(text(f"""
+        SELECT rowid,
+               highlight({table}, 1, char(2), char(3)) AS title,
+               snippet({table}, 2, char(2), char(3), '…', 16) AS snippet
+        FROM {table}
+        WHERE {table} MATCH :match AND rowid IN :rowids
+    """).bindparams(bindparam('rowids', expanding=True)), {'match': match, 'rowids': rowids}).all()
+
+
+def highlight_markup(value):
+    """Escape the indexed text, then turn the FTS5 match markers into <mark> tags"""
+    return str(escape(value or '')).replace('\x02', '<mark>').replace('\x03', '</mark>')
+
+
+@search_bp.route('/search', methods=['GET'])
+@login_required
+@conditional_get
+def search():
+    """Ranked, paginated search with highlighted snippets"""
+    match = build_match_query(current_user.id, request.args.get('q', ''))
+    kind = request.args.get('type')
+    limit = min(max(request.args.get('limit', SEARCH_PAGE_SIZE, type=int), 1), MAX_SEARCH_PAGE_SIZE)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    if db.engine.dialect.name != 'sqlite':
+        return jsonify({'error': 'Search is only available on SQLite (FTS5)'}), 501
+    if match is None:
+        return jsonify({'error': 'Search query required'}), 400
+    if kind is not None and kind not in KIND_NAMES.values():
+        return jsonify({'error': 'type must be note, event or goal'}), 400
+
+    # Rank first, on the tokens alone; bm25 of the two indexes is close enough to merge on
+    ranked = []
+    if kind in (None, 'note'):
+        ranked.append(f"SELECT rowid * 3 + {NOTE_KIND} AS rowid, bm25(note_search, 0.0, 10.0, 1.0) AS score "
+                      "FROM note_search WHERE note_search MATCH :match")
+    if kind != 'note':
+        kind_filter = f'AND rowid % 3 = {SEARCH_KINDS[kind][0]}' if kind else ''
+        ranked.append("SELECT rowid, bm25(search_index, 0.0, 10.0, 1.0) AS score "
+                      f"FROM search_index WHERE search_index MATCH :match {kind_filter}")
+    rows = db.session.execute(text(' UNION ALL '.join(ranked) + ' ORDER BY score LIMIT :limit OFFSET :offset'),
+                              {'match': match, 'limit': limit + 1, 'offset': offset}).all()
+
+    # Then highlight only the page, so only those notes are decompressed
+    page = [row.rowid for row in rows[:limit]]
+    note_ids = [rowid // 3 for rowid in page if rowid % 3 == NOTE_KIND]
+    highlights = {row.rowid * 3 + NOTE_KIND: row for row in highlighted_rows('note_search', match, note_ids)}
+    highlights.update((row.rowid, row) for row in highlighted_rows(
+        'search_index', match, [rowid for rowid in page if rowid % 3 != NOTE_KIND]))
+
+    results = []
+    for rowid in page:
+        results.append({
+            'type': KIND_NAMES[rowid % 3],
+            'id': rowid // 3,
+            'title': highlight_markup(highlights[rowid].title),
+            'snippet': highlight_markup(highlights[rowid].snippet)
+        })
+
+    return jsonify({
+        'results': results,
+        'nextOffset': offset + limit if len(rows) > limit else None
+    })
@@ -0,0 +1,930 @@
+document.addEventListener('DOMContentLoaded', function() {
+    let calendar;
+    let currentEventId = null;
+    let currentOccurrence = null;  // Date of the clicked occurrence when the event repeats
+    let notesCursor = null;  // Next page of the note picker
+    let upcomingEvents = [];  // Today onwards, kept in step with the change stream
+    let changes = null;  // EventSource of /changes/stream
+    const today = new Date().toISOString().split('T')[0];
+
+    // Initialize
+    initCalendar();
+    loadNotes();
+    loadStats();
+    loadUpcomingEvents();
+    changes = subscribeToChanges(applyChange, reloadAll);
+
+    // ISO time from the feed ('HH:MM:SS') -> 'HH:MM'
+    function formatClock(value) {
+        return value ? value.slice(0, 5) : value;
+    }
+
+    // Set today's date in form
+    document.getElementById('eventDate').value = today;
+
+    // Color picker
+    document.querySelectorAll('.color-option').forEach(option => {
+        option.addEventListener('click', function() {
+            document.querySelectorAll('.color-option').forEach(opt => opt.classList.remove('selected'));
+            this.classList.add('selected');
+            document.getElementById('eventColor').value = this.dataset.color;
+        });
+    });
+
+    // Set default color
+    document.querySelector('.color-option[data-color="#007bff"]').classList.add('selected');
+
+    // Form submission
+    document.getElementById('eventForm').addEventListener('submit', function(e) {
+        e.preventDefault();
+        saveEvent();
+    });
+
+    // Clear form
+    document.getElementById('clearFormBtn').addEventListener('click', resetForm);
+
+    // Navigation
+    document.getElementById('todayBtn').addEventListener('click', goToToday);
+    document.getElementById('todayBtnMain').addEventListener('click', goToToday);
+    document.getElementById('prevBtn').addEventListener('click', () => calendar.prev());
+    document.getElementById('nextBtn').addEventListener('click', () => calendar.next());
+
+    // View buttons
+    document.querySelectorAll('[data-view]').forEach(btn => {
+        btn.addEventListener('click', function() {
+            document.querySelectorAll('[data-view]').forEach(b => {
+                b.classList.remove('active');
+                b.classList.remove('btn-primary');
+                b.classList.add('btn-outline-primary');
+            });
+            this.classList.add('active');
+            this.classList.add('btn-primary');
+            this.classList.remove('btn-outline-primary');
+            calendar.changeView(this.dataset.view);
+        });
+    });
+
+    // Delete all events
+    document.getElementById('deleteAllBtn').addEventListener('click', function() {
+        if (confirm('Are you sure you want to delete ALL events? This cannot be undone!')) {
+            deleteAllEvents();
+        }
+    });
+
+    // Import .ics
+    document.getElementById('importBtn').addEventListener('click', () => document.getElementById('importFile').click());
+    document.getElementById('importFile').addEventListener('change', function() {
+        if (this.files.length) importCalendar(this.files[0]);
+        this.value = '';
+    });
+
+    // Modal buttons
+    document.getElementById('editEventBtn').addEventListener('click', function() {
+        $('#eventModal').modal('hide');
+        editEvent(currentEventId, currentOccurrence);
+    });
+
+    document.getElementById('deleteEventBtn').addEventListener('click', function() {
+        if (currentOccurrence) {
+            // OK removes just this occurrence, Cancel offers the whole series
+            if (confirm('Delete only this occurrence?\n\nOK = this occurrence, Cancel = whole series')) {
+                deleteEvent(currentEventId, currentOccurrence);
+            } else if (confirm('Delete the whole series?')) {
+                deleteEvent(currentEventId);
+            }
+            $('#eventModal').modal('hide');
+        } else if (confirm('Delete this event?')) {
+            deleteEvent(currentEventId);
+            $('#eventModal').modal('hide');
+        }
+    });
+
+    // Copy event button
+    document.getElementById('copyEventBtn').addEventListener('click', copyEventToClipboard);
+
+    function initCalendar() {
+        const calendarEl = document.getElementById('calendar');
+
+        calendar = new FullCalendar.Calendar(calendarEl, {
+            initialView: 'dayGridMonth',
+            headerToolbar: {
+                left: 'prev,next today',
+                center: 'title',
+                right: 'dayGridMonth,timeGridWeek,timeGridDay'
+            },
+            themeSystem: 'bootstrap',
+            height: 'auto',
+            editable: true,
+            selectable: true,
+            nowIndicator: true,
+            dayMaxEvents: 3,
+            events: '/calendar/events',
+            eventTextColor: '#ffffff',
+            eventDisplay: 'block',
+            eventTimeFormat: {
+                hour: '2-digit',
+                minute: '2-digit',
+                meridiem: 'short'
+            },
+            eventClick: function(info) {
+                showEventDetails(info.event);
+            },
+            dateClick: function(info) {
+                updateFormDate(info.dateStr);
+                document.getElementById('eventTitle').focus();
+            },
+            eventDrop: function(info) {
+                // Dragging an occurrence moves just that occurrence
+                const props = info.event.extendedProps || {};
+                updateEventDate(props.seriesId || info.event.id, info.event.startStr, props.occurrenceDate);
+            },
+            eventDidMount: function(info) {
+                // Add tooltip with description
+                if (info.event.extendedProps?.description) {
+                    info.el.setAttribute('data-description', info.event.extendedProps.description);
+                    info.el.title = info.event.extendedProps.description;
+                }
+
+                // Add indicator for events with notes
+                if (info.event.extendedProps?.hasNote) {
+                    info.el.classList.add('event-with-note');
+                    const noteIndicator = document.createElement('span');
+                    noteIndicator.innerHTML = ' 📝';
+                    info.el.querySelector('.fc-event-title')?.appendChild(noteIndicator);
+                }
+
+                // Add indicator for events with description
+                if (info.event.extendedProps?.description) {
+                    info.el.classList.add('event-with-description');
+                }
+            },
+            datesSet: function(info) {
+                updateCurrentMonth(info.view.currentStart);
+            },
+            loading: function(isLoading) {
+                if (isLoading) {
+                    console.log('🔄 Calendar loading...');
+                } else {
+                    console.log('✅ Calendar loaded');
+                }
+            }
+        });
+
+        calendar.render();
+        updateCurrentMonth(new Date());
+    }
+
+    function updateCurrentMonth(date) {
+        const monthNames = ["January", "February", "March", "April", "May", "June",
+            "July", "August", "September", "October", "November", "December"];
+        const month = monthNames[date.getMonth()];
+        const year = date.getFullYear();
+        document.getElementById('currentMonth').textContent = `${month} ${year}`;
+    }
+
+    function goToToday() {
+        calendar.today();
+        updateFormDate(today);
+    }
+
+    function updateFormDate(dateStr) {
+        document.getElementById('eventDate').value = dateStr;
+    }
+
+    function loadNotes(cursor = null) {
+        console.log("🔄 Loading notes for dropdown...");
+
+        const url = cursor ? `/calendar/notes?cursor=${encodeURIComponent(cursor)}` : '/calendar/notes';
+        fetch(url)
+            .then(response => {
+                console.log("Notes API status:", response.status);
+                if (!response.ok) {
+                    throw new Error(`API error: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(page => {
+                const notes = page.notes;
+                console.log(`📝 Received ${notes.length} notes:`, notes);
+
+                const select = document.getElementById('attachNote');
+                const selected = select.value;
+                document.getElementById('loadMoreNotesOption')?.remove();
+
+                if (!cursor) {
+                    select.innerHTML = '<option value="">-- No note --</option>';
+                }
+
+                if (!cursor && notes.length === 0) {
+                    console.warn("No notes found for current user!");
+                    const option = document.createElement('option');
+                    option.value = '';
+                    option.textContent = '⚠️ You have no notes yet. Create notes first.';
+                    option.disabled = true;
+                    select.appendChild(option);
+                    return;
+                }
+
+                notes.forEach(note => {
+                    if (select.querySelector(`option[value="${note.id}"]`)) return;
+                    const option = document.createElement('option');
+                    option.value = note.id;
+                    option.textContent = `📝 ${note.content}`;
+                    option.title = `Created: ${note.created_at}\nContent: ${note.content}`;
+                    select.appendChild(option);
+                });
+
+                // Further pages are only fetched when asked for
+                notesCursor = page.nextCursor;
+                if (notesCursor) {
+                    const more = document.createElement('option');
+                    more.id = 'loadMoreNotesOption';
+                    more.value = '__more__';
+                    more.textContent = '⬇️ Load more notes...';
+                    select.appendChild(more);
+                }
+                select.value = selected;
+
+                console.log("✅ Notes dropdown populated successfully");
+            })
+            .catch(error => {
+                console.error("❌ Failed to load notes:", error);
+                const select = document.getElementById('attachNote');
+                select.innerHTML = '<option value="">-- Error loading notes --</option>';
+
+                // Show error in UI
+                showNotification('⚠️ Could not load notes. Please refresh the page.', 'warning');
+            });
+    }
+
+    document.getElementById('attachNote').addEventListener('change', function() {
+        if (this.value === '__more__') {
+            this.value = '';
+            loadNotes(notesCursor);
+        }
+    });
+
+    // The attached note may be on a page that has not been loaded yet
+    function selectNoteOption(noteId) {
+        const select = document.getElementById('attachNote');
+        if (noteId && !select.querySelector(`option[value="${noteId}"]`)) {
+            const option = document.createElement('option');
+            option.value = noteId;
+            option.textContent = `📝 Note #${noteId}`;
+            select.insertBefore(option, document.getElementById('loadMoreNotesOption'));
+        }
+        select.value = noteId || '';
+    }
+
+    function loadStats() {
+        fetch('/calendar/stats')
+            .then(response => response.json())
+            .then(stats => {
+                document.getElementById('totalEvents').textContent = stats.total;
+                document.getElementById('todayEvents').textContent = stats.today;
+                document.getElementById('monthEvents').textContent = stats.month;
+            })
+            .catch(error => console.error('Error loading stats:', error));
+    }
+
+    function loadUpcomingEvents() {
+        console.log("🔄 Loading upcoming events with notes...");
+
+        // Only ask for events from today onwards
+        fetch(`/calendar/events?start=${today}`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`API error: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(events => {
+                upcomingEvents = events;
+                renderUpcomingEvents();
+            })
+            .catch(error => {
+                console.error("❌ Failed to load upcoming events:", error);
+                const container = document.getElementById('upcomingEvents');
+                container.innerHTML = `
+                    <div class="alert alert-warning text-center">
+                        <i class="fa fa-exclamation-triangle"></i> Could not load events
+                        <button class="btn btn-sm btn-outline-secondary mt-2 d-block mx-auto" onclick="loadUpcomingEvents()">
+                            <i class="fa fa-redo"></i> Try Again
+                        </button>
+                    </div>
+                `;
+            });
+    }
+
+    function renderUpcomingEvents(events = upcomingEvents) {
+        console.log(`📅 Showing ${events.length} upcoming events`);
+
+        const container = document.getElementById('upcomingEvents');
+
+        if (events.length === 0) {
+            container.innerHTML = `
+                <div class="text-center py-4">
+                    <i class="fa fa-calendar-times text-muted fa-3x mb-3"></i>
+                    <p class="text-muted">No upcoming events</p>
+                    <button class="btn btn-sm btn-outline-primary mt-2" onclick="document.getElementById('eventTitle').focus()">
+                        <i class="fa fa-plus"></i> Create your first event
+                    </button>
+                </div>
+            `;
+            return;
+        }
+
+        // Sort by date (closest first)
+        events.sort((a, b) => new Date(a.start) - new Date(b.start));
+
+        // Get next 5 events (or all if less than 5)
+        const upcoming = events.slice(0, 5);
+
+        let html = '<div class="upcoming-events-list">';
+
+        upcoming.forEach(event => {
+            const extendedProps = event.extendedProps || {};
+            const eventDate = new Date(event.start);
+
+            // Format date
+            const dateStr = eventDate.toLocaleDateString('en-US', {
+                weekday: 'short',
+                month: 'short',
+                day: 'numeric'
+            });
+
+            // Format time if exists
+            const timeStr = extendedProps.startTime ?
+                `<small class="text-info"><i class="fa fa-clock"></i> ${formatClock(extendedProps.startTime)}</small>` :
+                '<small class="text-muted"><i class="fa fa-clock"></i> All day</small>';
+
+            // Check if event has a note
+            const hasNote = extendedProps.noteId || extendedProps.noteContent;
+            const noteBadge = hasNote ?
+                '<span class="badge badge-warning badge-pill ml-2"><i class="fa fa-sticky-note"></i> Has note</span>' :
+                '';
+
+            // Get note preview (first 60 characters)
+            let notePreview = '';
+            if (extendedProps.noteContent) {
+                notePreview = `
+                    <div class="note-preview-container mt-2 p-2 bg-light rounded border-left-3">
+                        <small class="text-muted d-block"><i class="fa fa-sticky-note text-warning"></i> Attached note:</small>
+                        <small class="note-text">${extendedProps.noteContent}</small>
+                        ${extendedProps.noteId ?
+                            `<button class="btn btn-sm btn-outline-info btn-block mt-1" onclick="viewNoteFromEvent(${extendedProps.noteId})">
+                                <i class="fa fa-external-link-alt"></i> View Note
+                            </button>` : ''
+                        }
+                    </div>
+                `;
+            } else if (extendedProps.noteId) {
+                notePreview = `
+                    <div class="mt-2">
+                        <small class="text-muted">
+                            <i class="fa fa-sticky-note text-info"></i>
+                            Note #${extendedProps.noteId} attached
+                        </small>
+                        <button class="btn btn-sm btn-outline-info btn-block mt-1" onclick="viewNoteFromEvent(${extendedProps.noteId})">
+                            <i class="fa fa-external-link-alt"></i> View Note
+                        </button>
+                    </div>
+                `;
+            }
+
+            // Event description (if exists)
+            const description = extendedProps.description ?
+                `<small class="d-block text-muted mt-1 description-text">
+                    <i class="fa fa-align-left"></i> ${extendedProps.description.substring(0, 80)}${extendedProps.description.length > 80 ? '...' : ''}
+                </small>` : '';
+
+            // Event item HTML
+            html += `
+                <div class="event-list-item mb-3 p-3 rounded shadow-sm"
+                     style="border-left: 4px solid ${event.color || '#007bff'}; background: linear-gradient(90deg, ${event.color || '#007bff'}10, white);">
+                    <div class="d-flex justify-content-between align-items-start">
+                        <div class="flex-grow-1">
+                            <div class="d-flex align-items-center">
+                                <h6 class="mb-0 font-weight-bold event-title">${event.title}</h6>
+                                ${noteBadge}
+                                ${hasNote ? '<span class="badge badge-light badge-pill ml-1"><i class="fa fa-paperclip"></i></span>' : ''}
+                            </div>
+                            <div class="mt-2">
+                                <small class="text-primary">
+                                    <i class="fa fa-calendar-day"></i> ${dateStr}
+                                </small>
+                                <span class="mx-2">•</span>
+                                ${timeStr}
+                            </div>
+                            ${description}
+                            ${notePreview}
+                        </div>
+                        <button class="btn btn-sm btn-outline-primary ml-2 event-action-btn"
+                                onclick="editEventFromList(${extendedProps.seriesId || event.id}, ${extendedProps.occurrenceDate ? `'${extendedProps.occurrenceDate}'` : 'null'})"
+                                title="Edit this event">
+                            <i class="fa fa-edit"></i>
+                        </button>
+                    </div>
+                </div>
+            `;
+        });
+
+        // Add "View All" button if there are more events
+        if (events.length > 5) {
+            html += `
+                <div class="text-center mt-3">
+                    <button class="btn btn-outline-secondary btn-sm" onclick="showAllEvents()">
+                        <i class="fa fa-list"></i> View all ${events.length} events
+                    </button>
+                </div>
+            `;
+        }
+
+        html += '</div>';
+        container.innerHTML = html;
+
+        console.log("✅ Upcoming events loaded with notes");
+    }
+
+    // Helper functions for upcoming events actions
+    window.viewNoteFromEvent = function(noteId) {
+        console.log(`Opening note ${noteId} from event list`);
+
+        // Redirect to home page with highlight
+        window.location.href = `/?highlight=${noteId}&scrollToNote=true`;
+    };
+
+    window.editEventFromList = function(eventId, occurrence = null) {
+        console.log(`Editing event ${eventId} from list`);
+
+        // Fetch event details and populate form
+        fetch(eventUrl(eventId, occurrence))
+            .then(response => response.json())
+            .then(event => {
+                if (event.error) {
+                    alert('Error: ' + event.error);
+                    return;
+                }
+
+                // Populate edit form
+                document.getElementById('eventId').value = eventId;
+                fillRecurrence(event.recurrence, occurrence);
+                document.getElementById('eventTitle').value = event.title;
+                document.getElementById('eventDate').value = event.date.split('T')[0];
+                document.getElementById('eventDate').dataset.loaded = event.date.split('T')[0];
+                document.getElementById('startTime').value = event.startTime || '';
+                document.getElementById('endTime').value = event.endTime || '';
+                document.getElementById('eventDescription').value = event.description || '';
+                document.getElementById('eventColor').value = event.color || '#007bff';
+                selectNoteOption(event.noteId);
+
+                // Update color picker
+                document.querySelectorAll('.color-option').forEach(opt => opt.classList.remove('selected'));
+                const colorOpt = document.querySelector(`.color-option[data-color="${event.color || '#007bff'}"]`);
+                if (colorOpt) colorOpt.classList.add('selected');
+
+                // Update button text
+                document.getElementById('saveEventBtn').innerHTML = '<i class="fa fa-save"></i> Update Event';
+                document.getElementById('clearFormBtn').style.display = 'block';
+
+                // Focus and scroll to form
+                document.getElementById('eventTitle').focus();
+                document.querySelector('.sidebar').scrollIntoView({ behavior: 'smooth' });
+
+                showNotification(`✏️ Editing event: ${event.title}`, 'info');
+            })
+            .catch(error => {
+                console.error('Error loading event:', error);
+                alert('Error loading event details');
+            });
+    };
+
+    window.showAllEvents = function() {
+        // Switch calendar view to show all events
+        calendar.changeView('dayGridMonth');
+        calendar.gotoDate(new Date());
+        showNotification('📅 Showing all events in calendar', 'info');
+    };
+
+    function saveEvent() {
+        const eventId = document.getElementById('eventId').value;
+        const occurrence = document.getElementById('eventOccurrence').value;
+        const scope = document.getElementById('eventScope').value;
+        const url = eventId ? eventUrl(eventId, scope === 'occurrence' ? occurrence : null) : '/calendar/events';
+        const method = eventId ? 'PUT' : 'POST';
+        const dateInput = document.getElementById('eventDate');
+        const repeatSelect = document.getElementById('eventRepeat');
+
+        const eventData = {
+            title: document.getElementById('eventTitle').value,
+            date: dateInput.value,
+            startTime: document.getElementById('startTime').value || null,
+            endTime: document.getElementById('endTime').value || null,
+            description: document.getElementById('eventDescription').value,
+            color: document.getElementById('eventColor').value,
+            noteId: document.getElementById('attachNote').value || null
+        };
+
+        if (!occurrence || scope === 'series') {
+            // Keep rule parts the form cannot show (INTERVAL, BYDAY...) unless the user changed it
+            const rule = buildRecurrence();
+            eventData.recurrence = rule === repeatSelect.dataset.built ? repeatSelect.dataset.rule : rule;
+        }
+        if (occurrence && scope === 'series' && dateInput.value === dateInput.dataset.loaded) {
+            // The form shows the occurrence's date; don't move the series start to it
+            delete eventData.date;
+        }
+
+        if (!eventData.title.trim()) {
+            alert('Please enter a title for the event');
+            return;
+        }
+
+        fetch(url, {
+            method: method,
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(eventData)
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                // The change stream delivers the new event; reload only without it
+                if (!changeStreamOpen(changes)) reloadAll();
+                resetForm();
+                if (data.conflicts && data.conflicts.length) {
+                    const titles = [...new Set(data.conflicts.map(conflict => conflict.title || 'Untitled'))];
+                    showNotification(`⚠️ Event saved, but it overlaps: ${titles.join(', ')}`, 'warning');
+                } else {
+                    showNotification('✅ Event saved successfully!', 'success');
+                }
+            } else {
+                alert('Error: ' + (data.error || 'Unknown error'));
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Error saving event. Please try again.');
+        });
+    }
+
+    function showEventDetails(event) {
+        const extendedProps = event.extendedProps || {};
+        // Occurrences of a series have ids like "12@2024-05-06"
+        currentEventId = extendedProps.seriesId || event.id;
+        currentOccurrence = extendedProps.occurrenceDate || null;
+
+        document.getElementById('modalTitle').textContent = event.title;
+        document.getElementById('modalTitle').style.color = event.backgroundColor;
+
+        // Format date
+        const eventDate = new Date(event.start);
+        const dateStr = eventDate.toLocaleDateString('en-US', {
+            weekday: 'long',
+            year: 'numeric',
+            month: 'long',
+            day: 'numeric'
+        });
+        document.getElementById('modalDate').textContent = dateStr;
+
+        // Format time
+        const startTime = formatClock(extendedProps.startTime);
+        const endTime = formatClock(extendedProps.endTime);
+        const timeStr = startTime ?
+            `${startTime} ${endTime ? ' - ' + endTime : ''}` :
+            'All day event';
+        document.getElementById('modalTime').textContent = timeStr;
+
+        // Description - show as clickable if there's content
+        const desc = extendedProps.description || 'No description provided';
+        const descElement = document.getElementById('modalDescription');
+        descElement.textContent = desc;
+
+        if (desc && desc !== 'No description provided') {
+            descElement.style.cursor = 'pointer';
+            descElement.style.color = '#007bff';
+            descElement.title = 'Click to copy description';
+            descElement.onclick = function() {
+                navigator.clipboard.writeText(desc).then(() => {
+                    showNotification('📋 Description copied to clipboard!', 'success');
+                });
+            };
+        } else {
+            descElement.style.cursor = 'default';
+            descElement.style.color = 'inherit';
+            descElement.onclick = null;
+        }
+
+        // Note - make it interactive if there's a note
+        const noteElement = document.getElementById('modalNote');
+        if (extendedProps.noteId && extendedProps.noteContent) {
+            noteElement.innerHTML = `
+                <div class="note-attachment">
+                    <i class="fa fa-sticky-note text-warning"></i>
+                    <strong>Note attached:</strong>
+                    <div class="note-preview p-2 mt-1 bg-light rounded">
+                        ${extendedProps.noteContent}
+                    </div>
+                    <button class="btn btn-sm btn-outline-info mt-2" onclick="viewNoteFromEvent(${extendedProps.noteId})">
+                        <i class="fa fa-external-link-alt"></i> View Note
+                    </button>
+                    <button class="btn btn-sm btn-outline-secondary mt-2 ml-1" onclick="copyNoteContent('${extendedProps.noteContent.replace(/'/g, "\\'")}')">
+                        <i class="fa fa-copy"></i> Copy
+                    </button>
+                </div>
+            `;
+        } else if (extendedProps.noteId) {
+            noteElement.innerHTML = `
+                <span class="text-info">
+                    <i class="fa fa-sticky-note"></i> Note #${extendedProps.noteId} attached
+                </span>
+                <button class="btn btn-sm btn-outline-info ml-2" onclick="viewNoteFromEvent(${extendedProps.noteId})">
+                    View
+                </button>
+            `;
+        } else {
+            noteElement.innerHTML = '<span class="text-muted"><i class="fa fa-sticky-note"></i> No note attached</span>';
+        }
+
+        $('#eventModal').modal('show');
+    }
+
+    // Helper functions for notes
+    function copyNoteContent(content) {
+        navigator.clipboard.writeText(content).then(() => {
+            showNotification('📋 Note content copied to clipboard!', 'success');
+        });
+    }
+
+    function copyEventToClipboard() {
+        const title = document.getElementById('modalTitle').textContent;
+        const date = document.getElementById('modalDate').textContent;
+        const time = document.getElementById('modalTime').textContent;
+        const description = document.getElementById('modalDescription').textContent;
+
+        const eventText = `
+Event: ${title}
+Date: ${date}
+Time: ${time}
+Description: ${description}
+---`;
+
+        navigator.clipboard.writeText(eventText).then(() => {
+            showNotification('📋 Event details copied to clipboard!', 'success');
+        });
+    }
+
+    function editEvent(eventId, occurrence = null) {
+        fetch(eventUrl(eventId, occurrence))
+            .then(response => response.json())
+            .then(event => {
+                if (event.error) {
+                    alert('Error: ' + event.error);
+                    return;
+                }
+
+                document.getElementById('eventId').value = eventId;
+                fillRecurrence(event.recurrence, occurrence);
+                document.getElementById('eventTitle').value = event.title;
+                document.getElementById('eventDate').value = event.date.split('T')[0];
+                document.getElementById('eventDate').dataset.loaded = event.date.split('T')[0];
+                document.getElementById('startTime').value = event.startTime || '';
+                document.getElementById('endTime').value = event.endTime || '';
+                document.getElementById('eventDescription').value = event.description || '';
+                document.getElementById('eventColor').value = event.color || '#007bff';
+                selectNoteOption(event.noteId);
+
+                // Update color picker
+                document.querySelectorAll('.color-option').forEach(opt => opt.classList.remove('selected'));
+                const colorOpt = document.querySelector(`.color-option[data-color="${event.color || '#007bff'}"]`);
+                if (colorOpt) colorOpt.classList.add('selected');
+
+                document.getElementById('saveEventBtn').innerHTML = '<i class="fa fa-save"></i> Update Event';
+                document.getElementById('clearFormBtn').style.display = 'block';
+
+                document.getElementById('eventTitle').focus();
+            })
+            .catch(error => {
+                console.error('Error loading event:', error);
+                alert('Error loading event details');
+            });
+    }
+
+    function deleteEvent(eventId, occurrence = null) {
+        fetch(eventUrl(eventId, occurrence), { method: 'DELETE' })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    if (!changeStreamOpen(changes)) reloadAll();
+                    showNotification('🗑️ Event deleted', 'info');
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                alert('Error deleting event');
+            });
+    }
+
+    function deleteAllEvents() {
+        // One batch request deletes everything in a single transaction
+        fetch('/calendar/events/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ operations: [{ op: 'delete_where', filter: {} }] })
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    if (!changeStreamOpen(changes)) reloadAll();
+                    showNotification('🗑️ All events deleted', 'info');
+                } else {
+                    alert('Error: ' + (data.error || 'Could not delete events'));
+                }
+            })
+            .catch(error => {
+                console.error('Error deleting events:', error);
+                alert('Error deleting events');
+            });
+    }
+
+    function importCalendar(file) {
+        const progress = document.getElementById('importProgress');
+        const errors = [];
+        let summary = null;
+        progress.textContent = `Importing ${file.name}...`;
+
+        // The server answers with one JSON object per line while it works
+        function handleLine(line) {
+            if (!line.trim()) return;
+            const message = JSON.parse(line);
+            if (message.error) {
+                errors.push(`Line ${message.line}: ${message.error}`);
+            } else {
+                summary = message;
+                progress.textContent = `Imported ${message.imported} events` +
+                    (message.failed ? `, ${message.failed} skipped` : '');
+            }
+        }
+
+        fetch('/calendar/import', {
+            method: 'POST',
+            headers: { 'Content-Type': 'text/calendar' },
+            body: file
+        })
+        .then(async response => {
+            if (!response.ok) {
+                const data = await response.json();
+                throw new Error(data.error || `API error: ${response.status}`);
+            }
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                lines.forEach(handleLine);
+            }
+            handleLine(buffer);
+        })
+        .then(() => {
+            if (!changeStreamOpen(changes)) reloadAll();
+            if (errors.length) {
+                console.warn('Import errors:', errors);
+                progress.title = errors.join('\n');
+            }
+            showNotification(`📥 Imported ${summary ? summary.imported : 0} events` +
+                (errors.length ? ` (${summary ? summary.failed : errors.length} skipped)` : ''),
+                errors.length ? 'warning' : 'success');
+        })
+        .catch(error => {
+            console.error('Error importing calendar:', error);
+            progress.textContent = '';
+            alert('Error importing calendar: ' + error.message);
+        });
+    }
+
+    function updateEventDate(eventId, newDate, occurrence = null) {
+        fetch(eventUrl(eventId, occurrence), {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ date: newDate.split('T')[0] })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                calendar.refetchEvents();
+                showNotification('⚠️ Error updating event date', 'warning');
+            } else {
+                if (occurrence && !changeStreamOpen(changes)) calendar.refetchEvents();
+                showNotification('📅 Event date updated', 'success');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            calendar.refetchEvents();
+        });
+    }
+
+    function reloadAll() {
+        calendar.refetchEvents();
+        loadStats();
+        loadUpcomingEvents();
+    }
+
+    // Apply one delta from /changes/stream instead of downloading the feed again
+    function applyChange(change) {
+        if (change.type === 'all') return reloadAll();
+        if (change.type !== 'event') return;
+
+        const ids = new Set(change.ids.map(String));
+        const touched = item => ids.has(String((item.extendedProps || {}).seriesId || item.id));
+
+        if (change.action === 'deleted' || change.data) {
+            calendar.getEvents().filter(touched).forEach(event => event.remove());
+            upcomingEvents = upcomingEvents.filter(item => !touched(item));
+            (change.data || []).forEach(item => {
+                calendar.addEvent(item, true);  // Into the feed source, so a refetch replaces it
+                if (item.start.split('T')[0] >= today) upcomingEvents.push(item);
+            });
+            renderUpcomingEvents();
+            loadStats();
+        } else {
+            // Series, single occurrences and batches come without payload
+            reloadAll();
+        }
+    }
+
+    function eventUrl(eventId, occurrence = null) {
+        return occurrence ?
+            `/calendar/events/${eventId}?occurrence=${occurrence}` :
+            `/calendar/events/${eventId}`;
+    }
+
+    function buildRecurrence() {
+        const freq = document.getElementById('eventRepeat').value;
+        const until = document.getElementById('eventRepeatUntil').value;
+        if (!freq) return '';
+        return until ? `FREQ=${freq};UNTIL=${until.replace(/-/g, '')}` : `FREQ=${freq}`;
+    }
+
+    function fillRecurrence(rule, occurrence) {
+        const parts = Object.fromEntries((rule || '').split(';').filter(Boolean).map(part => part.split('=')));
+        const repeatSelect = document.getElementById('eventRepeat');
+        const until = parts.UNTIL || '';
+        repeatSelect.value = parts.FREQ || '';
+        document.getElementById('eventRepeatUntil').value = until ?
+            `${until.slice(0, 4)}-${until.slice(4, 6)}-${until.slice(6, 8)}` : '';
+        repeatSelect.dataset.rule = rule || '';
+        repeatSelect.dataset.built = buildRecurrence();
+
+        document.getElementById('eventOccurrence').value = occurrence || '';
+        document.getElementById('eventScope').value = 'occurrence';
+        document.getElementById('eventScopeGroup').style.display = occurrence ? 'block' : 'none';
+    }
+
+    function resetForm() {
+        document.getElementById('eventForm').reset();
+        document.getElementById('eventId').value = '';
+        fillRecurrence('', null);
+        document.getElementById('eventDate').value = today;
+        document.getElementById('saveEventBtn').innerHTML = '<i class="fa fa-save"></i> Save Event';
+        document.getElementById('clearFormBtn').style.display = 'none';
+
+        // Reset color picker
+        document.querySelectorAll('.color-option').forEach(opt => opt.classList.remove('selected'));
+        document.querySelector('.color-option[data-color="#007bff"]').classList.add('selected');
+        document.getElementById('eventColor').value = '#007bff';
+    }
+
+    function showNotification(message, type = 'info') {
+        const alertClass = type === 'success' ? 'alert-success' :
+                          type === 'warning' ? 'alert-warning' : 'alert-info';
+
+        const notification = document.createElement('div');
+        notification.className = `alert ${alertClass} alert-dismissible fade show`;
+        notification.style.cssText = `
+            position: fixed;
+            top: 20px;
+            right: 20px;
+            z-index: 1050;
+            min-width: 300px;
+            box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+        `;
+        notification.innerHTML = `
+            ${message}
+            <button type="button" class="close" data-dismiss="alert">
+                <span>&times;</span>
+            </button>
+        `;
+
+        document.body.appendChild(notification);
+
+        setTimeout(() => {
+            if (notification.parentNode) {
+                notification.remove();
+            }
+        }, 3000);
+    }
+});
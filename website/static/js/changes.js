@@ -0,0 +1,22 @@
+// Live updates: /changes/stream sends one "change" event per write to this user's data.
+// onChange(delta) applies a delta, onResync() reloads everything after the stream was lost.
+function subscribeToChanges(onChange, onResync) {
+  if (!window.EventSource) return null;
+
+  const source = new EventSource("/changes/stream");
+  let lost = false;
+  source.addEventListener("change", (event) => onChange(JSON.parse(event.data)));
+  source.onerror = () => { lost = true; };
+  source.onopen = () => {
+    if (lost) {
+      lost = false;
+      onResync();
+    }
+  };
+  return source;
+}
+
+// True while deltas arrive, so pages can skip their own reload after a write
+function changeStreamOpen(source) {
+  return !!source && source.readyState === EventSource.OPEN;
+}
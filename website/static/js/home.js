@@ -0,0 +1,342 @@
+// Global variable for note to delete
+let noteToDelete = null;
+
+// Function for confirmed deletion
+function confirmDelete(noteId) {
+  noteToDelete = noteId;
+  $('#deleteModal').modal('show');
+}
+
+// Event for confirmation button in modal
+document.getElementById('confirmDeleteBtn').addEventListener('click', function() {
+  if (noteToDelete) {
+    fetch("/delete-note", {
+      method: "POST",
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ noteId: noteToDelete }),
+    }).then((response) => {
+      if (response.ok) {
+        removeNote(noteToDelete);
+      } else {
+        alert('Error deleting note.');
+      }
+    }).catch(error => {
+      console.error('Error:', error);
+      alert('An error occurred.');
+    });
+  }
+  $('#deleteModal').modal('hide');
+});
+
+// Notes are loaded a page at a time, only previews travel until a note is edited/expanded
+let nextNotesCursor = null;
+let notesLoading = false;
+
+function renderNote(note) {
+  const item = document.createElement('li');
+  item.className = 'list-group-item note-item';
+  item.dataset.noteId = note.id;
+  item.innerHTML = `
+    <!-- Note content (editable on double-click) -->
+    <div class="note-content" ondblclick="enableEdit(${note.id})"></div>
+    ${note.truncated ? `<a href="#" class="small show-full-note" onclick="showFullNote(${note.id}); return false;">Show full note</a>` : ''}
+
+    <!-- Note date  -->
+    <small class="text-muted d-block mt-1">
+      <i class="fa fa-calendar"></i> ${note.created_at}
+    </small>
+
+    <!-- Action buttons -->
+    <div class="note-actions mt-2">
+      <button type="button" class="btn btn-sm btn-outline-primary" onclick="enableEdit(${note.id})">
+        <i class="fa fa-edit"></i> Edit
+      </button>
+      <button type="button" class="btn btn-sm btn-outline-danger ml-1" onclick="confirmDelete(${note.id})">
+        <i class="fa fa-trash"></i> Delete
+      </button>
+    </div>
+
+    <!-- Edit form (hidden initially) -->
+    <div class="edit-form mt-2" id="edit-form-${note.id}" style="display: none;">
+      <textarea class="form-control edit-textarea" id="edit-textarea-${note.id}"></textarea>
+      <div class="mt-1">
+        <button type="button" class="btn btn-sm btn-success" onclick="saveEdit(${note.id})">
+          <i class="fa fa-save"></i> Save
+        </button>
+        <button type="button" class="btn btn-sm btn-secondary ml-1" onclick="cancelEdit(${note.id})">
+          <i class="fa fa-times"></i> Cancel
+        </button>
+      </div>
+    </div>
+  `;
+  item.querySelector('.note-content').textContent = note.content;
+  item.dataset.truncated = note.truncated ? 'true' : 'false';
+  return item;
+}
+
+function loadNotesPage() {
+  if (notesLoading) return;
+  notesLoading = true;
+
+  const url = nextNotesCursor ? `/notes?cursor=${encodeURIComponent(nextNotesCursor)}` : '/notes';
+  fetch(url)
+    .then(response => {
+      if (!response.ok) {
+        throw new Error('Server error');
+      }
+      return response.json();
+    })
+    .then(page => {
+      const list = document.getElementById('notes');
+      page.notes.forEach(note => list.appendChild(renderNote(note)));
+
+      nextNotesCursor = page.nextCursor;
+      document.getElementById('loadMoreNotesBtn').style.display = nextNotesCursor ? 'inline-block' : 'none';
+      document.getElementById('noNotesMessage').style.display = list.children.length === 0 ? 'block' : 'none';
+    })
+    .catch(error => {
+      console.error('Error loading notes:', error);
+      showNotification('⚠️ Could not load notes. Please refresh the page.', 'info');
+    })
+    .finally(() => {
+      notesLoading = false;
+    });
+}
+
+function removeNote(noteId) {
+  document.querySelector(`.note-item[data-note-id="${noteId}"]`)?.remove();
+  document.getElementById('noNotesMessage').style.display =
+    document.getElementById('notes').children.length === 0 ? 'block' : 'none';
+}
+
+function reloadNotes() {
+  document.getElementById('notes').innerHTML = '';
+  nextNotesCursor = null;
+  loadNotesPage();
+}
+
+// Apply one delta from /changes/stream (e.g. a note written in another tab)
+function applyChange(change) {
+  if (change.type === 'all') return reloadNotes();
+  if (change.type !== 'note') return;
+
+  if (change.action === 'deleted') {
+    change.ids.forEach(removeNote);
+    return;
+  }
+  const list = document.getElementById('notes');
+  (change.data || []).forEach(note => {
+    const current = list.querySelector(`.note-item[data-note-id="${note.id}"]`);
+    if (current) {
+      // Leave a note that is being edited here alone
+      if (document.getElementById(`edit-form-${note.id}`).style.display === 'none') {
+        current.replaceWith(renderNote(note));
+      }
+    } else if (change.action === 'created') {
+      list.prepend(renderNote(note));
+    }
+  });
+  document.getElementById('noNotesMessage').style.display = list.children.length === 0 ? 'block' : 'none';
+}
+
+// Fetch the whole text of a note whose preview was cut
+function loadFullNote(noteId) {
+  const noteItem = document.querySelector(`.note-item[data-note-id="${noteId}"]`);
+  if (!noteItem || noteItem.dataset.truncated !== 'true') {
+    return Promise.resolve(noteItem);
+  }
+
+  return fetch(`/notes/${noteId}`)
+    .then(response => response.json())
+    .then(note => {
+      noteItem.querySelector('.note-content').textContent = note.data;
+      noteItem.querySelector('.show-full-note')?.remove();
+      noteItem.dataset.truncated = 'false';
+      return noteItem;
+    });
+}
+
+function showFullNote(noteId) {
+  loadFullNote(noteId).catch(error => console.error('Error loading note:', error));
+}
+
+// Functions for editing
+function enableEdit(noteId) {
+  loadFullNote(noteId)
+    .then(() => openEditForm(noteId))
+    .catch(error => {
+      console.error('Error loading note:', error);
+      alert('Error loading the note.');
+    });
+}
+
+function openEditForm(noteId) {
+  const noteItem = document.querySelector(`.note-item[data-note-id="${noteId}"]`);
+  if (!noteItem) return;
+
+  document.getElementById(`edit-textarea-${noteId}`).value =
+    noteItem.querySelector('.note-content').textContent;
+
+  // Hide original content
+  noteItem.querySelector('.note-content').style.display = 'none';
+
+  // Hide action buttons
+  const noteActions = noteItem.querySelector('.note-actions');
+  if (noteActions) noteActions.style.display = 'none';
+
+  // Show edit form
+  document.getElementById(`edit-form-${noteId}`).style.display = 'block';
+
+  // Focus on textarea and select all text
+  const textarea = document.getElementById(`edit-textarea-${noteId}`);
+  textarea.focus();
+  textarea.select();
+}
+
+function cancelEdit(noteId) {
+  const noteItem = document.querySelector(`.note-item[data-note-id="${noteId}"]`);
+  if (!noteItem) return;
+
+  // Show original content
+  noteItem.querySelector('.note-content').style.display = 'block';
+
+  // Show action buttons
+  const noteActions = noteItem.querySelector('.note-actions');
+  if (noteActions) noteActions.style.display = 'block';
+
+  // Hide edit form
+  document.getElementById(`edit-form-${noteId}`).style.display = 'none';
+}
+
+function saveEdit(noteId) {
+  const textarea = document.getElementById(`edit-textarea-${noteId}`);
+  if (!textarea) return;
+
+  const newData = textarea.value.trim();
+
+  if (!newData) {
+    alert('Note cannot be empty!');
+    textarea.focus();
+    return;
+  }
+
+  if (newData.length > 10000) {
+    alert('Note is too long! Maximum 10000 characters.');
+    return;
+  }
+
+  // Send edit request to server
+  fetch("/edit-note", {
+    method: "POST",
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({
+      noteId: noteId,
+      newData: newData
+    }),
+  })
+  .then(response => {
+    if (!response.ok) {
+      throw new Error('Server error');
+    }
+    return response.json();
+  })
+  .then(data => {
+    if (data.success) {
+      // Update displayed content
+      const noteContent = document.querySelector(`.note-item[data-note-id="${noteId}"] .note-content`);
+      if (noteContent) {
+        noteContent.textContent = newData;
+      }
+
+      // Update date (if returned)
+      if (data.newDate) {
+        const dateElement = document.querySelector(`.note-item[data-note-id="${noteId}"] .text-muted`);
+        if (dateElement) {
+          dateElement.innerHTML = `<i class="fa fa-calendar"></i> ${data.newDate}`;
+        }
+      }
+
+      // Back to normal view
+      cancelEdit(noteId);
+
+      // Success message
+      showNotification('✅ Note updated successfully!', 'success');
+    } else {
+      alert('Error: ' + (data.error || 'Unknown error'));
+    }
+  })
+  .catch(error => {
+    console.error('Error:', error);
+    alert('An error occurred while saving the note.');
+  });
+}
+
+// Function for character counter
+function updateCharCounter(textarea) {
+  if (!textarea) return;
+
+  const charCount = textarea.value.length;
+  const charCountSpan = document.getElementById('charCount');
+  if (charCountSpan) {
+    charCountSpan.textContent = charCount;
+  }
+
+  // Change color if approaching limit
+  if (charCountSpan) {
+    if (charCount > 9500) {
+      charCountSpan.style.color = 'red';
+      charCountSpan.style.fontWeight = 'bold';
+    } else if (charCount > 8000) {
+      charCountSpan.style.color = 'orange';
+    } else {
+      charCountSpan.style.color = 'inherit';
+      charCountSpan.style.fontWeight = 'normal';
+    }
+  }
+}
+
+// Function to clear textarea
+function clearTextarea() {
+  const textarea = document.getElementById('note');
+  if (textarea) {
+    textarea.value = '';
+    updateCharCounter(textarea);
+    textarea.focus();
+  }
+}
+
+// Function to show notifications
+function showNotification(message, type = 'info') {
+  const alertClass = type === 'success' ? 'alert-success' : 'alert-info';
+
+  const notification = document.createElement('div');
+  notification.className = `alert ${alertClass} alert-dismissible fade show`;
+  notification.style.cssText = 'position: fixed; top: 20px; right: 20px; z-index: 1050; min-width: 300px;';
+  notification.innerHTML = `
+    ${message}
+    <button type="button" class="close" data-dismiss="alert">
+      <span>&times;</span>
+    </button>
+  `;
+
+  document.body.appendChild(notification);
+
+  // Auto-remove after 3 seconds
+  setTimeout(() => {
+    notification.remove();
+  }, 3000);
+}
+
+// Initialize counter and first page of notes on page load
+document.addEventListener('DOMContentLoaded', function() {
+  const textarea = document.getElementById('note');
+  if (textarea) {
+    updateCharCounter(textarea);
+  }
+  loadNotesPage();
+  subscribeToChanges(applyChange, reloadNotes);
+});
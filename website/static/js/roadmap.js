@@ -0,0 +1,456 @@
+document.addEventListener('DOMContentLoaded', function() {
+    let currentGoalId = null;
+    let goals = [];
+    let changes = null;  // EventSource of /changes/stream
+
+    // Initialize
+    loadGoals();
+    loadStats();
+    initSortable();
+    changes = subscribeToChanges(applyChange, reloadGoals);
+
+    // Set default deadline to 7 days from now
+    const defaultDeadline = new Date();
+    defaultDeadline.setDate(defaultDeadline.getDate() + 7);
+    document.getElementById('goalDeadline').value = defaultDeadline.toISOString().split('T')[0];
+
+    // Form submission
+    document.getElementById('goalForm').addEventListener('submit', function(e) {
+        e.preventDefault();
+        saveGoal();
+    });
+
+    // Cancel edit
+    document.getElementById('cancelEditBtn').addEventListener('click', resetForm);
+
+    // Quick actions
+    document.getElementById('markAllCompleteBtn').addEventListener('click', markAllComplete);
+    document.getElementById('clearAllBtn').addEventListener('click', clearCompleted);
+    document.getElementById('sortByDeadlineBtn').addEventListener('click', sortByDeadline);
+    document.getElementById('sortByCompletionBtn').addEventListener('click', sortByCompletion);
+
+    // Modal buttons
+    document.getElementById('toggleCompleteBtn').addEventListener('click', function() {
+        toggleGoalComplete(currentGoalId);
+        $('#goalModal').modal('hide');
+    });
+
+    document.getElementById('editGoalBtn').addEventListener('click', function() {
+        $('#goalModal').modal('hide');
+        editGoal(currentGoalId);
+    });
+
+    document.getElementById('deleteGoalBtn').addEventListener('click', function() {
+        if (confirm('Delete this goal?')) {
+            deleteGoal(currentGoalId);
+            $('#goalModal').modal('hide');
+        }
+    });
+
+    function initSortable() {
+        const roadmapList = document.getElementById('roadmapList');
+
+        if (roadmapList) {
+            Sortable.create(roadmapList, {
+                animation: 150,
+                ghostClass: 'sortable-ghost',
+                chosenClass: 'sortable-chosen',
+                onEnd: function(evt) {
+                    reorderGoals();
+                }
+            });
+        }
+    }
+
+    function loadGoals() {
+        fetch('/roadmap/goals')
+            .then(response => response.json())
+            .then(data => {
+                goals = data;
+                renderGoals();
+            })
+            .catch(error => {
+                console.error('Error loading goals:', error);
+                showNotification('Error loading goals', 'error');
+            });
+    }
+
+    function reloadGoals() {
+        loadGoals();
+        loadStats();
+    }
+
+    // Apply one delta from /changes/stream instead of re-reading every goal
+    function applyChange(change) {
+        if (change.type === 'all') return reloadGoals();
+        if (change.type !== 'goal') return;
+
+        if (change.action === 'reordered') {
+            const position = new Map(change.ids.map((id, index) => [id, index]));
+            goals.sort((a, b) => (position.get(a.id) ?? Infinity) - (position.get(b.id) ?? Infinity));
+        } else if (change.action === 'deleted') {
+            goals = goals.filter(goal => !change.ids.includes(goal.id));
+        } else if (change.data) {
+            change.data.forEach(item => {
+                const index = goals.findIndex(goal => goal.id === item.id);
+                if (index === -1) goals.push(item);
+                else goals[index] = item;
+            });
+        } else {
+            // e.g. the scheduler flagging a goal overdue
+            return reloadGoals();
+        }
+        renderGoals();
+        loadStats();
+    }
+
+    function renderGoals() {
+        const container = document.getElementById('roadmapList');
+
+        if (goals.length === 0) {
+            container.innerHTML = `
+                <div class="text-center py-5">
+                    <i class="fa fa-road text-muted fa-3x mb-3"></i>
+                    <h4 class="text-muted">No goals yet</h4>
+                    <p class="text-muted">Add your first goal using the form on the left!</p>
+                </div>
+            `;
+            return;
+        }
+
+        let html = '';
+
+        goals.forEach(goal => {
+            const isCompleted = goal.is_completed;
+            const isOverdue = goal.is_overdue;
+
+            // Determine card class
+            let cardClass = 'goal-card';
+            if (isCompleted) cardClass += ' completed';
+            if (isOverdue) cardClass += ' overdue';
+
+            // Format deadline
+            let deadlineHtml = '';
+            if (goal.deadline) {
+                const deadlineClass = isOverdue ? 'badge-danger' : 'badge-info';
+                deadlineHtml = `
+                    <span class="badge ${deadlineClass} deadline-badge">
+                        <i class="fa fa-calendar"></i> ${goal.deadline}
+                        ${goal.days_remaining > 0 ? ` (${goal.days_remaining}d)` : ''}
+                    </span>
+                `;
+            }
+
+            // Status badge
+            const statusBadge = isCompleted ? 
+                '<span class="badge badge-success"><i class="fa fa-check"></i> Completed</span>' :
+                '<span class="badge badge-warning"><i class="fa fa-clock"></i> Pending</span>';
+
+            html += `
+                <div class="${cardClass}" data-goal-id="${goal.id}">
+                    <div class="goal-title">
+                        ${goal.title}
+                        <div class="float-right actions">
+                            <button class="btn btn-sm btn-outline-info" onclick="viewGoalDetails(${goal.id})">
+                                <i class="fa fa-eye"></i>
+                            </button>
+                            <button class="btn btn-sm btn-outline-primary" onclick="editGoal(${goal.id})">
+                                <i class="fa fa-edit"></i>
+                            </button>
+                            <button class="btn btn-sm btn-outline-danger" onclick="deleteGoal(${goal.id})">
+                                <i class="fa fa-trash"></i>
+                            </button>
+                        </div>
+                    </div>
+
+                    ${goal.description ? `
+                        <div class="goal-description">
+                            ${goal.description}
+                        </div>
+                    ` : ''}
+
+                    <div class="goal-meta">
+                        <div>
+                            ${statusBadge}
+                            ${deadlineHtml}
+                        </div>
+                        <div>
+                            <button class="btn btn-sm ${isCompleted ? 'btn-outline-warning' : 'btn-outline-success'}" 
+                                    onclick="toggleGoalComplete(${goal.id})">
+                                <i class="fa fa-${isCompleted ? 'undo' : 'check'}"></i>
+                                ${isCompleted ? 'Undo' : 'Complete'}
+                            </button>
+                        </div>
+                    </div>
+                </div>
+            `;
+        });
+
+        container.innerHTML = html;
+    }
+
+    function loadStats() {
+        fetch('/roadmap/stats')
+            .then(response => response.json())
+            .then(stats => {
+                document.getElementById('totalGoals').textContent = stats.total;
+                document.getElementById('completedGoals').textContent = stats.completed;
+                document.getElementById('pendingGoals').textContent = stats.pending;
+                document.getElementById('overdueGoals').textContent = stats.overdue;
+
+                // Update progress bar
+                const progressBar = document.getElementById('progressBar');
+                const progressText = document.getElementById('progressText');
+
+                if (stats.total > 0) {
+                    const percentage = stats.completion_rate;
+                    progressBar.style.width = `${percentage}%`;
+                    progressBar.textContent = `${percentage}%`;
+                    progressText.textContent = `${stats.completed}/${stats.total} goals completed`;
+                } else {
+                    progressBar.style.width = '0%';
+                    progressBar.textContent = '0%';
+                    progressText.textContent = 'No goals yet';
+                }
+            })
+            .catch(error => {
+                console.error('Error loading stats:', error);
+            });
+    }
+
+    function saveGoal() {
+        const goalId = document.getElementById('goalId').value;
+        const url = goalId ? `/roadmap/goals/${goalId}` : '/roadmap/goals';
+        const method = goalId ? 'PUT' : 'POST';
+
+        const goalData = {
+            title: document.getElementById('goalTitle').value,
+            description: document.getElementById('goalDescription').value,
+            deadline: document.getElementById('goalDeadline').value || null
+        };
+
+        if (!goalData.title.trim()) {
+            alert('Please enter a title for the goal');
+            return;
+        }
+
+        fetch(url, {
+            method: method,
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(goalData)
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                if (!changeStreamOpen(changes)) reloadGoals();
+                resetForm();
+                showNotification(goalId ? 'Goal updated!' : 'Goal added!', 'success');
+            } else {
+                alert('Error: ' + (data.error || 'Unknown error'));
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Error saving goal. Please try again.');
+        });
+    }
+
+    // Make functions available globally for onclick handlers
+    window.viewGoalDetails = function(goalId) {
+        currentGoalId = goalId;
+        const goal = goals.find(g => g.id === goalId);
+
+        if (!goal) return;
+
+        document.getElementById('modalGoalTitle').textContent = goal.title;
+        document.getElementById('modalGoalDescription').textContent = goal.description || 'No description provided';
+
+        if (goal.deadline) {
+            document.getElementById('modalGoalDeadline').textContent = goal.deadline;
+            document.getElementById('modalGoalDeadline').className = goal.is_overdue ? 'badge badge-danger' : 'badge badge-info';
+        } else {
+            document.getElementById('modalGoalDeadline').textContent = 'Not set';
+            document.getElementById('modalGoalDeadline').className = 'badge badge-secondary';
+        }
+
+        document.getElementById('modalGoalStatus').textContent = goal.is_completed ? 'Completed' : 'Active';
+        document.getElementById('modalGoalStatus').className = goal.is_completed ? 'badge badge-success' : 'badge badge-warning';
+
+        document.getElementById('modalGoalCreated').textContent = formatTimestamp(goal.created_at);
+        document.getElementById('modalGoalCompleted').textContent = formatTimestamp(goal.completed_at) || 'Not completed yet';
+
+        $('#goalModal').modal('show');
+    };
+
+    window.editGoal = function(goalId) {
+        const goal = goals.find(g => g.id === goalId);
+
+        if (!goal) return;
+
+        document.getElementById('goalId').value = goalId;
+        document.getElementById('goalTitle').value = goal.title;
+        document.getElementById('goalDescription').value = goal.description || '';
+        document.getElementById('goalDeadline').value = goal.deadline || '';
+
+        document.getElementById('saveGoalBtn').innerHTML = '<i class="fa fa-save"></i> Update Goal';
+        document.getElementById('cancelEditBtn').style.display = 'block';
+
+        document.getElementById('goalTitle').focus();
+
+        showNotification(`Editing: ${goal.title}`, 'info');
+    };
+
+    window.deleteGoal = function(goalId) {
+        if (!confirm('Are you sure you want to delete this goal?')) return;
+
+        fetch(`/roadmap/goals/${goalId}`, { method: 'DELETE' })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    if (!changeStreamOpen(changes)) reloadGoals();
+                    showNotification('Goal deleted', 'info');
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                alert('Error deleting goal');
+            });
+    };
+
+    window.toggleGoalComplete = function(goalId) {
+        const goal = goals.find(g => g.id === goalId);
+        if (!goal) return;
+
+        const newStatus = !goal.is_completed;
+
+        fetch(`/roadmap/goals/${goalId}`, {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ is_completed: newStatus })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                if (!changeStreamOpen(changes)) reloadGoals();
+                showNotification(`Goal marked as ${newStatus ? 'complete' : 'incomplete'}`, 'success');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Error updating goal');
+        });
+    };
+
+    function reorderGoals() {
+        const goalCards = document.querySelectorAll('.goal-card');
+        const order = Array.from(goalCards).map(card => parseInt(card.dataset.goalId));
+
+        fetch('/roadmap/goals/reorder', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ order: order })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success && !changeStreamOpen(changes)) {
+                loadGoals(); // Reload to get updated positions
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showNotification('Error reordering goals', 'error');
+        });
+    }
+
+    function markAllComplete() {
+        if (!confirm('Mark all goals as complete?')) return;
+
+        const promises = goals.map(goal => {
+            if (!goal.is_completed) {
+                return fetch(`/roadmap/goals/${goal.id}`, {
+                    method: 'PUT',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ is_completed: true })
+                });
+            }
+            return Promise.resolve();
+        });
+
+        Promise.all(promises)
+            .then(() => {
+                if (!changeStreamOpen(changes)) reloadGoals();
+                showNotification('All goals marked as complete!', 'success');
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                alert('Error updating goals');
+            });
+    }
+
+    function clearCompleted() {
+        if (!confirm('Delete all completed goals?')) return;
+
+        const completedGoals = goals.filter(goal => goal.is_completed);
+        const promises = completedGoals.map(goal => 
+            fetch(`/roadmap/goals/${goal.id}`, { method: 'DELETE' })
+        );
+
+        Promise.all(promises)
+            .then(() => {
+                if (!changeStreamOpen(changes)) reloadGoals();
+                showNotification('Completed goals cleared', 'info');
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                alert('Error deleting goals');
+            });
+    }
+
+    function sortByDeadline() {
+        goals.sort((a, b) => {
+            if (!a.deadline && !b.deadline) return 0;
+            if (!a.deadline) return 1;
+            if (!b.deadline) return -1;
+            return new Date(a.deadline) - new Date(b.deadline);
+        });
+        renderGoals();
+        showNotification('Sorted by deadline', 'info');
+    }
+
+    function sortByCompletion() {
+        goals.sort((a, b) => {
+            if (a.is_completed === b.is_completed) return 0;
+            return a.is_completed ? 1 : -1;
+        });
+        renderGoals();
+        showNotification('Sorted by completion status', 'info');
+    }
+
+    function resetForm() {
+        document.getElementById('goalForm').reset();
+        document.getElementById('goalId').value = '';
+
+        // Reset deadline to default
+        const defaultDeadline = new Date();
+        defaultDeadline.setDate(defaultDeadline.getDate() + 7);
+        document.getElementById('goalDeadline').value = defaultDeadline.toISOString().split('T')[0];
+
+        document.getElementById('saveGoalBtn').innerHTML = '<i class="fa fa-plus"></i> Add Goal';
+        document.getElementById('cancelEditBtn').style.display = 'none';
+    }
+
+    // ISO timestamp from the API -> 'YYYY-MM-DD HH:MM'
+    function formatTimestamp(value) {
+        return value ? value.slice(0, 16).replace('T', ' ') : value;
+    }
+
+    function showNotification(message, type = 'info') {
+        // You can use the showNotification function from your existing code
+        if (typeof window.showNotification === 'function') {
+            window.showNotification(message, type);
+        } else {
+            // Fallback simple notification
+            alert(message);
+        }
+    }
+});
@@ -0,0 +1,59 @@
+from flask import request, make_response
+from flask_login import current_user
+from functools import wraps
+from datetime import date
+from .models import ChangeVersion
+from . import db, response_cache
+
+
+def bump_data_version(user_id):
+    """Mark the user's data as changed - call before the write path commits"""
+    # Cached responses are keyed by version anyway, this just frees them early
+    response_cache.invalidate_user(user_id)
+    updated = ChangeVersion.query.filter_by(user_id=user_id).update(
+        {ChangeVersion.version: ChangeVersion.version + 1}, synchronize_session=False)
+    if not updated:
+        db.session.add(ChangeVersion(user_id=user_id, version=1))
+
+
+def data_etag(user_id):
+    """Strong ETag for everything derived from the user's data"""
+    version = db.session.query(ChangeVersion.version).filter_by(user_id=user_id).scalar() or 0
+    # Day is part of the tag because stats and deadlines depend on today's date
+    return f'u{user_id}-v{version}-{date.today().isoformat()}'
+
+
+def conditional_get(view):
+    """Answer 304 Not Modified when the client already has the current version,
+    otherwise serve the encoded JSON from the response cache when possible
+
+    Only complete 200 responses are cached and tagged: errors, and views that
+    mark a degraded body with Cache-Control: no-store, go out without an ETag.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        user_id = current_user.id
+        etag = data_etag(user_id)
+        cache_key = f'{etag}:{request.full_path}'
+
+        # Weak comparison: compressed responses carry the same tag as W/"..."
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            body = response_cache.get(cache_key)
+            if body is not None:
+                response = make_response(body)
+                response.mimetype = 'application/json'
+                response.headers['X-Cache'] = 'HIT'
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.cache_control.no_store:
+                    return response
+                response_cache.set(cache_key, response.get_data(), user_id)
+                response.headers['X-Cache'] = 'MISS'
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    return wrapper
@@ -2,12 +2,61 @@ from flask import Blueprint, render_template, request, flash, jsonify
 from flask_login import login_required, current_user
 from .models import Note
 from . import db
+from .versioning import bump_data_version, conditional_get
+from .changes import record_change
 from datetime import datetime
 import json
 
 # blueprint for notes section
 views = Blueprint('views', __name__)
 
+NOTES_PAGE_SIZE = 20
+MAX_NOTES_PAGE_SIZE = 100
+
+
+def note_item(note_id, preview, char_count, created_at, preview_length=300):
+    """One note in the format of /notes (also the payload of note deltas)"""
+    return {
+        'id': note_id,
+        'content': preview[:preview_length] + ('...' if char_count > preview_length else ''),
+        'truncated': char_count > preview_length,
+        'created_at': str(created_at)[:16]
+    }
+
+
+def note_previews_page(user_id, cursor=None, limit=NOTES_PAGE_SIZE, preview_length=300):
+    """One page of a user's notes, newest first, without loading the full note bodies
+
+    The cursor is '<ISO date>|<id>' of the last note on the previous page, so
+    every page is an index range scan on (user_id, date) no matter how deep it is.
+    Only the stored preview and length are read; bodies are never decompressed.
+    """
+    preview = db.func.substr(Note.preview, 1, preview_length).label('preview')
+
+    query = db.session.query(Note.id, Note.date, preview, Note.char_count).filter(Note.user_id == user_id)
+    if cursor:
+        cursor_date, cursor_id = cursor.rsplit('|', 1)
+        query = query.filter(db.tuple_(Note.date, Note.id) <
+                             db.tuple_(db.literal(datetime.fromisoformat(cursor_date), Note.date.type),
+                                       db.literal(int(cursor_id))))
+
+    rows = query.order_by(Note.date.desc(), Note.id.desc()).limit(limit + 1).all()
+
+    notes = [note_item(row.id, row.preview, row.char_count, row.date, preview_length) for row in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = f'{last.date.isoformat()}|{last.id}'
+
+    return {'notes': notes, 'nextCursor': next_cursor}
+
+
+def page_args():
+    """Read ?cursor=&limit= for the paginated note endpoints"""
+    limit = min(max(request.args.get('limit', NOTES_PAGE_SIZE, type=int), 1), MAX_NOTES_PAGE_SIZE)
+    return request.args.get('cursor'), limit
+
 
 @views.route('/', methods=['GET', 'POST'])
 @login_required
@@ -20,13 +69,45 @@ def home():
         else:
             new_note = Note(data=note, user_id=current_user.id)  # provide schema for note
             db.session.add(new_note)  # add note to database
+            db.session.flush()
+            record_change(current_user.id, 'note', 'created', [new_note.id],
+                          [note_item(new_note.id, new_note.preview, new_note.char_count, new_note.date)])
+            bump_data_version(current_user.id)
             db.session.commit()
             flash('Note added!', category='success')
 
-    # Pass today's date to template for calendar feature
+    # Pass today's date to template for calendar feature, notes are loaded page by page from /notes
     return render_template("home.html", user=current_user, today=datetime.now().strftime('%Y-%m-%d'))
 
 
+@views.route('/notes', methods=['GET'])
+@login_required
+@conditional_get
+def list_notes():
+    """Paginated note previews for the home page"""
+    cursor, limit = page_args()
+    try:
+        return jsonify(note_previews_page(current_user.id, cursor, limit))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+
+@views.route('/notes/<int:note_id>', methods=['GET'])
+@login_required
+def get_note(note_id):
+    """Full text of a single note (for editing / expanding a preview)"""
+    note = Note.query.get_or_404(note_id)
+
+    if note.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    return jsonify({
+        'id': note.id,
+        'data': note.data,
+        'created_at': note.date.strftime('%Y-%m-%d %H:%M')
+    })
+
+
 @views.route('/delete-note', methods=['POST'])
 def delete_note():
     note = json.loads(request.data)  # This function expects a JSON from INDEX.js file
@@ -35,6 +116,8 @@ def delete_note():
     if note:
         if note.user_id == current_user.id:
             db.session.delete(note)
+            record_change(current_user.id, 'note', 'deleted', [note.id])
+            bump_data_version(current_user.id)
             db.session.commit()
 
     return jsonify({})
@@ -62,8 +145,12 @@ def edit_note():
 
         # Update note content
         from sqlalchemy.sql import func  # Import here to avoid circular imports
-        note.data = new_data
+        note.data = new_data  # Compressed, with preview and char_count, by the model
         note.date = func.now()  # Update date to current time
+        db.session.flush()
+        record_change(current_user.id, 'note', 'updated', [note.id],
+                      [note_item(note.id, note.preview, note.char_count, note.date)])
+        bump_data_version(current_user.id)
 
         db.session.commit()
 
@@ -71,7 +158,7 @@ def edit_note():
             'success': True,
             'message': 'Note updated successfully',
             'noteId': note.id,
-            'newData': note.data,
+            'newData': new_data,
             'newDate': note.date.strftime('%Y-%m-%d %H:%M:%S')
         })
 
@@ -0,0 +1,43 @@
+"""Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+Settings come from FLASK_* environment variables (FLASK_SECRET_KEY,
+FLASK_CHANGE_BROKER, FLASK_METRICS_TOKEN, ...; values are parsed as JSON
+when they can be), on top of the production defaults below. main.py stays
+the development server.
+"""
+from flask import Config
+from website import create_app, db
+from website.scheduler import reminder_scheduler
+import logging
+
+PRODUCTION_DEFAULTS = {
+    'CHANGE_BROKER': 'database',  # Every worker must see every change
+}
+
+
+def env_config():
+    config = Config('')
+    config.from_prefixed_env()
+    return dict(config)
+
+
+config = dict(PRODUCTION_DEFAULTS, **env_config())
+if 'SECRET_KEY' not in config:
+    logging.getLogger(__name__).warning('FLASK_SECRET_KEY is not set; sessions use the built-in development key')
+
+# With preload_app the app is created once in the gunicorn master; a thread
+# started there would not exist in the forked workers, so each worker starts
+# its own scheduler in init_worker() (claiming a reminder is safe across workers)
+app = create_app(config)
+
+# Compile every template now, so preloaded workers share them instead of each compiling on first use
+for template in app.jinja_env.list_templates():
+    app.jinja_env.get_template(template)
+
+
+def init_worker():
+    """Per-process setup, called by gunicorn once a worker has loaded the app"""
+    with app.app_context():
+        db.engine.dispose(close=False)  # Never reuse connections opened by the master before the fork
+    if app.config['SCHEDULER_ENABLED']:
+        reminder_scheduler.start(app)